@@ -0,0 +1,130 @@
+# benchmarks/bench_db_pool.py
+"""Бенчмарк: соединение на каждый запрос против пула соединений.
+
+Запуск: python -m benchmarks.bench_db_pool [--queries 5000] [--threads 4]
+"""
+
+import argparse
+import os
+import sqlite3
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.db_pool import ConnectionPool  # noqa: E402
+
+USER_TASKS_SQL = """
+    SELECT id, title, description, deadline, priority, is_completed
+    FROM tasks
+    WHERE user_id = ? AND is_completed = 0
+    ORDER BY deadline
+"""
+
+
+def prepare_database(path: str, users: int = 200, tasks_per_user: int = 20):
+    conn = sqlite3.connect(path)
+    conn.executescript(
+        """
+        CREATE TABLE tasks (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            title TEXT NOT NULL,
+            description TEXT,
+            deadline DATE,
+            priority TEXT,
+            is_completed BOOLEAN DEFAULT 0
+        );
+        CREATE INDEX idx_tasks_user_id ON tasks(user_id);
+        """
+    )
+    conn.executemany(
+        "INSERT INTO tasks (user_id, title, deadline, priority) VALUES (?, ?, ?, ?)",
+        (
+            (u, f"Задача {i}", f"2030-01-{i % 28 + 1:02d}", "medium")
+            for u in range(users)
+            for i in range(tasks_per_user)
+        ),
+    )
+    conn.commit()
+    conn.close()
+
+
+def naive_connection(path: str):
+    """Старое поведение get_connection(): новое соединение на каждый вызов"""
+    conn = sqlite3.connect(path)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA foreign_keys = ON")
+    return conn
+
+
+def run_workload(get_conn, queries: int, threads: int, write_every: int = 10):
+    latencies = []
+    lock = threading.Lock()
+
+    def worker(offset: int):
+        local = []
+        for i in range(queries // threads):
+            started = time.perf_counter()
+            conn = get_conn()
+            user_id = (offset + i) % 200
+            if i % write_every == 0:
+                conn.execute(
+                    "UPDATE tasks SET priority = 'high' WHERE user_id = ? AND id % 7 = 0",
+                    (user_id,),
+                )
+                conn.commit()
+            else:
+                conn.execute(USER_TASKS_SQL, (user_id,)).fetchall()
+            conn.close()
+            local.append(time.perf_counter() - started)
+        with lock:
+            latencies.extend(local)
+
+    started = time.perf_counter()
+    pool = [threading.Thread(target=worker, args=(n * 1000,)) for n in range(threads)]
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    elapsed = time.perf_counter() - started
+    return latencies, elapsed
+
+
+def report(name: str, latencies: list, elapsed: float, opens: int):
+    latencies.sort()
+    p99 = latencies[int(len(latencies) * 0.99) - 1] * 1000
+    p50 = statistics.median(latencies) * 1000
+    print(
+        f"{name:<10} запросов/с: {len(latencies) / elapsed:9.0f}  "
+        f"открытий/с: {opens / elapsed:9.0f}  "
+        f"p50: {p50:6.3f} мс  p99: {p99:6.3f} мс"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--queries", type=int, default=5000)
+    parser.add_argument("--threads", type=int, default=4)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        prepare_database(path)
+
+        latencies, elapsed = run_workload(
+            lambda: naive_connection(path), args.queries, args.threads
+        )
+        report("до", latencies, elapsed, opens=len(latencies))
+
+        pool = ConnectionPool(path)
+        latencies, elapsed = run_workload(pool.acquire, args.queries, args.threads)
+        report("после", latencies, elapsed, opens=pool.stats["opened"])
+        pool.close_all()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+# benchmarks/bench_delivery.py
+"""Бенчмарк доставки напоминаний через локальный фейковый Bot API.
+
+«До» — старый цикл send_scheduled_reminders: сообщения по одному,
+отметка reminder_sent после каждого. «После» — DeliveryPipeline с пулом
+воркеров, token bucket и пакетными отметками. Фейковый сервер держит
+лимиты Telegram (30 сообщений/с, 1 сообщение/с в чат) и отвечает 429.
+
+Запуск: python -m benchmarks.bench_delivery [--reminders 600] [--chats 300] [--latency 0.05]
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from benchmarks.fake_bot_api import FakeBotAPI  # noqa: E402
+from src.delivery import DeliveryPipeline  # noqa: E402
+
+
+def make_reminders(count: int, chats: int):
+    return [
+        {"id": i, "telegram_id": 1000 + i % chats, "text": f"Напоминание {i}"}
+        for i in range(count)
+    ]
+
+
+async def run_sequential(bot, reminders):
+    sent = failed = commits = 0
+    for reminder in reminders:
+        try:
+            await bot.send_message(chat_id=reminder["telegram_id"], text=reminder["text"])
+            sent += 1
+            commits += 1  # старый код: UPDATE + commit на каждое напоминание
+        except Exception:
+            failed += 1
+    return sent, failed, commits
+
+
+async def run_pipeline(bot, reminders):
+    pipeline = DeliveryPipeline()
+
+    async def send(reminder):
+        await bot.send_message(chat_id=reminder["telegram_id"], text=reminder["text"])
+
+    sent = await pipeline.deliver(reminders, send, lambda ids: None)
+    return sent, pipeline.stats["failed"], pipeline.stats["commits"]
+
+
+async def main_async(args):
+    for name, runner in (("до", run_sequential), ("после", run_pipeline)):
+        server = await FakeBotAPI(latency=args.latency).start()
+        bot = server.make_bot()
+        reminders = make_reminders(args.reminders, args.chats)
+
+        started = time.perf_counter()
+        sent, failed, commits = await runner(bot, reminders)
+        elapsed = time.perf_counter() - started
+
+        print(
+            f"{name:<6} отправлено: {sent:5d}  ошибок: {failed:4d}  "
+            f"429 от сервера: {server.stats['rejected']:4d}  коммитов: {commits:5d}  "
+            f"сообщений/с: {sent / elapsed:6.1f}  время: {elapsed:6.1f} с"
+        )
+
+        await bot.session.close()
+        await server.stop()
+
+
+def main():
+    logging.basicConfig(level=logging.ERROR)
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--reminders", type=int, default=600)
+    parser.add_argument("--chats", type=int, default=300)
+    parser.add_argument("--latency", type=float, default=0.05)
+    args = parser.parse_args()
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,278 @@
+# benchmarks/bench_e2e.py
+"""Сквозной нагрузочный тест: бот в режиме polling против фейкового Bot API.
+
+Бот запускается как в проде — ``dp.start_polling`` с настоящими
+роутерами и хранилищем FSM в SQLite, — но getUpdates, sendMessage,
+editMessageText и answerCallbackQuery обслуживает локальный FakeBotAPI
+(benchmarks/fake_bot_api.py) с задержкой сети и, по желанию, случайными
+ответами 429.
+
+N пользователей одновременно проходят сценарий: открывают раздел,
+листают, открывают запись, возвращаются; в задачах ещё и добавляют
+задачу через диалог. Кнопки берутся из последнего сообщения бота в чате,
+так что id и курсоры страниц настоящие. Каждый шаг — апдейт в очереди
+getUpdates; шаг завершён, когда диспетчер закончил его обработку.
+
+Сценарии идут по очереди, и для каждого выводятся: шагов в секунду,
+задержка шага (медиана, p95, p99), SQL-запросов и транзакций на шаг
+(трассировка соединений пула), вызовов Bot API на шаг и сбои.
+
+Запуск: python -m benchmarks.bench_e2e [--users 50] [--rounds 2] [--error-rate 0.01]
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from aiogram import Dispatcher  # noqa: E402
+
+from benchmarks.bench_navigation import seed  # noqa: E402
+from benchmarks.fake_bot_api import FakeBotAPI  # noqa: E402
+from src.database import init_database  # noqa: E402
+from src.db_pool import DEFAULT_DB_PATH, configure_pool  # noqa: E402
+
+# Шаги: ("menu", текст кнопки главного меню), ("press", начало подписи
+# inline-кнопки в последнем сообщении бота), ("text", ввод пользователя)
+SCENARIOS = {
+    "расписание": [
+        ("menu", "📅 Расписание"),
+        ("press", "Далее"),
+        ("press", "6."),
+        ("press", "🔙 Назад к расписанию"),
+        ("press", "1."),
+        ("press", "✏️ Редактировать"),
+        ("press", "🔙 Назад к уроку"),
+    ],
+    "задачи": [
+        ("menu", "✅ Задачи"),
+        ("press", "Далее"),
+        ("press", "6."),
+        ("press", "🔙 Назад к задачам"),
+        ("press", "➕ Добавить задачу"),
+        ("text", "Лабораторная по физике"),
+        ("text", "нет"),
+        ("text", "2030-06-01"),
+        ("press", "🟡 Средний"),
+        ("press", "✅ Вернуться к задачам"),
+    ],
+    "события": [
+        ("menu", "🎯 События"),
+        ("press", "Далее"),
+        ("press", "6."),
+        ("press", "🔙 Назад к событиям"),
+        ("press", "1."),
+        ("press", "🔙 Назад к событиям"),
+    ],
+}
+
+QUERY_VERBS = {"SELECT", "INSERT", "UPDATE", "DELETE", "WITH", "REPLACE"}
+
+
+class QueryCounter:
+    """Трассировка соединений пула: считает запросы и транзакции"""
+
+    def __init__(self):
+        self.queries = 0
+        self.commits = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, sql: str):
+        verb = sql.lstrip()[:7].split(None, 1)[0].upper() if sql.strip() else ""
+        with self._lock:
+            if verb in QUERY_VERBS:
+                self.queries += 1
+            elif verb == "COMMIT":
+                self.commits += 1
+
+
+class StepFailed(Exception):
+    """Бот не показал ожидаемую кнопку (например, сообщение потерялось из-за 429)"""
+
+
+class Driver:
+    def __init__(self, api: FakeBotAPI, dp: Dispatcher):
+        self.api = api
+        self._pending = {}  # update_id -> Future, завершается после обработки
+
+        @dp.update.outer_middleware()
+        async def track(handler, event, data):
+            try:
+                return await handler(event, data)
+            finally:
+                future = self._pending.pop(event.update_id, None)
+                if future is not None and not future.done():
+                    future.set_result(None)
+
+    async def send(self, payload: dict) -> float:
+        """Отправить апдейт и дождаться конца его обработки, вернуть мс"""
+        started = time.perf_counter()
+        future = asyncio.get_running_loop().create_future()
+        self._pending[self.api.push_update(payload)] = future
+        await asyncio.wait_for(future, timeout=30)
+        return (time.perf_counter() - started) * 1000
+
+    @staticmethod
+    def _user(user_id: int) -> dict:
+        return {"id": user_id, "is_bot": False, "first_name": f"user{user_id}"}
+
+    def _message(self, user_id: int, text: str) -> dict:
+        return {
+            "message": {
+                "message_id": 1,
+                "date": int(time.time()),
+                "chat": {"id": user_id, "type": "private"},
+                "from": self._user(user_id),
+                "text": text,
+            }
+        }
+
+    def _press(self, user_id: int, label: str) -> dict:
+        message_id = self.api.last_message.get(user_id)
+        text, markup = self.api.messages.get((user_id, message_id), ("", None))
+        buttons = json.loads(markup)["inline_keyboard"] if markup else []
+        data = next(
+            (
+                button["callback_data"]
+                for row in buttons
+                for button in row
+                if button["text"].startswith(label)
+            ),
+            None,
+        )
+        if data is None:
+            raise StepFailed(label)
+        return {
+            "callback_query": {
+                "id": f"{user_id}_{time.perf_counter_ns()}",
+                "from": self._user(user_id),
+                "chat_instance": "e2e",
+                "data": data,
+                "message": {
+                    "message_id": message_id,
+                    "date": int(time.time()),
+                    "chat": {"id": user_id, "type": "private"},
+                    "text": text,
+                    "reply_markup": json.loads(markup),
+                },
+            }
+        }
+
+    async def scenario(self, user_id: int, steps: list, timings: list) -> bool:
+        for action, value in steps:
+            if action == "press":
+                payload = self._press(user_id, value)
+            else:
+                payload = self._message(user_id, value)
+            timings.append(await self.send(payload))
+        return True
+
+
+def percentile(values: list, share: float) -> float:
+    values = sorted(values)
+    return values[max(int(len(values) * share) - 1, 0)]
+
+
+async def run_scenario(driver, api, counter, name, steps, args):
+    timings, failures = [], 0
+    calls_before = api.calls.copy()
+    queries_before, commits_before = counter.queries, counter.commits
+
+    async def user(user_id):
+        nonlocal failures
+        for _ in range(args.rounds):
+            try:
+                await driver.scenario(user_id, steps, timings)
+            except (StepFailed, asyncio.TimeoutError):
+                failures += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(user(u) for u in range(1, args.users + 1)))
+    elapsed = time.perf_counter() - started
+
+    done = len(timings)
+    calls = api.calls - calls_before
+    calls.pop("getUpdates", None)
+    print(
+        f"{name:11} {done / elapsed:7.0f} шаг/с  "
+        f"медиана {statistics.median(timings):6.1f} мс  "
+        f"p95 {percentile(timings, 0.95):6.1f} мс  "
+        f"p99 {percentile(timings, 0.99):6.1f} мс  "
+        f"SQL/шаг {(counter.queries - queries_before) / done:5.1f}  "
+        f"COMMIT/шаг {(counter.commits - commits_before) / done:4.2f}  "
+        f"Bot API/шаг {sum(calls.values()) / done:4.2f}  "
+        f"сбоев {failures}"
+    )
+
+
+async def main_async(args, counter):
+    from src.fsm_storage import SQLiteStorage
+    from src.handlers import events_router, main_router, schedule_router, tasks_router
+
+    api = await FakeBotAPI(
+        latency=args.latency,
+        global_rate=10**6,
+        per_chat_interval=0,
+        error_rate=args.error_rate,
+        seed=42,
+    ).start()
+    bot = api.make_bot()
+    storage = SQLiteStorage()
+
+    dp = Dispatcher(storage=storage)
+    for router in (main_router, schedule_router, tasks_router, events_router):
+        dp.include_router(router)
+    driver = Driver(api, dp)
+    polling = asyncio.create_task(dp.start_polling(bot, handle_signals=False))
+
+    print(
+        f"{args.users} пользователей x {args.rounds} прохода, "
+        f"задержка Bot API {args.latency * 1000:.0f} мс, "
+        f"429 на {args.error_rate:.0%} вызовов"
+    )
+    for name, steps in SCENARIOS.items():
+        await run_scenario(driver, api, counter, name, steps, args)
+    print(f"Bot API: {dict(api.calls)}, ответов 429: {api.stats['injected']}")
+
+    await dp.stop_polling()
+    await polling
+    await storage.close()
+    await api.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--rounds", type=int, default=2)
+    parser.add_argument("--latency", type=float, default=0.02)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        configure_pool(path)
+        init_database()
+        seed(args.users)
+
+        # Пул с трассировкой: считаются только запросы под нагрузкой
+        counter = QueryCounter()
+        configure_pool(path, trace=counter)
+        asyncio.run(main_async(args, counter))
+
+        from src.repository import db
+
+        db.shutdown()
+        configure_pool(DEFAULT_DB_PATH)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+# benchmarks/bench_fsm_storage.py
+"""Бенчмарк накладных расходов хранилища FSM на один апдейт.
+
+Апдейт моделируется так же, как его обрабатывает aiogram в диалоге
+добавления задачи: FSMContextMiddleware читает состояние, обработчик
+читает данные, дописывает поле и переводит диалог в следующий шаг.
+Пользователи проходят диалоги параллельно, по несколько апдейтов каждый.
+
+Сравниваются MemoryStorage и SQLiteStorage: с кэшем и объединением
+записей (по умолчанию), с записью на каждое изменение и без кэша
+(несколько процессов).
+
+Запуск: python -m benchmarks.bench_fsm_storage [--users 2000]
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from aiogram.fsm.storage.base import StorageKey  # noqa: E402
+from aiogram.fsm.storage.memory import MemoryStorage  # noqa: E402
+
+from src.database import init_database  # noqa: E402
+from src.db_pool import DEFAULT_DB_PATH, configure_pool  # noqa: E402
+from src.fsm_storage import SQLiteStorage  # noqa: E402
+from src.states import AddTaskStates  # noqa: E402
+
+STEPS = [
+    AddTaskStates.waiting_for_title,
+    AddTaskStates.waiting_for_description,
+    AddTaskStates.waiting_for_deadline,
+    AddTaskStates.waiting_for_priority,
+    None,
+]
+
+
+async def update(storage, key: StorageKey, step: int):
+    await storage.get_state(key)
+    await storage.get_data(key)
+    await storage.update_data(key, {f"field_{step}": "значение" * 4})
+    await storage.set_state(key, STEPS[step])
+
+
+async def run(storage, users: int, concurrency: int) -> list:
+    keys = [StorageKey(bot_id=1, chat_id=u, user_id=u) for u in range(1, users + 1)]
+    timings = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def dialog(key):
+        for step in range(len(STEPS)):
+            async with semaphore:
+                started = time.perf_counter()
+                await update(storage, key, step)
+                timings.append((time.perf_counter() - started) * 1e6)
+
+    await asyncio.gather(*(dialog(key) for key in keys))
+    await storage.close()
+    return timings
+
+
+def report(name: str, timings: list, elapsed: float, storage):
+    timings = sorted(timings)
+    p99 = timings[int(len(timings) * 0.99) - 1]
+    line = (
+        f"{name:26} медиана {statistics.median(timings):8.1f} мкс  "
+        f"p99 {p99:8.1f} мкс  {len(timings) / elapsed:8.0f} апд/с"
+    )
+    if isinstance(storage, SQLiteStorage):
+        line += (
+            f"  чтений БД {storage.stats['misses']}"
+            f"  записей {storage.stats['rows_written']}"
+            f" за {storage.stats['flushes']} транзакций"
+        )
+    print(line)
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+
+    variants = [
+        ("MemoryStorage", MemoryStorage),
+        ("SQLite (кэш, объединение)", SQLiteStorage),
+        ("SQLite (запись сразу)", lambda: SQLiteStorage(flush_interval=0)),
+        (
+            "SQLite (без кэша)",
+            lambda: SQLiteStorage(flush_interval=0, cache_ttl=0),
+        ),
+    ]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        configure_pool(os.path.join(tmp, "bench.db"))
+        init_database()
+        print(f"{args.users} диалогов по {len(STEPS)} апдейтов")
+        for name, factory in variants:
+            storage = factory()
+            started = time.perf_counter()
+            timings = await run(storage, args.users, args.concurrency)
+            report(name, timings, time.perf_counter() - started, storage)
+
+        from src.repository import db
+
+        db.shutdown()
+        configure_pool(DEFAULT_DB_PATH)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
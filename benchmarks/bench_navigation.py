@@ -0,0 +1,247 @@
+# benchmarks/bench_navigation.py
+"""Реплей-бенчмарк навигации: исходящие вызовы Bot API на сессию.
+
+Через настоящий Dispatcher с роутерами бота прогоняется записанная
+сессия пользователя: открыть раздел, листать страницы, открыть детали,
+вернуться, зайти в меню редактирования, двойные нажатия. Кнопки берутся
+из последней клавиатуры, которую бот показал (фейковый Bot API хранит
+сообщения), поэтому курсоры страниц и id — настоящие.
+
+«До» — каждый экран отправляется новым сообщением (callback.message.answer),
+«после» — src/navigation.render: редактирование на месте и пропуск
+неизменённого содержимого по хэшу.
+
+Запуск: python -m benchmarks.bench_navigation [--sessions 20]
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from aiogram import Dispatcher  # noqa: E402
+from aiogram.types import CallbackQuery, Update  # noqa: E402
+
+from benchmarks.fake_bot_api import FakeBotAPI  # noqa: E402
+from src.database import init_database  # noqa: E402
+from src.db_pool import DEFAULT_DB_PATH, configure_pool  # noqa: E402
+
+# Нажатия: текст раздела главного меню или начало подписи inline-кнопки.
+# Повтор подряд — двойное нажатие на ту же кнопку того же сообщения
+SESSION = [
+    ("menu", "✅ Задачи"),
+    ("press", "Далее"),
+    ("press", "Далее"),
+    ("double", "⬅️ Назад"),
+    ("press", "⬅️ Назад"),
+    ("press", "1."),
+    ("press", "🔙 Назад к задачам"),
+    ("press", "2."),
+    ("press", "✏️ Редактировать"),
+    ("press", "🔙 Назад к задаче"),
+    ("double", "🔙 Назад к задачам"),
+    ("menu", "🎯 События"),
+    ("press", "Далее"),
+    ("press", "6."),
+    ("press", "🗑️ Удалить"),
+    ("press", "❌ Нет, вернуться"),
+    ("press", "🔙 Назад к событиям"),
+    ("menu", "📅 Расписание"),
+    ("double", "Далее"),
+    ("press", "6."),
+    ("press", "🔙 Назад к расписанию"),
+]
+
+
+def seed(users: int):
+    from src.handlers.events import base as events
+    from src.handlers.schedule import base as schedule
+    from src.handlers.tasks import base as tasks
+    from src.repository import register_user
+
+    days = ["Понедельник", "Вторник", "Среда", "Четверг", "Пятница"]
+    for user_id in range(1, users + 1):
+        register_user(user_id, f"user{user_id}", None, None)
+        for i in range(14):
+            tasks.save_task(
+                user_id,
+                {"title": f"Задача {i}", "deadline": f"2030-01-{i + 1:02d}"},
+            )
+        for i in range(12):
+            events.save_event(
+                user_id,
+                {"title": f"Событие {i}", "event_datetime": f"2030-02-{i + 1:02d} 10:00"},
+            )
+        for i in range(9):
+            schedule.save_lesson(
+                user_id,
+                {
+                    "subject": f"Урок {i}",
+                    "day": days[i % 5],
+                    "start_time": f"{9 + i:02d}:00",
+                    "end_time": f"{10 + i:02d}:00",
+                },
+            )
+
+
+def legacy_render():
+    """Старое поведение: каждый экран — новое сообщение"""
+
+    async def render(target, text, reply_markup=None, parse_mode="HTML"):
+        message = target.message if isinstance(target, CallbackQuery) else target
+        return await message.answer(text, reply_markup=reply_markup, parse_mode=parse_mode)
+
+    return render
+
+
+def patch_render(render):
+    for name, module in list(sys.modules.items()):
+        if name.startswith("src.handlers") and hasattr(module, "render"):
+            module.render = render
+
+
+class Replay:
+    def __init__(self, api: FakeBotAPI, bot, dp: Dispatcher):
+        self.api = api
+        self.bot = bot
+        self.dp = dp
+        self.update_id = 0
+
+    def _user(self, user_id):
+        return {"id": user_id, "is_bot": False, "first_name": f"user{user_id}"}
+
+    def _current(self, chat_id):
+        """Последнее сообщение бота в чате (отправленное или изменённое)"""
+        return max(key for key in self.api.messages if key[0] == chat_id)
+
+    async def feed(self, payload: dict):
+        self.update_id += 1
+        update = Update.model_validate(
+            {"update_id": self.update_id, **payload}, context={"bot": self.bot}
+        )
+        await self.dp.feed_update(self.bot, update)
+
+    async def menu(self, user_id: int, text: str):
+        await self.feed(
+            {
+                "message": {
+                    "message_id": 10**6 + self.update_id,
+                    "date": int(time.time()),
+                    "chat": {"id": user_id, "type": "private"},
+                    "from": self._user(user_id),
+                    "text": text,
+                }
+            }
+        )
+
+    async def press(self, user_id: int, label: str, times: int = 1):
+        key = self._current(user_id)
+        text, markup = self.api.messages[key]
+        buttons = json.loads(markup)["inline_keyboard"]
+        data = next(
+            button["callback_data"]
+            for row in buttons
+            for button in row
+            if button["text"].startswith(label)
+        )
+        for _ in range(times):
+            text, markup = self.api.messages[key]
+            await self.feed(
+                {
+                    "callback_query": {
+                        "id": str(self.update_id),
+                        "from": self._user(user_id),
+                        "chat_instance": "bench",
+                        "data": data,
+                        "message": {
+                            "message_id": key[1],
+                            "date": int(time.time()),
+                            "chat": {"id": user_id, "type": "private"},
+                            "text": text,
+                            "reply_markup": json.loads(markup) if markup else None,
+                        },
+                    }
+                }
+            )
+
+    async def session(self, user_id: int):
+        for action, label in SESSION:
+            if action == "menu":
+                await self.menu(user_id, label)
+            else:
+                await self.press(user_id, label, 2 if action == "double" else 1)
+
+
+async def run(dp: Dispatcher, mode: str, sessions: int):
+    from src import navigation
+
+    api = await FakeBotAPI(latency=0, global_rate=10**6, per_chat_interval=0).start()
+    bot = api.make_bot()
+    patch_render(legacy_render() if mode == "before" else navigation.render)
+
+    replay = Replay(api, bot, dp)
+    started = time.perf_counter()
+    for user_id in range(1, sessions + 1):
+        await replay.session(user_id)
+    elapsed = time.perf_counter() - started
+
+    await bot.session.close()
+    await api.stop()
+    return api.calls, elapsed
+
+
+async def compare(sessions: int):
+    from src import navigation
+    from src.handlers import events_router, main_router, schedule_router, tasks_router
+
+    # Роутеры можно подключить только к одному диспетчеру
+    dp = Dispatcher()
+    for router in (main_router, schedule_router, tasks_router, events_router):
+        dp.include_router(router)
+
+    results = {}
+    for mode in ("before", "after"):
+        calls, elapsed = await run(dp, mode, sessions)
+        results[mode] = calls
+        screens = calls["sendMessage"] + calls["editMessageText"]
+        print(
+            f"{'до' if mode == 'before' else 'после':6} "
+            f"sendMessage: {calls['sendMessage']:5}  "
+            f"editMessageText: {calls['editMessageText']:5}  "
+            f"answerCallbackQuery: {calls['answerCallbackQuery']:5}  "
+            f"экранов через API: {screens:5}  ({elapsed:.1f} с)"
+        )
+    print(f"навигация: {navigation.stats}")
+
+    before = sum(results["before"].values())
+    after = sum(results["after"].values())
+    print(
+        f"исходящих вызовов: {before} -> {after} "
+        f"(-{(1 - after / before) * 100:.0f}%), "
+        f"новых сообщений: {results['before']['sendMessage']} -> "
+        f"{results['after']['sendMessage']}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sessions", type=int, default=20)
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        configure_pool(os.path.join(tmp, "bench.db"))
+        init_database()
+        seed(args.sessions)
+        asyncio.run(compare(args.sessions))
+        configure_pool(DEFAULT_DB_PATH)
+
+
+if __name__ == "__main__":
+    main()
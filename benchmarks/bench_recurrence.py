@@ -0,0 +1,244 @@
+# benchmarks/bench_recurrence.py
+"""Бенчмарк повторяющихся событий: ленивое раскрытие серий.
+
+Создаёт N серий (daily/weekly/monthly/yearly, начало до года назад, часть
+с границей по дате или числу вхождений, часть с пропусками) и меряет:
+
+* расчёт ближайшего вхождения: переход сразу к номеру вхождения против
+  перебора серии с начала;
+* первый догон next_ts после миграции (все серии устарели);
+* сверку напоминаний раз в час в течение суток виртуального времени:
+  сколько серий догоняется и сколько строк напоминаний появляется;
+* страницу списка событий пользователя;
+* объём, который заняла бы материализация вхождений на год вперёд.
+
+Запуск: python -m benchmarks.bench_recurrence [--events 100000] [--users 1000]
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.clock import VirtualClock  # noqa: E402
+from src.database import init_database  # noqa: E402
+from src.db_pool import DEFAULT_DB_PATH, configure_pool, get_pool  # noqa: E402
+from src.event_reminders import PLAN_HORIZON, EventReminderService  # noqa: E402
+from src.handlers.events.base import get_user_events_page  # noqa: E402
+from src.repository import db  # noqa: E402
+from src.recurrence import (  # noqa: E402
+    SERIES_COLUMNS,
+    advance_series,
+    event_occurrences,
+    occurrences,
+)
+from src.timestamps import from_epoch, to_epoch  # noqa: E402
+
+RULE_WEIGHTS = {"daily": 40, "weekly": 40, "monthly": 15, "yearly": 5}
+
+
+def prepare_database(events: int, users: int, now: datetime, rng: random.Random):
+    rules = rng.choices(list(RULE_WEIGHTS), list(RULE_WEIGHTS.values()), k=events)
+    rows = []
+    for i, rule in enumerate(rules):
+        start = now - timedelta(minutes=rng.randrange(365 * 24 * 60))
+        count = rng.randint(5, 200) if rng.random() < 0.2 else None
+        until = None
+        if rng.random() < 0.1:
+            until = to_epoch(now + timedelta(days=rng.uniform(-30, 365)))
+        rows.append(
+            (
+                i % users + 1,
+                f"Серия {i}",
+                start.strftime("%Y-%m-%d %H:%M"),
+                rule,
+                count,
+                until,
+            )
+        )
+
+    conn = get_pool().acquire()
+    conn.executemany(
+        "INSERT INTO users (telegram_id, username) VALUES (?, ?)",
+        ((u, f"user{u}") for u in range(1, users + 1)),
+    )
+    conn.executemany(
+        """
+        INSERT INTO events (user_id, title, event_datetime, is_recurring,
+            recurrence_rule, recurrence_count, recurrence_until)
+        VALUES (?, ?, ?, 1, ?, ?, ?)
+        """,
+        rows,
+    )
+
+    # Каждая десятая серия пропускает одно из ближайших вхождений
+    series = conn.execute(f"SELECT {SERIES_COLUMNS} FROM events").fetchall()
+    exceptions = []
+    for event in rng.sample(series, len(series) // 10):
+        after = now + timedelta(days=rng.uniform(0, 3))
+        skipped = next(event_occurrences(event, after), None)
+        if skipped is not None:
+            exceptions.append((event["id"], to_epoch(skipped)))
+    conn.executemany(
+        "INSERT OR IGNORE INTO event_exceptions (event_id, occurrence_ts) "
+        "VALUES (?, ?)",
+        exceptions,
+    )
+    conn.commit()
+    conn.close()
+    return series
+
+
+def bench_next_occurrence(series, now: datetime):
+    """Ближайшее вхождение: переход к номеру против перебора с начала"""
+    started = time.perf_counter()
+    jumped = [next(event_occurrences(event, now), None) for event in series]
+    jump_elapsed = time.perf_counter() - started
+
+    started = time.perf_counter()
+    scanned = []
+    for event in series:
+        for when in event_occurrences(event):
+            if when >= now:
+                scanned.append(when)
+                break
+        else:
+            scanned.append(None)
+    scan_elapsed = time.perf_counter() - started
+
+    assert jumped == scanned
+    print(
+        f"ближайшее вхождение {len(series)} серий: "
+        f"переход {jump_elapsed * 1000:7.0f} мс, "
+        f"перебор с начала {scan_elapsed * 1000:7.0f} мс "
+        f"(×{scan_elapsed / jump_elapsed:.0f})"
+    )
+
+
+def count_rows(conn, sql: str) -> int:
+    return conn.execute(sql).fetchone()[0]
+
+
+async def bench_reconcile(
+    service: EventReminderService, clock: VirtualClock, hours: int
+):
+    """Сверка раз в час: догон серий и создание напоминаний"""
+    planned_events = 0
+    plan = service._plan_event_reminders
+
+    def counting_plan(events, *args, **kwargs):
+        nonlocal planned_events
+        planned_events += len(events)
+        return plan(events, *args, **kwargs)
+
+    service._plan_event_reminders = counting_plan
+
+    timings = []
+    for hour in range(hours + 1):
+        started = time.perf_counter()
+        await service.check_upcoming_events()
+        elapsed = time.perf_counter() - started
+
+        if hour == 0:
+            print(
+                f"первая сверка: {planned_events} серий, окно "
+                f"{PLAN_HORIZON.total_seconds() / 3600:.0f} ч, {elapsed:.2f} с"
+            )
+            planned_events = 0
+        else:
+            timings.append(elapsed)
+        clock.advance(3600)
+
+    conn = get_pool().acquire()
+    reminders = count_rows(conn, "SELECT COUNT(*) FROM event_reminders")
+    active = count_rows(conn, "SELECT COUNT(*) FROM events WHERE series_active = 1")
+    conn.close()
+    print(
+        f"сверка раз в час, {hours} ч: "
+        f"медиана {statistics.median(timings) * 1000:.0f} мс, "
+        f"макс {max(timings) * 1000:.0f} мс, пересчитано серий {planned_events}"
+    )
+    print(f"строк напоминаний: {reminders}, активных серий: {active}")
+
+
+def bench_lists(users: int, rng: random.Random, samples: int = 1000):
+    timings = []
+    for _ in range(samples):
+        user_id = rng.randint(1, users)
+        started = time.perf_counter()
+        get_user_events_page(user_id)
+        timings.append(time.perf_counter() - started)
+    timings.sort()
+    print(
+        f"страница событий: p50 {timings[len(timings) // 2] * 1000:.2f} мс, "
+        f"p99 {timings[int(len(timings) * 0.99)] * 1000:.2f} мс"
+    )
+
+
+def materialized_size(series, now: datetime, days: int = 365) -> int:
+    """Сколько строк заняли бы вхождения серий на days дней вперёд"""
+    horizon = now + timedelta(days=days)
+    total = 0
+    for event in series:
+        start = from_epoch(event["event_ts"])
+        for when in occurrences(start, event["recurrence_rule"], after=now):
+            if when > horizon:
+                break
+            total += 1
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--events", type=int, default=100_000)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--hours", type=int, default=24)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    now = datetime.now().replace(second=0, microsecond=0)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        configure_pool(os.path.join(tmp, "bench.db"))
+        init_database()
+
+        started = time.perf_counter()
+        series = prepare_database(args.events, args.users, now, rng)
+        print(f"создано {len(series)} серий за {time.perf_counter() - started:.1f} с")
+
+        bench_next_occurrence(series, now)
+
+        conn = get_pool().acquire()
+        started = time.perf_counter()
+        advanced = advance_series(conn, now)
+        conn.commit()
+        print(
+            f"первый догон next_ts: {advanced} серий за "
+            f"{time.perf_counter() - started:.2f} с"
+        )
+        conn.close()
+
+        clock = VirtualClock(now)
+        service = EventReminderService(bot=None, clock=clock)
+        asyncio.run(bench_reconcile(service, clock, args.hours))
+        db.shutdown()
+        bench_lists(args.users, rng)
+
+        print(
+            f"материализация вхождений на год (без границ и пропусков): "
+            f"{materialized_size(series, now)} строк"
+        )
+
+        configure_pool(DEFAULT_DB_PATH)
+
+
+if __name__ == "__main__":
+    main()
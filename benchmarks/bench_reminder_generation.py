@@ -0,0 +1,161 @@
+# benchmarks/bench_reminder_generation.py
+"""Бенчмарк генерации напоминаний о задачах: по одной задаче против пачки.
+
+«До» повторяет старый путь schedule_task_reminders: отдельные соединения на
+удаление, на SELECT-then-INSERT каждого напоминания и на обновление
+last_reminder_sent, плюс запрос last_reminder_sent на каждую задачу (N+1).
+Старый путь медленный, поэтому он меряется на выборке задач и
+пересчитывается на всё количество.
+
+«После» — TaskReminderService._plan_task_reminders: одна транзакция,
+executemany и INSERT OR IGNORE по уникальному (task_id, reminder_type).
+
+Запуск: python -m benchmarks.bench_reminder_generation [--tasks 100000] [--sample 2000]
+"""
+
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.database import init_database  # noqa: E402
+from src.db_pool import DEFAULT_DB_PATH, configure_pool, get_pool  # noqa: E402
+from src.task_reminders import TaskReminderService  # noqa: E402
+
+
+def prepare_database(tasks: int, users: int = 1000):
+    now = datetime.now()
+    conn = get_pool().acquire()
+    conn.executemany(
+        "INSERT INTO users (telegram_id, username) VALUES (?, ?)",
+        ((u, f"user{u}") for u in range(users)),
+    )
+    conn.executemany(
+        "INSERT INTO tasks (user_id, title, deadline, priority) VALUES (?, ?, ?, ?)",
+        (
+            (
+                i % users,
+                f"Задача {i}",
+                (now + timedelta(days=random.randint(1, 30))).strftime("%Y-%m-%d"),
+                "medium",
+            )
+            for i in range(tasks)
+        ),
+    )
+    conn.commit()
+    conn.close()
+
+
+def fetch_tasks(limit: int = -1):
+    conn = get_pool().acquire()
+    rows = conn.execute(
+        "SELECT id, title, deadline_ts FROM tasks ORDER BY id LIMIT ?", (limit,)
+    ).fetchall()
+    conn.close()
+    return rows
+
+
+def legacy_generate(path: str, service: TaskReminderService, tasks, now: datetime):
+    """Старое поведение: ~6 соединений и ~10 запросов на задачу"""
+
+    def connect():
+        conn = sqlite3.connect(path)
+        conn.execute("PRAGMA foreign_keys = ON")
+        return conn
+
+    for task in tasks:
+        conn = connect()
+        conn.execute("SELECT last_reminder_sent FROM tasks WHERE id = ?", (task["id"],))
+        conn.close()
+
+        conn = connect()
+        conn.execute(
+            "DELETE FROM task_reminders WHERE task_id = ? AND reminder_sent = 0",
+            (task["id"],),
+        )
+        conn.commit()
+        conn.close()
+
+        for reminder_type, reminder_time in service.compute_reminder_times(
+            task["deadline_ts"], now
+        ):
+            conn = connect()
+            existing = conn.execute(
+                """
+                SELECT id FROM task_reminders
+                WHERE task_id = ? AND reminder_type = ? AND reminder_sent = 0
+                """,
+                (task["id"], reminder_type),
+            ).fetchone()
+            if not existing:
+                conn.execute(
+                    """
+                    INSERT INTO task_reminders (task_id, reminder_type, reminder_time)
+                    VALUES (?, ?, ?)
+                    """,
+                    (task["id"], reminder_type, reminder_time.strftime("%Y-%m-%d %H:%M")),
+                )
+                conn.commit()
+            conn.close()
+
+        conn = connect()
+        conn.execute(
+            "UPDATE tasks SET last_reminder_sent = ? WHERE id = ?",
+            (now.strftime("%Y-%m-%d %H:%M"), task["id"]),
+        )
+        conn.commit()
+        conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tasks", type=int, default=100_000)
+    parser.add_argument("--sample", type=int, default=2000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        configure_pool(path)
+        init_database()
+        prepare_database(args.tasks)
+
+        service = TaskReminderService(bot=None)
+        now = datetime.now()
+
+        sample = fetch_tasks(args.sample)
+        started = time.perf_counter()
+        legacy_generate(path, service, sample, now)
+        legacy_elapsed = time.perf_counter() - started
+        legacy_rate = len(sample) / legacy_elapsed
+        print(
+            f"до     задач/с: {legacy_rate:9.0f}  "
+            f"оценка для {args.tasks} задач: {args.tasks / legacy_rate:8.1f} с"
+        )
+
+        tasks = fetch_tasks()
+        started = time.perf_counter()
+        created = service._plan_task_reminders(tasks, now)
+        elapsed = time.perf_counter() - started
+        print(
+            f"после  задач/с: {len(tasks) / elapsed:9.0f}  "
+            f"{len(tasks)} задач: {elapsed:8.1f} с  напоминаний: {created}"
+        )
+
+        # Повторный прогон идемпотентен: дублей не появляется
+        service._plan_task_reminders(tasks, now)
+        conn = get_pool().acquire()
+        total = conn.execute("SELECT COUNT(*) FROM task_reminders").fetchone()[0]
+        conn.close()
+        print(f"повтор: напоминаний в таблице {total}")
+
+        configure_pool(DEFAULT_DB_PATH)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+# benchmarks/bench_search.py
+"""Бенчмарк полнотекстового поиска на большом корпусе.
+
+Корпус — задачи, события и уроки множества пользователей со словами из
+синтетического словаря с распределением Ципфа: частые слова встречаются
+в сотнях тысяч записей, как «лаба» или «сдать» в настоящей базе. Строки
+вставляются до миграции поиска, затем migrate() заполняет индекс —
+так же, как при обновлении существующей базы.
+
+Измеряется search() для случайных пользователей: целое слово, короткий
+префикс, два слова; отдельно — «тяжёлый» пользователь с тысячами записей.
+
+Запуск: python -m benchmarks.bench_search [--rows 1000000]
+"""
+
+import argparse
+import logging
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.database import get_connection  # noqa: E402
+from src.db_pool import DEFAULT_DB_PATH, configure_pool  # noqa: E402
+from src.migrations import LATEST_VERSION, migrate  # noqa: E402
+from src.search import search  # noqa: E402
+
+SYLLABLES = "ба ве ги до жу за ки ло му на по ре си ту фа хо це чи ша эм ю я".split()
+HEAVY_USER = 1
+
+
+def make_vocabulary(size: int, rng: random.Random) -> list:
+    words = set()
+    while len(words) < size:
+        words.add("".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))))
+    return sorted(words)
+
+
+def prepare(rows: int, users: int, rng: random.Random) -> list:
+    vocabulary = make_vocabulary(5000, rng)
+    weights = [1 / (rank + 1) for rank in range(len(vocabulary))]
+
+    # Готовые тексты: генерация строк не должна занимать минуты
+    pools = {
+        count: [
+            " ".join(rng.choices(vocabulary, weights, k=count)) for _ in range(50_000)
+        ]
+        for count in (1, 2, 3, 6, 8)
+    }
+
+    def text(count):
+        return rng.choice(pools[count])
+
+    def owner(i):
+        # Каждая сотая запись — тяжёлого пользователя
+        return HEAVY_USER if i % 100 == 0 else rng.randint(2, users)
+
+    conn = get_connection()
+    try:
+        migrate(conn, LATEST_VERSION - 1)
+        conn.executemany(
+            "INSERT INTO users (telegram_id, username) VALUES (?, ?)",
+            ((u, f"user{u}") for u in range(1, users + 1)),
+        )
+        share = rows // 3
+        conn.executemany(
+            "INSERT INTO tasks (user_id, title, description, priority) "
+            "VALUES (?, ?, ?, 'medium')",
+            ((owner(i), text(3), text(8)) for i in range(rows - 2 * share)),
+        )
+        conn.executemany(
+            "INSERT INTO events (user_id, title, description, event_datetime, location) "
+            "VALUES (?, ?, ?, '2030-01-01 10:00', ?)",
+            ((owner(i), text(3), text(6), text(2)) for i in range(share)),
+        )
+        conn.executemany(
+            "INSERT INTO schedule (user_id, subject, day_of_week, start_time, "
+            "end_time, teacher) VALUES (?, ?, 'Понедельник', '09:00', '10:00', ?)",
+            ((owner(i), text(2), text(1)) for i in range(share)),
+        )
+        conn.commit()
+
+        started = time.perf_counter()
+        migrate(conn)
+        print(f"индекс построен миграцией за {time.perf_counter() - started:.1f} с")
+        pages = conn.execute(
+            "SELECT SUM(pgsize) FROM dbstat WHERE name LIKE 'search_index%'"
+        ).fetchone()[0]
+        if pages:
+            print(f"размер индекса: {pages / 2**20:.0f} МБ")
+    finally:
+        conn.close()
+    return vocabulary
+
+
+def measure(queries) -> list:
+    timings = []
+    for user_id, query in queries:
+        started = time.perf_counter()
+        search(user_id, query)
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+
+def report(name: str, timings: list):
+    timings = sorted(timings)
+    p95 = timings[int(len(timings) * 0.95) - 1]
+    print(
+        f"{name:28} медиана {statistics.median(timings):6.2f} мс  "
+        f"p95 {p95:6.2f} мс  макс {timings[-1]:6.2f} мс"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--users", type=int, default=20_000)
+    parser.add_argument("--queries", type=int, default=500)
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+    rng = random.Random(42)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        configure_pool(os.path.join(tmp, "bench.db"))
+        vocabulary = prepare(args.rows, args.users, rng)
+        frequent = vocabulary[:50]
+
+        def users():
+            return rng.randint(2, args.users)
+
+        n = args.queries
+        print(f"корпус: {args.rows} записей, {args.users} пользователей")
+        report("слово", measure((users(), rng.choice(vocabulary)) for _ in range(n)))
+        report(
+            "частое слово", measure((users(), rng.choice(frequent)) for _ in range(n))
+        )
+        report(
+            "префикс из 2 букв",
+            measure((users(), rng.choice(SYLLABLES)) for _ in range(n)),
+        )
+        report(
+            "два слова",
+            measure(
+                (users(), f"{rng.choice(frequent)} {rng.choice(vocabulary)}")
+                for _ in range(n)
+            ),
+        )
+        report(
+            f"тяжёлый ({args.rows // 100} записей)",
+            measure((HEAVY_USER, rng.choice(frequent)) for _ in range(n)),
+        )
+
+        configure_pool(DEFAULT_DB_PATH)
+
+
+if __name__ == "__main__":
+    main()
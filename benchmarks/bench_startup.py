@@ -0,0 +1,119 @@
+# benchmarks/bench_startup.py
+"""Бенчмарк старта бота на большой БД: схема и исправление дат.
+
+«До» повторяет старый путь run.py: init_database() выполнял все шаги схемы
+(включая удаление дублей напоминаний) на каждом старте, затем
+fix_invalid_dates() читал все дедлайны и проверял их strptime в Python.
+
+«После» — migrate(): холодный старт применяет недостающие миграции один
+раз, тёплый старт читает PRAGMA user_version и выходит.
+
+Запуск: python -m benchmarks.bench_startup [--tasks 1000000]
+"""
+
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.db_pool import DEFAULT_DB_PATH, configure_pool, get_pool  # noqa: E402
+from src.migrations import MIGRATIONS, migrate  # noqa: E402
+
+
+def prepare_database(path: str, tasks: int, users: int = 10_000):
+    """База старого формата (user_version = 0) с задачами и напоминаниями"""
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode = WAL")
+    for _, step in MIGRATIONS[:2]:
+        step(conn)
+    today = date.today()
+    conn.executemany(
+        "INSERT INTO users (telegram_id, username) VALUES (?, ?)",
+        ((u, f"user{u}") for u in range(users)),
+    )
+    conn.executemany(
+        "INSERT INTO tasks (user_id, title, deadline, priority) VALUES (?, ?, ?, ?)",
+        (
+            (
+                i % users,
+                f"Задача {i}",
+                # Каждая тысячная дата некорректна
+                "мусор" if i % 1000 == 0
+                else (today + timedelta(days=random.randint(-30, 60))).isoformat(),
+                "medium",
+            )
+            for i in range(tasks)
+        ),
+    )
+    conn.executemany(
+        """
+        INSERT INTO task_reminders (task_id, reminder_type, reminder_time)
+        VALUES (?, '1d', ?)
+        """,
+        ((i, f"{today.isoformat()} 09:00") for i in range(1, tasks // 10)),
+    )
+    conn.commit()
+    conn.close()
+
+
+def legacy_startup(conn):
+    """Старый старт: все шаги схемы и проверка дат в Python"""
+    for _, step in MIGRATIONS:
+        step(conn)
+    conn.commit()
+
+    tasks = conn.execute(
+        "SELECT id, deadline FROM tasks WHERE deadline IS NOT NULL"
+    ).fetchall()
+    for task in tasks:
+        try:
+            datetime.strptime(task["deadline"], "%Y-%m-%d")
+        except (ValueError, TypeError):
+            conn.execute("UPDATE tasks SET deadline = NULL WHERE id = ?", (task["id"],))
+    conn.commit()
+
+
+def measure(func, conn) -> float:
+    started = time.perf_counter()
+    func(conn)
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tasks", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy_path = os.path.join(tmp, "legacy.db")
+        path = os.path.join(tmp, "bench.db")
+        prepare_database(legacy_path, args.tasks)
+        prepare_database(path, args.tasks)
+
+        configure_pool(legacy_path)
+        conn = get_pool().acquire()
+        # Первый старт старого кода тоже создаёт колонки и индексы
+        measure(legacy_startup, conn)
+        elapsed = measure(legacy_startup, conn)
+        print(f"до     каждый старт:   {elapsed * 1000:10.1f} мс")
+        conn.close()
+
+        configure_pool(path)
+        conn = get_pool().acquire()
+        cold = measure(migrate, conn)
+        warm = min(measure(migrate, conn) for _ in range(100))
+        print(f"после  холодный старт: {cold * 1000:10.1f} мс  (один раз)")
+        print(f"после  тёплый старт:   {warm * 1000:10.3f} мс")
+        conn.close()
+
+        configure_pool(DEFAULT_DB_PATH)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+# benchmarks/bench_task_overview.py
+"""Бенчмарк экрана списка задач для пользователя с длинной историей.
+
+«До» повторяет старый show_tasks_list: первая страница активных задач
+и полный список get_user_tasks(only_active=False), из которого в Python
+отбирались завершённые — чтобы посчитать их и показать последние три.
+
+«После» — get_task_overview(): страница, COUNT по индексу и три
+последние завершённые по (user_id, is_completed, completed_at).
+
+Запуск: python -m benchmarks.bench_task_overview [--completed 10000]
+"""
+
+import argparse
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.database import get_connection, init_database  # noqa: E402
+from src.db_pool import DEFAULT_DB_PATH, configure_pool  # noqa: E402
+
+USER_ID = 1
+
+
+def prepare(completed: int, active: int, other_users: int = 1000):
+    conn = get_connection()
+    try:
+        conn.executemany(
+            "INSERT INTO users (telegram_id, username) VALUES (?, ?)",
+            ((u, f"user{u}") for u in range(1, other_users + 1)),
+        )
+        rows = [
+            (USER_ID, f"Задача {i}", "2030-01-01", "medium", 1, 1_700_000_000 + i)
+            for i in range(completed)
+        ]
+        rows += [
+            (USER_ID, f"Активная {i}", f"2030-02-{i % 28 + 1:02d}", "high", 0, None)
+            for i in range(active)
+        ]
+        # Остальные пользователи — чтобы индексы были не только по одному
+        rows += [
+            (u, f"Задача {u}", "2030-01-01", "low", u % 2, None)
+            for u in range(2, other_users + 1)
+            for _ in range(10)
+        ]
+        conn.executemany(
+            """
+            INSERT INTO tasks
+                (user_id, title, deadline, priority, is_completed, completed_at)
+            VALUES (?, ?, ?, ?, ?, ?)
+            """,
+            rows,
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def old_overview(user_id: int):
+    from src.handlers.tasks import base
+
+    page = base.get_user_tasks_page(user_id)
+    all_tasks = base.get_user_tasks(user_id, False)
+    completed_tasks = [t for t in all_tasks if t.get("is_completed") == 1]
+    recent = completed_tasks[-3:]
+    recent.reverse()
+    return page, len(completed_tasks), recent
+
+
+def new_overview(user_id: int):
+    from src.handlers.tasks import base
+
+    overview = base.get_task_overview(user_id)
+    return (
+        overview["page"],
+        overview["completed_count"],
+        overview["recent_completed"],
+    )
+
+
+def measure(func, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func(USER_ID)
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--completed", type=int, default=10_000)
+    parser.add_argument("--active", type=int, default=30)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        configure_pool(os.path.join(tmp, "bench.db"))
+        init_database()
+        prepare(args.completed, args.active)
+
+        _, old_count, _ = old_overview(USER_ID)
+        _, new_count, _ = new_overview(USER_ID)
+        assert old_count == new_count == args.completed
+
+        before = measure(old_overview, args.repeat)
+        after = measure(new_overview, args.repeat)
+        print(
+            f"завершённых задач: {args.completed}, активных: {args.active}\n"
+            f"до:    {before * 1000:8.2f} мс на показ списка\n"
+            f"после: {after * 1000:8.2f} мс на показ списка "
+            f"(x{before / after:.0f})"
+        )
+
+        configure_pool(DEFAULT_DB_PATH)
+
+
+if __name__ == "__main__":
+    main()
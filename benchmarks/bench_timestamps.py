@@ -0,0 +1,114 @@
+# benchmarks/bench_timestamps.py
+"""Бенчмарк хранения времени: текстовые колонки против epoch-колонок.
+
+Сравнивает выборку наступивших напоминаний (сравнение строк в старом
+формате против сравнения целых по частичному индексу) и рендер списка
+задач (strptime против fromtimestamp).
+
+Запуск: python -m benchmarks.bench_timestamps [--reminders 200000] [--tasks 50000]
+"""
+
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.timestamps import format_date, to_epoch  # noqa: E402
+
+
+def prepare_reminders(path: str, count: int):
+    now = datetime.now()
+    conn = sqlite3.connect(path)
+    conn.executescript(
+        """
+        CREATE TABLE reminders (
+            id INTEGER PRIMARY KEY,
+            reminder_time DATETIME NOT NULL,
+            reminder_ts INTEGER NOT NULL,
+            reminder_sent BOOLEAN DEFAULT 0
+        );
+        CREATE INDEX idx_text ON reminders(reminder_time) WHERE reminder_sent = 0;
+        CREATE INDEX idx_ts ON reminders(reminder_ts) WHERE reminder_sent = 0;
+        """
+    )
+    rows = []
+    for i in range(count):
+        when = now + timedelta(minutes=random.randint(-60 * 24, 60 * 24 * 30))
+        rows.append(
+            (i, when.strftime("%Y-%m-%d %H:%M"), to_epoch(when), int(i % 3 == 0))
+        )
+    conn.executemany("INSERT INTO reminders VALUES (?, ?, ?, ?)", rows)
+    conn.commit()
+    return conn
+
+
+def bench_scan(conn, repeats: int = 50):
+    now = datetime.now()
+    queries = {
+        "до (strftime над колонкой)": (
+            "SELECT id FROM reminders WHERE reminder_sent = 0 "
+            "AND strftime('%Y-%m-%d %H:%M:%S', reminder_time) <= ?",
+            now.strftime("%Y-%m-%d %H:%M:%S"),
+        ),
+        "до (текст по индексу)": (
+            "SELECT id FROM reminders WHERE reminder_sent = 0 AND reminder_time <= ?",
+            now.strftime("%Y-%m-%d %H:%M:%S"),
+        ),
+        "после (epoch по индексу)": (
+            "SELECT id FROM reminders WHERE reminder_sent = 0 AND reminder_ts <= ?",
+            to_epoch(now),
+        ),
+    }
+    for name, (sql, param) in queries.items():
+        started = time.perf_counter()
+        for _ in range(repeats):
+            found = len(conn.execute(sql, (param,)).fetchall())
+        elapsed = (time.perf_counter() - started) / repeats * 1000
+        print(f"выборка {name:<28} {elapsed:8.2f} мс  строк: {found}")
+
+
+def bench_render(count: int):
+    now = datetime.now()
+    tasks = []
+    for i in range(count):
+        deadline = (now + timedelta(days=i % 60)).replace(hour=0, minute=0, second=0)
+        tasks.append(
+            {"deadline": deadline.strftime("%Y-%m-%d"), "deadline_ts": to_epoch(deadline)}
+        )
+
+    started = time.perf_counter()
+    for task in tasks:
+        datetime.strptime(task["deadline"], "%Y-%m-%d").strftime("%d.%m.%Y")
+    before = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for task in tasks:
+        format_date(task["deadline_ts"])
+    after = time.perf_counter() - started
+
+    print(f"рендер  до (strptime)        {before * 1e6 / count:8.2f} мкс/задача")
+    print(f"рендер  после (fromtimestamp) {after * 1e6 / count:7.2f} мкс/задача")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--reminders", type=int, default=200_000)
+    parser.add_argument("--tasks", type=int, default=50_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        conn = prepare_reminders(os.path.join(tmp, "bench.db"), args.reminders)
+        bench_scan(conn)
+        conn.close()
+
+    bench_render(args.tasks)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+# benchmarks/bench_webhook.py
+"""Нагрузочный тест режима webhook.
+
+Поднимается то же aiohttp-приложение, что и в проде (src/webhook.py), с
+настоящими роутерами бота; исходящие вызовы уходят в локальный фейковый
+Bot API. Отдельный процесс, как Telegram, параллельно шлёт POST с синтетическими
+апдейтами (пользователи открывают разделы главного меню) и заголовком
+секрета.
+
+Измеряется:
+* апдейтов в секунду — от первого POST до конца обработки последнего;
+* задержка обработчика — от входа апдейта в диспетчер до выхода
+  (outer middleware), медиана и p99;
+* время ответа webhook — сколько Telegram ждёт HTTP 200.
+
+Запуск: python -m benchmarks.bench_webhook [--updates 3000] [--concurrency 50]
+"""
+
+import argparse
+import asyncio
+import logging
+import multiprocessing
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import aiohttp  # noqa: E402
+from aiogram import Bot, Dispatcher  # noqa: E402
+from aiogram.client.session.aiohttp import AiohttpSession  # noqa: E402
+from aiogram.client.telegram import TelegramAPIServer  # noqa: E402
+from aiohttp import web  # noqa: E402
+
+from benchmarks.bench_navigation import seed  # noqa: E402
+from benchmarks.fake_bot_api import FAKE_TOKEN, FakeBotAPI  # noqa: E402
+from src.database import init_database  # noqa: E402
+from src.db_pool import DEFAULT_DB_PATH, configure_pool  # noqa: E402
+from src.webhook import create_app  # noqa: E402
+
+SECRET = "bench-secret"
+MENU = ["✅ Задачи", "🎯 События", "📅 Расписание"]
+
+
+def make_update(update_id: int, user_id: int) -> dict:
+    return {
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "date": int(time.time()),
+            "chat": {"id": user_id, "type": "private"},
+            "from": {"id": user_id, "is_bot": False, "first_name": f"user{user_id}"},
+            "text": MENU[update_id % len(MENU)],
+        },
+    }
+
+
+def percentile(values: list, share: float) -> float:
+    values = sorted(values)
+    return values[max(int(len(values) * share) - 1, 0)]
+
+
+async def generate(conn, args):
+    """Процесс «Telegram»: фейковый Bot API и отправка апдейтов в webhook"""
+    api = await FakeBotAPI(
+        latency=args.latency, global_rate=10**6, per_chat_interval=0
+    ).start()
+    loop = asyncio.get_running_loop()
+    conn.send(api.url)
+    url = await loop.run_in_executor(None, conn.recv)
+
+    ack_ms = []
+    queue = asyncio.Queue()
+    for update_id in range(1, args.updates + 1):
+        queue.put_nowait(make_update(update_id, 1 + update_id % args.users))
+
+    headers = {"X-Telegram-Bot-Api-Secret-Token": SECRET}
+    async with aiohttp.ClientSession() as session:
+
+        async def sender():
+            while not queue.empty():
+                update = queue.get_nowait()
+                started = time.perf_counter()
+                async with session.post(url, json=update, headers=headers) as response:
+                    assert response.status == 200, response.status
+                ack_ms.append((time.perf_counter() - started) * 1000)
+
+        async with session.post(url, json=make_update(0, 1)) as response:
+            rejected = response.status
+
+        conn.send("started")
+        await asyncio.gather(*(sender() for _ in range(args.concurrency)))
+
+    # Bot API нужен, пока бот не обработает все апдейты
+    await loop.run_in_executor(None, conn.recv)
+    conn.send((ack_ms, rejected, dict(api.calls)))
+    await api.stop()
+
+
+def run_generator(conn, args):
+    asyncio.run(generate(conn, args))
+
+
+async def run(args):
+    from src.handlers import events_router, main_router, schedule_router, tasks_router
+
+    # Нагрузку и Bot API держит отдельный процесс, чтобы не делить с ботом CPU
+    conn, child_conn = multiprocessing.Pipe()
+    generator = multiprocessing.Process(target=run_generator, args=(child_conn, args))
+    generator.start()
+    loop = asyncio.get_running_loop()
+    api_url = await loop.run_in_executor(None, conn.recv)
+    bot = Bot(
+        token=FAKE_TOKEN,
+        session=AiohttpSession(api=TelegramAPIServer.from_base(api_url)),
+    )
+
+    dp = Dispatcher()
+    for router in (main_router, schedule_router, tasks_router, events_router):
+        dp.include_router(router)
+
+    handler_ms = []
+    done = asyncio.Event()
+
+    @dp.update.outer_middleware()
+    async def timing(handler, event, data):
+        started = time.perf_counter()
+        try:
+            return await handler(event, data)
+        finally:
+            handler_ms.append((time.perf_counter() - started) * 1000)
+            if len(handler_ms) == args.updates:
+                done.set()
+
+    app = create_app(dp, bot, path="/webhook", secret=SECRET)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+
+    conn.send(f"http://127.0.0.1:{port}/webhook")
+    await loop.run_in_executor(None, conn.recv)
+    started = time.perf_counter()
+    await asyncio.wait_for(done.wait(), timeout=300)
+    elapsed = time.perf_counter() - started
+
+    conn.send("done")
+    ack_ms, rejected, calls = await loop.run_in_executor(None, conn.recv)
+    generator.join()
+    await runner.cleanup()
+
+    print(
+        f"{args.updates} апдейтов, {args.users} пользователей, "
+        f"{args.concurrency} соединений, задержка Bot API {args.latency * 1000:.0f} мс"
+    )
+    print(f"без секрета: HTTP {rejected}")
+    print(f"пропускная способность: {args.updates / elapsed:.0f} апдейтов/с")
+    print(
+        f"обработчик: медиана {statistics.median(handler_ms):.1f} мс  "
+        f"p99 {percentile(handler_ms, 0.99):.1f} мс"
+    )
+    print(
+        f"ответ webhook: медиана {statistics.median(ack_ms):.1f} мс  "
+        f"p99 {percentile(ack_ms, 0.99):.1f} мс"
+    )
+    print(f"вызовы Bot API: {calls}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--updates", type=int, default=3000)
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.02)
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        configure_pool(os.path.join(tmp, "bench.db"))
+        init_database()
+        seed(args.users)
+        asyncio.run(run(args))
+        configure_pool(DEFAULT_DB_PATH)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+# benchmarks/fake_bot_api.py
+"""Локальный фейковый Bot API для бенчмарков и нагрузочных тестов.
+
+Отвечает на sendMessage как настоящий Telegram: с задержкой сети и с
+ошибкой 429 (retry_after) при превышении глобального лимита и лимита
+на один чат. editMessageText меняет сохранённое сообщение и, как
+Telegram, отвечает 400 «message is not modified» на то же содержимое.
+``error_rate`` — доля sendMessage/editMessageText/answerCallbackQuery,
+на которые сервер случайно отвечает 429 (проверка обработки ошибок).
+
+getUpdates отдаёт апдейты, добавленные через ``push_update``, с long
+polling, как настоящий сервер, — бот работает в обычном режиме polling.
+Все вызовы считаются по методам в ``calls``.
+"""
+
+import asyncio
+import random
+import time
+from collections import Counter, defaultdict, deque
+
+from aiohttp import web
+from aiogram import Bot
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
+
+FAKE_TOKEN = "123456:FAKE-TOKEN-FOR-BENCHMARKS"
+FAKE_BOT_USER = {"id": 123456, "is_bot": True, "first_name": "Bench", "username": "bench_bot"}
+
+# Методы, на которые сервер может случайно ответить 429 (error_rate)
+INJECTABLE = {"sendMessage", "editMessageText", "answerCallbackQuery"}
+
+
+class FakeBotAPI:
+    def __init__(
+        self,
+        latency: float = 0.05,
+        global_rate: int = 30,
+        per_chat_interval: float = 1.0,
+        retry_after: int = 1,
+        error_rate: float = 0.0,
+        seed: int = None,
+    ):
+        self.latency = latency
+        self.global_rate = global_rate
+        self.per_chat_interval = per_chat_interval
+        self.retry_after = retry_after
+        self.error_rate = error_rate
+        self._random = random.Random(seed)
+
+        self._recent = deque()  # времена принятых сообщений за последнюю секунду
+        self._last_by_chat = defaultdict(float)
+        self._message_id = 0
+        self.messages = {}  # (chat_id, message_id) -> (text, reply_markup)
+        self.last_message = {}  # chat_id -> message_id последнего сообщения бота
+        self.stats = {"accepted": 0, "rejected": 0, "injected": 0}
+        self.calls = Counter()
+
+        self._updates = deque()
+        self._update_id = 0
+        self._new_update = asyncio.Event()
+
+        self._runner = None
+        self.url = None
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0):
+        app = web.Application()
+        app.router.add_post("/bot{token}/{method}", self.handle)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.url = f"http://{host}:{port}"
+        return self
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+
+    def make_bot(self) -> Bot:
+        """Bot из aiogram, направленный на этот сервер"""
+        session = AiohttpSession(api=TelegramAPIServer.from_base(self.url))
+        return Bot(token=FAKE_TOKEN, session=session)
+
+    def push_update(self, payload: dict) -> int:
+        """Поставить апдейт в очередь getUpdates, вернуть его update_id"""
+        self._update_id += 1
+        self._updates.append({"update_id": self._update_id, **payload})
+        self._new_update.set()
+        return self._update_id
+
+    def _rate_limited(self, chat_id: int, now: float) -> bool:
+        while self._recent and now - self._recent[0] >= 1.0:
+            self._recent.popleft()
+        if len(self._recent) >= self.global_rate:
+            return True
+        return now - self._last_by_chat[chat_id] < self.per_chat_interval
+
+    async def handle(self, request: web.Request):
+        method = request.match_info["method"]
+        data = await request.post()
+        await asyncio.sleep(self.latency)
+        self.calls[method] += 1
+
+        if method == "getUpdates":
+            return await self.get_updates(data)
+        if method == "getMe":
+            return web.json_response({"ok": True, "result": FAKE_BOT_USER})
+        if method in INJECTABLE and self._random.random() < self.error_rate:
+            self.stats["injected"] += 1
+            return self._too_many_requests()
+        if method == "editMessageText":
+            return self.edit_message(data)
+        if method != "sendMessage":
+            return web.json_response({"ok": True, "result": True})
+
+        chat_id = int(data["chat_id"])
+        now = time.monotonic()
+        if self._rate_limited(chat_id, now):
+            self.stats["rejected"] += 1
+            return self._too_many_requests()
+
+        self._recent.append(now)
+        self._last_by_chat[chat_id] = now
+        self._message_id += 1
+        self.stats["accepted"] += 1
+        self.messages[(chat_id, self._message_id)] = (
+            data.get("text", ""),
+            data.get("reply_markup"),
+        )
+        self.last_message[chat_id] = self._message_id
+        return self._message_response(chat_id, self._message_id, data)
+
+    async def get_updates(self, data):
+        offset = int(data.get("offset") or 0)
+        timeout = float(data.get("timeout") or 0)
+        limit = int(data.get("limit") or 100)
+
+        # Апдейты до offset бот подтвердил — больше не отдаём
+        while self._updates and self._updates[0]["update_id"] < offset:
+            self._updates.popleft()
+        if not self._updates and timeout:
+            self._new_update.clear()
+            try:
+                await asyncio.wait_for(self._new_update.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+        updates = [update for _, update in zip(range(limit), self._updates)]
+        return web.json_response({"ok": True, "result": updates})
+
+    def edit_message(self, data):
+        key = (int(data["chat_id"]), int(data["message_id"]))
+        content = (data.get("text", ""), data.get("reply_markup"))
+        if key not in self.messages:
+            return self._bad_request("message to edit not found")
+        if self.messages[key] == content:
+            return self._bad_request(
+                "message is not modified: specified new message content and reply "
+                "markup are exactly the same as a current content and reply markup "
+                "of the message"
+            )
+        self.messages[key] = content
+        return self._message_response(*key, data)
+
+    def _too_many_requests(self):
+        return web.json_response(
+            {
+                "ok": False,
+                "error_code": 429,
+                "description": f"Too Many Requests: retry after {self.retry_after}",
+                "parameters": {"retry_after": self.retry_after},
+            },
+            status=429,
+        )
+
+    @staticmethod
+    def _bad_request(description: str):
+        return web.json_response(
+            {"ok": False, "error_code": 400, "description": f"Bad Request: {description}"},
+            status=400,
+        )
+
+    @staticmethod
+    def _message_response(chat_id: int, message_id: int, data):
+        return web.json_response(
+            {
+                "ok": True,
+                "result": {
+                    "message_id": message_id,
+                    "date": int(time.time()),
+                    "chat": {"id": chat_id, "type": "private"},
+                    "text": data.get("text", ""),
+                },
+            }
+        )
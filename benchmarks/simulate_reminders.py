@@ -0,0 +1,376 @@
+# benchmarks/simulate_reminders.py
+"""Симуляция недели напоминаний в виртуальном времени.
+
+Сервисы напоминаний и планировщик получают VirtualClock (src/clock.py);
+вместо ожидания симуляция переводит часы на ближайшее событие — время
+напоминания из кучи планировщика, ежечасную сверку с БД или действие
+пользователей — и выполняет его. Неделя проигрывается за секунды.
+
+Перед стартом в БД создаются пользователи с задачами (дедлайны на две
+недели вперёд) и событиями; каждый день в полдень часть пользователей
+добавляет задачу, а в 15:00 часть завершает одну из своих — через
+обычные функции записи, так что напоминания пересчитываются подписчиками.
+
+Каждая отправка записывается (что, кому, в какое виртуальное время). Для
+каждой задачи и события ожидаемые напоминания считаются по расписанию
+сервиса от момента, когда запись появилась, с учётом завершения задачи.
+Итог: дубли, пропуски, лишние отправки, опоздание относительно
+reminder_time, а по дням — отправки, SQL-запросы и процессорное время.
+
+Запуск: python -m benchmarks.simulate_reminders [--users 2000] [--days 7]
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from benchmarks.bench_e2e import QueryCounter  # noqa: E402
+from src import delivery, reminder_scheduler  # noqa: E402
+from src.changes import subscribe, unsubscribe  # noqa: E402
+from src.clock import VirtualClock  # noqa: E402
+from src.database import get_connection, init_database  # noqa: E402
+from src.db_pool import DEFAULT_DB_PATH, configure_pool  # noqa: E402
+from src.delivery import DeliveryPipeline  # noqa: E402
+from src.event_reminders import EventReminderService  # noqa: E402
+from src.reminder_scheduler import ReminderScheduler  # noqa: E402
+from src.repository import db  # noqa: E402
+from src.task_reminders import RECONCILE_INTERVAL, TaskReminderService  # noqa: E402
+from src.timestamps import to_epoch  # noqa: E402
+
+class RecordingBot:
+    """Bot, который ничего не отправляет, а только считает сообщения"""
+
+    def __init__(self):
+        self.messages = 0
+
+    async def send_message(self, chat_id, text, **kwargs):
+        self.messages += 1
+
+
+class Simulation:
+    def __init__(self, args, clock: VirtualClock, counter: QueryCounter):
+        self.args = args
+        self.clock = clock
+        self.counter = counter
+        self.rng = random.Random(args.seed)
+        self.start = clock.now()
+        self.end = self.start + timedelta(days=args.days)
+
+        self.bot = RecordingBot()
+        self.tasks = TaskReminderService(self.bot, clock=clock)
+        self.events = EventReminderService(self.bot, clock=clock)
+        self.scheduler = ReminderScheduler(clock=clock)
+
+        # Что реально ушло: (вид, id записи, тип) -> [время отправки]
+        self.sent = {}
+        # Что должно уйти: (вид, id записи, тип) -> reminder_time
+        self.expected = {}
+        self.task_reminders = {}  # task_id -> [тип], для снятия при завершении
+        self.open_tasks = {}  # task_id -> user_id
+        self.days = []
+
+    # ---------- Подготовка ----------
+
+    def seed(self):
+        args, rng = self.args, self.rng
+        conn = get_connection()
+        try:
+            conn.executemany(
+                "INSERT INTO users (telegram_id, username) VALUES (?, ?)",
+                ((u, f"user{u}") for u in range(1, args.users + 1)),
+            )
+            conn.executemany(
+                "INSERT INTO tasks (user_id, title, deadline, priority) "
+                "VALUES (?, ?, ?, 'medium')",
+                (
+                    (
+                        u,
+                        f"Задача {i}",
+                        (self.start + timedelta(days=rng.randint(0, 14))).strftime(
+                            "%Y-%m-%d"
+                        ),
+                    )
+                    for u in range(1, args.users + 1)
+                    for i in range(args.tasks)
+                ),
+            )
+            conn.executemany(
+                "INSERT INTO events (user_id, title, event_datetime) VALUES (?, ?, ?)",
+                (
+                    (
+                        u,
+                        f"Событие {i}",
+                        (
+                            self.start + timedelta(minutes=rng.randint(0, 10 * 24 * 60))
+                        ).strftime("%Y-%m-%d %H:%M"),
+                    )
+                    for u in range(1, args.users + 1)
+                    for i in range(args.events)
+                ),
+            )
+            conn.commit()
+            tasks = conn.execute(
+                "SELECT id, user_id, deadline_ts FROM tasks"
+            ).fetchall()
+            events = conn.execute("SELECT id, event_ts FROM events").fetchall()
+        finally:
+            conn.close()
+
+        for task in tasks:
+            self.open_tasks[task["id"]] = task["user_id"]
+            self.expect_task(task["id"], task["deadline_ts"], self.start)
+        for event in events:
+            self.expect_event(event["id"], event["event_ts"], self.start)
+
+    def expect_task(self, task_id: int, deadline_ts: int, known: datetime):
+        times = self.tasks.compute_reminder_times(deadline_ts, known)
+        for reminder_type, when in times:
+            if when <= self.end:
+                self.expected[("task", task_id, reminder_type)] = when
+                self.task_reminders.setdefault(task_id, []).append(reminder_type)
+
+    def expect_event(self, event_id: int, event_ts: int, known: datetime):
+        for reminder_type, when in self.events.compute_reminder_times(event_ts, known):
+            if when <= self.end:
+                self.expected[("event", event_id, reminder_type)] = when
+
+    def record(self, kind: str, entity: str, send):
+        async def recorded(reminder):
+            await send(reminder)
+            key = (kind, reminder[entity], reminder["reminder_type"])
+            self.sent.setdefault(key, []).append(self.clock.now())
+
+        return recorded
+
+    # ---------- Действия пользователей ----------
+
+    def add_tasks(self):
+        from src.handlers.tasks import base
+
+        now = self.clock.now()
+        users = range(1, self.args.users + 1)
+        for user_id in self.rng.choices(users, k=self.args.churn):
+            deadline = (now + timedelta(days=self.rng.randint(1, 10))).date()
+            _, task_id, _ = base.save_task(
+                user_id, {"title": "Новая задача", "deadline": deadline.isoformat()}
+            )
+            self.open_tasks[task_id] = user_id
+            deadline_ts = to_epoch(datetime.combine(deadline, datetime.min.time()))
+            self.expect_task(task_id, deadline_ts, now)
+
+    def complete_tasks(self):
+        from src.handlers.tasks import base
+
+        now = self.clock.now()
+        for task_id in self.rng.sample(sorted(self.open_tasks), self.args.churn):
+            base.update_task(task_id, "complete", True)
+            del self.open_tasks[task_id]
+            # Завершённая задача — оставшиеся напоминания больше не нужны
+            for reminder_type in self.task_reminders.pop(task_id, []):
+                key = ("task", task_id, reminder_type)
+                if self.expected.get(key, now) > now:
+                    del self.expected[key]
+
+    # ---------- Цикл ----------
+
+    async def reconcile(self):
+        await self.tasks.check_upcoming_deadlines()
+        await self.events.check_upcoming_events()
+
+    def actions(self):
+        """Действия по расписанию: (время, корутина-фабрика)"""
+        actions = []
+        moment = self.start
+        while moment <= self.end:
+            actions.append((moment, self.reconcile))
+            moment += timedelta(seconds=RECONCILE_INTERVAL)
+        for day in range(self.args.days):
+            midnight = self.start + timedelta(days=day)
+            actions.append(
+                (midnight + timedelta(hours=12), lambda: db.run(self.add_tasks))
+            )
+            actions.append(
+                (midnight + timedelta(hours=15), lambda: db.run(self.complete_tasks))
+            )
+        actions.sort(key=lambda item: item[0])
+        return actions
+
+    async def run(self):
+        self.tasks.send_task_reminder = self.record(
+            "task", "task_id", self.tasks.send_task_reminder
+        )
+        self.events.send_event_reminder = self.record(
+            "event", "event_id", self.events.send_event_reminder
+        )
+        self.scheduler.register(
+            "task",
+            self.tasks.send_scheduled_reminders,
+            self.tasks.fetch_pending_reminder_times,
+        )
+        self.scheduler.register(
+            "event",
+            self.events.send_scheduled_reminders,
+            self.events.fetch_pending_reminder_times,
+        )
+        self.scheduler.bind()
+        subscribe("task", self.tasks.on_task_changed)
+        subscribe("event", self.events.on_event_changed)
+        try:
+            await self.scheduler.load_pending()
+            await self.loop()
+        finally:
+            unsubscribe("task", self.tasks.on_task_changed)
+            unsubscribe("event", self.events.on_event_changed)
+
+    async def loop(self):
+        actions = self.actions()
+        day_end = self.start + timedelta(days=1)
+        self.open_day()
+
+        while True:
+            due = self.scheduler.next_due()
+            due = datetime.fromtimestamp(due) if due is not None else None
+            action_at = actions[0][0] if actions else None
+            moments = [m for m in (due, action_at) if m is not None]
+            if not moments or min(moments) > self.end:
+                break
+            moment = max(min(moments), self.clock.now())
+
+            while moment >= day_end and day_end < self.end:
+                self.clock.set(day_end)
+                self.close_day()
+                day_end += timedelta(days=1)
+                self.open_day()
+            self.clock.set(moment)
+
+            if action_at is not None and action_at <= moment:
+                _, action = actions.pop(0)
+                await action()
+            else:
+                await self.scheduler.dispatch_due()
+            # Напоминания, запланированные из потоков БД, попадают в кучу
+            # через call_soon_threadsafe
+            await asyncio.sleep(0)
+
+        self.clock.set(self.end)
+        if self._day["start"] < self.end:
+            self.close_day()
+
+    def open_day(self):
+        self._day = {
+            "start": self.clock.now(),
+            "sent": self.bot.messages,
+            "queries": self.counter.queries,
+            "commits": self.counter.commits,
+            "cpu": time.process_time(),
+        }
+
+    def close_day(self):
+        day = self._day
+        self.days.append(
+            {
+                "date": day["start"].date(),
+                "sent": self.bot.messages - day["sent"],
+                "queries": self.counter.queries - day["queries"],
+                "commits": self.counter.commits - day["commits"],
+                "cpu": time.process_time() - day["cpu"],
+            }
+        )
+
+    # ---------- Отчёт ----------
+
+    def report(self):
+        duplicates = sum(
+            len(times) - 1 for times in self.sent.values() if len(times) > 1
+        )
+        missed = [key for key in self.expected if key not in self.sent]
+        unexpected = [key for key in self.sent if key not in self.expected]
+        lateness = [
+            (self.sent[key][0] - when).total_seconds()
+            for key, when in self.expected.items()
+            if key in self.sent
+        ]
+
+        print(f"{'день':12} {'отправлено':>10} {'SQL':>8} {'COMMIT':>7} {'CPU, с':>7}")
+        for day in self.days:
+            print(
+                f"{day['date']!s:12} {day['sent']:10} {day['queries']:8} "
+                f"{day['commits']:7} {day['cpu']:7.2f}"
+            )
+        print(
+            f"ожидалось {len(self.expected)}, отправлено {self.bot.messages}: "
+            f"дублей {duplicates}, пропусков {len(missed)}, лишних {len(unexpected)}"
+        )
+        if lateness:
+            lateness.sort()
+            print(
+                f"опоздание: медиана {statistics.median(lateness):.0f} с, "
+                f"p99 {lateness[int(len(lateness) * 0.99) - 1]:.0f} с, "
+                f"макс {lateness[-1]:.0f} с"
+            )
+        by_type = Counter(key[0] for key in missed)
+        if missed:
+            print(f"пропуски по видам: {dict(by_type)}, например {missed[:5]}")
+        if unexpected:
+            print(f"лишние, например: {unexpected[:5]}")
+
+
+async def main_async(args, counter):
+    clock = VirtualClock(datetime.combine(datetime.now().date(), datetime.min.time()))
+    simulation = Simulation(args, clock, counter)
+    await db.run(simulation.seed)
+
+    # Планировщик и конвейер доставки — синглтоны, которыми пользуются сервисы
+    reminder_scheduler._reminder_scheduler = simulation.scheduler
+    delivery._delivery_pipeline = DeliveryPipeline(
+        global_rate=10**9, per_chat_interval=0
+    )
+
+    started = time.perf_counter()
+    await simulation.run()
+    elapsed = time.perf_counter() - started
+
+    print(
+        f"{args.users} пользователей, {args.users * args.tasks} задач, "
+        f"{args.users * args.events} событий, {args.days} дн. виртуального "
+        f"времени за {elapsed:.1f} с"
+    )
+    simulation.report()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--tasks", type=int, default=10)
+    parser.add_argument("--events", type=int, default=5)
+    parser.add_argument("--days", type=int, default=7)
+    parser.add_argument("--churn", type=int, default=200, help="задач в день")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "simulation.db")
+        configure_pool(path)
+        init_database()
+
+        counter = QueryCounter()
+        configure_pool(path, trace=counter)
+        asyncio.run(main_async(args, counter))
+
+        db.shutdown()
+        configure_pool(DEFAULT_DB_PATH)
+
+
+if __name__ == "__main__":
+    main()
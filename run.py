@@ -8,11 +8,10 @@ import sys
 current_dir = os.path.dirname(os.path.abspath(__file__))
 sys.path.insert(0, current_dir)
 
-from src.database import fix_invalid_dates, init_database
+from src.database import init_database
 
 # Инициализируем базу данных
 init_database()
-fix_invalid_dates()
 
 # Теперь импортируем main после установки путей
 from src.bot import main
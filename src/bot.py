@@ -5,7 +5,6 @@ import os
 import sys
 
 from aiogram import Bot, Dispatcher
-from aiogram.fsm.storage.memory import MemoryStorage
 from dotenv import load_dotenv
 
 # Загружаем переменные окружения
@@ -16,23 +15,35 @@ logging.basicConfig(
 )
 
 BOT_TOKEN = os.getenv("BOT_TOKEN")
+BOT_MODE = os.getenv("BOT_MODE", "polling")  # polling или webhook
 if not BOT_TOKEN:
     logging.error("BOT_TOKEN не найден в переменных окружения!")
     exit(1)
 
 # Создаем экземпляры бота и диспетчера
 bot = Bot(token=BOT_TOKEN)
-storage = MemoryStorage()
+
+# Состояния диалогов хранятся в БД и переживают перезапуск
+from src.fsm_storage import SQLiteStorage  # noqa: E402
+
+storage = SQLiteStorage()
 dp = Dispatcher(storage=storage)
 
 # Импортируем и подключаем роутеры
 try:
-    from src.handlers import events_router, main_router, schedule_router, tasks_router
+    from src.handlers import (
+        events_router,
+        inline_router,
+        main_router,
+        schedule_router,
+        tasks_router,
+    )
 
     dp.include_router(main_router)
     dp.include_router(schedule_router)
     dp.include_router(tasks_router)
     dp.include_router(events_router)
+    dp.include_router(inline_router)
 
     logging.info("✅ Роутеры успешно подключены")
 
@@ -49,28 +60,39 @@ async def on_startup():
 
     # Инициализируем и запускаем сервисы напоминаний
     from src.event_reminders import get_event_reminder_service
+    from src.reminder_scheduler import get_reminder_scheduler
     from src.task_reminders import get_task_reminder_service
 
     try:
+        # Планировщик спит до ближайшего напоминания и будит сервисы для отправки
+        scheduler = get_reminder_scheduler()
+
         # Сервис напоминаний о событиях
         event_reminder_service = get_event_reminder_service(bot)
         if event_reminder_service:
+            scheduler.register(
+                "event",
+                event_reminder_service.send_scheduled_reminders,
+                event_reminder_service.fetch_pending_reminder_times,
+            )
+            # start() сразу проверяет предстоящие события, отдельный запуск
+            # той же проверки не нужен
             asyncio.create_task(event_reminder_service.start())
             logging.info("✅ Сервис напоминаний о событиях запущен")
 
-            # Запускаем немедленную проверку для отладки
-            asyncio.create_task(event_reminder_service.check_upcoming_events())
-            logging.info("🔍 Запущена проверка предстоящих событий")
-
         # Сервис напоминаний о задачах
         task_reminder_service = get_task_reminder_service(bot)
         if task_reminder_service:
+            scheduler.register(
+                "task",
+                task_reminder_service.send_scheduled_reminders,
+                task_reminder_service.fetch_pending_reminder_times,
+            )
             asyncio.create_task(task_reminder_service.start())
             logging.info("✅ Сервис напоминаний о задачах запущен")
 
-            # Запускаем немедленную проверку для отладки
-            asyncio.create_task(task_reminder_service.check_upcoming_deadlines())
-            logging.info("🔍 Запущена проверка предстоящих дедлайнов")
+        asyncio.create_task(scheduler.start())
+        logging.info("✅ Планировщик напоминаний запущен")
 
     except Exception as e:
         logging.error(f"❌ Ошибка при запуске сервисов напоминаний: {e}", exc_info=True)
@@ -82,8 +104,15 @@ async def on_shutdown():
 
     try:
         from src.event_reminders import get_event_reminder_service
+        from src.reminder_scheduler import get_reminder_scheduler
         from src.task_reminders import get_task_reminder_service
 
+        # Останавливаем планировщик напоминаний
+        scheduler = get_reminder_scheduler()
+        if scheduler.running:
+            await scheduler.stop()
+            logging.info("✅ Планировщик напоминаний остановлен")
+
         # Останавливаем сервис напоминаний о событиях
         event_reminder_service = get_event_reminder_service()
         if event_reminder_service and event_reminder_service.running:
@@ -99,6 +128,16 @@ async def on_shutdown():
     except Exception as e:
         logging.error(f"❌ Ошибка при остановке сервисов напоминаний: {e}")
 
+    # Сохраняем отложенные состояния FSM, пока потоки БД ещё работают
+    await storage.close()
+
+    # Дожидаемся запросов к БД и закрываем соединения
+    from src.db_pool import get_pool
+    from src.repository import db
+
+    db.shutdown()
+    get_pool().close_all()
+
 
 async def main():
     """Основная функция запуска бота"""
@@ -109,7 +148,14 @@ async def main():
     dp.shutdown.register(on_shutdown)
 
     # Запускаем бота
-    await dp.start_polling(bot)
+    if BOT_MODE == "webhook":
+        from src.webhook import run_webhook
+
+        await run_webhook(dp, bot)
+    else:
+        # getUpdates не работает, пока зарегистрирован webhook
+        await bot.delete_webhook()
+        await dp.start_polling(bot)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,227 @@
+# src/cache.py
+"""Общий кэш списков пользователя (задачи, события, уроки).
+
+LRU с TTL и ограничением по памяти. Каждая запись помечена версией
+пользователя на момент начала загрузки; функции записи в ``base``-модулях
+вызывают ``invalidate_user()`` после commit, и все записи пользователя с
+устаревшей версией перестают выдаваться. Загрузка, начавшаяся до записи и
+закончившаяся после неё, сохраняется со старой версией и тоже не
+выдаётся — устаревший список не попадает в кэш даже при гонке.
+"""
+
+import logging
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from itertools import count
+
+logger = logging.getLogger(__name__)
+
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "10000"))
+CACHE_TTL = float(os.getenv("CACHE_TTL", "300"))  # секунд
+CACHE_MAX_BYTES = int(os.getenv("CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+
+# Версии храним не для всех пользователей, которые когда-либо что-то
+# меняли, а не больше чем столько; при превышении словарь сбрасывается
+MAX_TRACKED_VERSIONS = 100_000
+
+
+def estimate_size(value) -> int:
+    """Приблизительный размер значения в байтах (списки строк из БД)"""
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        for key, item in value.items():
+            size += sys.getsizeof(key) + estimate_size(item)
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            size += estimate_size(item)
+    return size
+
+
+class _Entry:
+    __slots__ = ("value", "version", "expires_at", "size")
+
+    def __init__(self, value, version: int, expires_at: float, size: int):
+        self.value = value
+        self.version = version
+        self.expires_at = expires_at
+        self.size = size
+
+
+class UserListCache:
+    """LRU + TTL кэш с версиями пользователей и метриками.
+
+    Ключ записи — (namespace, user_id, key). Потокобезопасен: запись
+    инвалидируется из потоков БД, чтение идёт из цикла событий.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = CACHE_MAX_ENTRIES,
+        ttl: float = CACHE_TTL,
+        max_bytes: int = CACHE_MAX_BYTES,
+        clock=time.monotonic,
+    ):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._clock = clock
+        self._entries = OrderedDict()
+        self._user_keys = {}  # user_id -> множество ключей записей
+        self._versions = {}
+        self._counter = count(1)
+        # Версия пользователя, которого нет в _versions. После сброса
+        # словаря версий база сдвигается вперёд, чтобы загрузки, начатые до
+        # сброса, не совпали с новой версией
+        self._base_version = 0
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.stats = {
+            "hits": 0,
+            "misses": 0,
+            "evictions": 0,
+            "expired": 0,
+            "invalidations": 0,
+        }
+
+    # ---------- Версии ----------
+
+    def version(self, user_id: int) -> int:
+        with self._lock:
+            return self._versions.get(user_id, self._base_version)
+
+    def invalidate_user(self, user_id: int):
+        """Данные пользователя изменились: поднять версию, удалить записи"""
+        with self._lock:
+            if len(self._versions) >= MAX_TRACKED_VERSIONS:
+                self._versions.clear()
+                self._base_version = next(self._counter)
+            self._versions[user_id] = next(self._counter)
+            for key in self._user_keys.pop(user_id, ()):
+                self._remove(key, keep_index=True)
+            self.stats["invalidations"] += 1
+
+    # ---------- Чтение и запись ----------
+
+    def get(self, namespace: str, user_id: int, key=None, default=None):
+        full_key = (namespace, user_id, key)
+        with self._lock:
+            entry = self._entries.get(full_key)
+            if entry is None:
+                self.stats["misses"] += 1
+                return default
+
+            current = self._versions.get(user_id, self._base_version)
+            if entry.version != current or entry.expires_at <= self._clock():
+                if entry.version == current:
+                    self.stats["expired"] += 1
+                self._remove(full_key)
+                self.stats["misses"] += 1
+                return default
+
+            self._entries.move_to_end(full_key)
+            self.stats["hits"] += 1
+            return entry.value
+
+    def set(
+        self,
+        namespace: str,
+        user_id: int,
+        value,
+        key=None,
+        version: int = None,
+        ttl: float = None,
+    ):
+        """Сохранить значение, загруженное при версии ``version``.
+
+        ``ttl`` — срок жизни записи, если он короче общего (результаты
+        inline-поиска)
+        """
+        full_key = (namespace, user_id, key)
+        size = estimate_size(value)
+        with self._lock:
+            current = self._versions.get(user_id, self._base_version)
+            if version is not None and version != current:
+                # Данные изменились, пока шла загрузка
+                return
+            if size > self.max_bytes:
+                return
+
+            if full_key in self._entries:
+                self._remove(full_key)
+            self._entries[full_key] = _Entry(
+                value, current, self._clock() + (ttl or self.ttl), size
+            )
+            self._user_keys.setdefault(user_id, set()).add(full_key)
+            self._bytes += size
+
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.stats["evictions"] += 1
+
+    async def get_or_load(
+        self, namespace: str, user_id: int, loader, *args, key=None, ttl=None
+    ):
+        """Значение из кэша или результат ``await loader(*args)``"""
+        missing = object()
+        value = self.get(namespace, user_id, key, missing)
+        if value is not missing:
+            return value
+
+        version = self.version(user_id)
+        value = await loader(*args)
+        self.set(namespace, user_id, value, key, version, ttl)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._user_keys.clear()
+            self._bytes = 0
+
+    # ---------- Метрики ----------
+
+    @property
+    def size(self) -> int:
+        return len(self._entries)
+
+    @property
+    def bytes(self) -> int:
+        return self._bytes
+
+    def hit_rate(self) -> float:
+        total = self.stats["hits"] + self.stats["misses"]
+        return self.stats["hits"] / total if total else 0.0
+
+    def _remove(self, full_key, keep_index: bool = False):
+        entry = self._entries.pop(full_key, None)
+        if entry is None:
+            return
+        self._bytes -= entry.size
+        if not keep_index:
+            user_id = full_key[1]
+            keys = self._user_keys.get(user_id)
+            if keys is not None:
+                keys.discard(full_key)
+                if not keys:
+                    del self._user_keys[user_id]
+
+
+# Общий экземпляр кэша
+_list_cache = None
+
+
+def get_list_cache() -> UserListCache:
+    """Получить общий кэш списков (один на процесс)"""
+    global _list_cache
+    if _list_cache is None:
+        _list_cache = UserListCache()
+    return _list_cache
+
+
+def invalidate_user(user_id: int):
+    """Вызывается функциями записи после commit"""
+    get_list_cache().invalidate_user(user_id)
@@ -0,0 +1,55 @@
+# src/changes.py
+"""Уведомления об изменениях задач, событий и уроков.
+
+Функции записи в ``src/handlers/*/base.py`` после успешного commit вызывают
+``notify_change``, а заинтересованные сервисы (напоминания, кэши)
+подписываются через ``subscribe``. Слушатели вызываются синхронно в том же
+потоке БД, где произошла запись, и не должны бросать исключения наружу.
+"""
+
+import logging
+import threading
+from collections import defaultdict
+
+logger = logging.getLogger(__name__)
+
+# Действия над сущностью
+SAVED = "saved"
+UPDATED = "updated"
+DELETED = "deleted"
+
+_listeners = defaultdict(list)
+_lock = threading.Lock()
+
+
+def subscribe(kind: str, listener):
+    """Подписаться на изменения сущностей типа kind ("task", "event", "lesson").
+
+    listener(entity_id, action, field) — field заполнен только для UPDATED.
+    """
+    with _lock:
+        if listener not in _listeners[kind]:
+            _listeners[kind].append(listener)
+
+
+def unsubscribe(kind: str, listener):
+    """Отписаться от изменений"""
+    with _lock:
+        if listener in _listeners[kind]:
+            _listeners[kind].remove(listener)
+
+
+def notify_change(kind: str, entity_id: int, action: str, field: str = None):
+    """Сообщить подписчикам об изменении сущности"""
+    with _lock:
+        listeners = list(_listeners[kind])
+
+    for listener in listeners:
+        try:
+            listener(entity_id, action, field)
+        except Exception as e:
+            # Ошибка подписчика не должна ломать запись в БД
+            logger.error(
+                f"❌ Ошибка обработчика изменений {kind} {entity_id} ({action}): {e}",
+                exc_info=True,
+            )
@@ -0,0 +1,46 @@
+# src/clock.py
+"""Часы сервисов напоминаний.
+
+Сервисы напоминаний и планировщик берут текущее время не напрямую из
+``datetime.now()``/``time.time()``, а из часов, переданных в конструктор.
+В боте это системные часы; тесты и симуляция (benchmarks/simulate_reminders.py)
+передают VirtualClock и переводят время вручную — неделя напоминаний
+проигрывается за секунды.
+"""
+
+import time
+from datetime import datetime, timedelta
+
+
+class SystemClock:
+    """Настоящее локальное время"""
+
+    def now(self) -> datetime:
+        return datetime.now()
+
+    def time(self) -> float:
+        return time.time()
+
+
+class VirtualClock:
+    """Время, которое стоит на месте, пока его не переведут"""
+
+    def __init__(self, start: datetime):
+        self.current = start
+
+    def now(self) -> datetime:
+        return self.current
+
+    def time(self) -> float:
+        return self.current.timestamp()
+
+    def set(self, when: datetime):
+        if when < self.current:
+            raise ValueError("Виртуальное время не идёт назад")
+        self.current = when
+
+    def advance(self, seconds: float):
+        self.set(self.current + timedelta(seconds=seconds))
+
+
+system_clock = SystemClock()
@@ -0,0 +1,199 @@
+# src/db_pool.py
+"""Пул соединений с SQLite"""
+
+import logging
+import os
+import sqlite3
+import threading
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DB_PATH = os.path.join(os.path.dirname(__file__), "..", "bot.db")
+
+# Настройки соединения: WAL позволяет читателям не блокировать писателя,
+# synchronous=NORMAL в режиме WAL безопасен и заметно быстрее FULL
+CONNECTION_PRAGMAS = (
+    "PRAGMA journal_mode = WAL",
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA busy_timeout = 5000",
+    "PRAGMA cache_size = -8000",  # ~8 МБ страничного кэша на соединение
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA foreign_keys = ON",
+)
+
+
+class PooledConnection(sqlite3.Connection):
+    """Соединение, которое при close() возвращается в пул, а не закрывается"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._pool = None
+        self._released = False
+
+    def close(self):
+        """Вернуть соединение в пул"""
+        if self._pool is None:
+            super().close()
+            return
+        if not self._released:
+            self._released = True
+            self._pool.release(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        # Как у sqlite3.Connection: commit при успехе, rollback при ошибке,
+        # но дополнительно возвращаем соединение в пул
+        try:
+            super().__exit__(exc_type, exc_value, traceback)
+        finally:
+            self.close()
+        return False
+
+    def really_close(self):
+        """Физически закрыть соединение"""
+        super().close()
+
+
+class ConnectionPool:
+    """Ограниченный пул соединений с переиспользованием в пределах потока.
+
+    sqlite3-соединение нельзя безопасно делить между потоками, поэтому
+    каждый поток держит свой стек свободных соединений. Общее число
+    открытых соединений ограничено ``max_connections``: при исчерпании
+    ``acquire`` ждёт освобождения соединения не дольше ``timeout`` секунд.
+    ``trace`` — необязательная функция, которой передаётся текст каждой
+    выполненной SQL-команды (подсчёт запросов в нагрузочных тестах).
+    """
+
+    def __init__(
+        self,
+        db_path: str = DEFAULT_DB_PATH,
+        max_connections: int = 16,
+        max_idle_per_thread: int = 2,
+        timeout: float = 10.0,
+        trace=None,
+    ):
+        self.db_path = db_path
+        self.max_connections = max_connections
+        self.max_idle_per_thread = max_idle_per_thread
+        self.timeout = timeout
+        self.trace = trace
+
+        self._local = threading.local()
+        self._slots = threading.BoundedSemaphore(max_connections)
+        self._lock = threading.Lock()
+        self._all_connections = set()
+        self._closed = False
+
+        self.stats = {"opened": 0, "reused": 0, "closed": 0}
+
+    def _idle(self) -> list:
+        idle = getattr(self._local, "idle", None)
+        if idle is None:
+            idle = self._local.idle = []
+        return idle
+
+    def _open(self) -> PooledConnection:
+        conn = sqlite3.connect(
+            self.db_path,
+            factory=PooledConnection,
+            check_same_thread=False,
+        )
+        conn.row_factory = sqlite3.Row
+        for pragma in CONNECTION_PRAGMAS:
+            conn.execute(pragma)
+        if self.trace is not None:
+            conn.set_trace_callback(self.trace)
+
+        conn._pool = self
+        with self._lock:
+            self._all_connections.add(conn)
+            self.stats["opened"] += 1
+        return conn
+
+    def acquire(self) -> PooledConnection:
+        """Получить соединение из пула (или открыть новое)"""
+        if self._closed:
+            raise sqlite3.ProgrammingError("Пул соединений закрыт")
+
+        idle = self._idle()
+        if idle:
+            conn = idle.pop()
+            conn._released = False
+            with self._lock:
+                self.stats["reused"] += 1
+            return conn
+
+        if not self._slots.acquire(timeout=self.timeout):
+            raise sqlite3.OperationalError(
+                f"Пул соединений исчерпан ({self.max_connections} соединений)"
+            )
+        try:
+            return self._open()
+        except Exception:
+            self._slots.release()
+            raise
+
+    def release(self, conn: PooledConnection):
+        """Вернуть соединение в пул текущего потока"""
+        with self._lock:
+            if conn not in self._all_connections:
+                return  # уже закрыто через close_all()
+
+        # Незакоммиченные изменения не должны утечь в следующий запрос
+        if conn.in_transaction:
+            conn.rollback()
+        conn.row_factory = sqlite3.Row
+
+        idle = self._idle()
+        if not self._closed and len(idle) < self.max_idle_per_thread:
+            idle.append(conn)
+            return
+
+        self._discard(conn)
+
+    def _discard(self, conn: PooledConnection):
+        with self._lock:
+            if conn not in self._all_connections:
+                return
+            self._all_connections.discard(conn)
+            self.stats["closed"] += 1
+        conn.really_close()
+        self._slots.release()
+
+    def close_all(self):
+        """Закрыть все соединения пула (при остановке бота или смене БД)"""
+        self._closed = True
+        with self._lock:
+            connections = list(self._all_connections)
+        for conn in connections:
+            try:
+                self._discard(conn)
+            except sqlite3.Error as e:
+                logger.warning(f"Ошибка при закрытии соединения: {e}")
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> ConnectionPool:
+    """Получить глобальный пул соединений"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool(os.getenv("DB_PATH", DEFAULT_DB_PATH))
+    return _pool
+
+
+def configure_pool(db_path: str, **kwargs) -> ConnectionPool:
+    """Пересоздать глобальный пул для другой БД (тесты, бенчмарки)"""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close_all()
+        _pool = ConnectionPool(db_path, **kwargs)
+    return _pool
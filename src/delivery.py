@@ -0,0 +1,288 @@
+# src/delivery.py
+"""Конвейер доставки напоминаний с учётом лимитов Telegram.
+
+Telegram ограничивает бота примерно 30 сообщениями в секунду в целом и
+одним сообщением в секунду в один чат; при превышении API отвечает 429 с
+``retry_after``. Конвейер отправляет напоминания ограниченным пулом
+воркеров через общий token bucket, выдерживает интервал между сообщениями
+в один чат и помечает отправленные напоминания пачками. Неудачные
+отправки с классом ошибки (``classify_error``) передаются очереди
+(src/outbox.py), которая решает, повторять ли их.
+"""
+
+import asyncio
+import heapq
+import itertools
+import logging
+import os
+from collections import OrderedDict, deque
+
+from aiogram.exceptions import (
+    TelegramBadRequest,
+    TelegramForbiddenError,
+    TelegramRetryAfter,
+)
+
+from src import outbox
+
+logger = logging.getLogger(__name__)
+
+GLOBAL_RATE = float(os.getenv("DELIVERY_GLOBAL_RATE", "30"))  # сообщений в секунду
+PER_CHAT_INTERVAL = float(os.getenv("DELIVERY_PER_CHAT_INTERVAL", "1.0"))  # секунд
+DELIVERY_WORKERS = int(os.getenv("DELIVERY_WORKERS", "16"))
+COMMIT_BATCH = 100  # напоминаний на один UPDATE ... reminder_sent = 1
+MAX_RETRY_AFTER = 5  # сколько раз повторять сообщение после 429
+
+# Приоритеты за общим лимитом: меньше — раньше
+PRIORITY_URGENT = 0  # напоминания о событиях за час и меньше
+PRIORITY_NORMAL = 1
+PRIORITY_BULK = 2  # массовые утренние/вечерние напоминания о задачах
+
+# Ответы 400, означающие, что чата больше нет
+UNREACHABLE_REASONS = ("chat not found", "user is deactivated", "peer_id_invalid")
+
+
+def classify_error(error: Exception) -> str:
+    """Класс ошибки отправки для очереди (outbox.TRANSIENT и т. д.)"""
+    if isinstance(error, TelegramForbiddenError):
+        return outbox.UNREACHABLE  # бот заблокирован или удалён из чата
+    if isinstance(error, TelegramBadRequest):
+        message = error.message.lower()
+        if any(reason in message for reason in UNREACHABLE_REASONS):
+            return outbox.UNREACHABLE
+        return outbox.PERMANENT  # то же сообщение снова не пройдёт
+    return outbox.TRANSIENT
+
+
+class TokenBucket:
+    """Token bucket: не больше rate операций в секунду, всплеск до capacity.
+
+    По умолчанию всплеск равен одному токену: Telegram считает лимит в
+    скользящем окне, и полный bucket плюс пополнение за ту же секунду дали
+    бы до 2 * rate сообщений.
+
+    Ожидающие получают токены по приоритету (меньше — раньше), при равном
+    приоритете — в порядке очереди: срочные напоминания обгоняют накопленную
+    пачку массовых.
+    """
+
+    def __init__(self, rate: float, capacity: float = 1):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = self.capacity
+        self._updated = None
+        self._paused_until = 0.0
+        self._waiters = []  # куча (priority, порядковый номер, future)
+        self._counter = itertools.count()
+        self._granter = None
+
+    def pause(self, seconds: float):
+        """Остановить выдачу токенов (после 429 от Telegram)"""
+        loop = asyncio.get_running_loop()
+        self._paused_until = max(self._paused_until, loop.time() + seconds)
+        self._tokens = 0
+
+    async def acquire(self, priority: int = 0):
+        """Дождаться токена"""
+        loop = asyncio.get_running_loop()
+        waiter = loop.create_future()
+        heapq.heappush(self._waiters, (priority, next(self._counter), waiter))
+        granter = self._granter
+        if granter is None or granter.done() or granter.get_loop() is not loop:
+            self._granter = loop.create_task(self._grant())
+        await waiter
+
+    async def _grant(self):
+        """Выдача токенов ожидающим, пока очередь не опустеет"""
+        loop = asyncio.get_running_loop()
+        while self._waiters:
+            now = loop.time()
+            if now < self._paused_until:
+                await asyncio.sleep(self._paused_until - now)
+                continue
+
+            if self._updated is not None:
+                elapsed = now - self._updated
+                self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+            self._updated = now
+
+            if self._tokens < 1:
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+                continue
+
+            _, _, waiter = heapq.heappop(self._waiters)
+            if waiter.done():
+                continue  # ожидание отменено
+            self._tokens -= 1
+            waiter.set_result(None)
+
+
+class DeliveryPipeline:
+    """Параллельная отправка с глобальным и поканальным ограничением"""
+
+    def __init__(
+        self,
+        global_rate: float = GLOBAL_RATE,
+        per_chat_interval: float = PER_CHAT_INTERVAL,
+        workers: int = DELIVERY_WORKERS,
+        commit_batch: int = COMMIT_BATCH,
+        max_retry_after: int = MAX_RETRY_AFTER,
+    ):
+        self.global_rate = global_rate
+        self.per_chat_interval = per_chat_interval
+        self.workers = workers
+        self.commit_batch = commit_batch
+        self.max_retry_after = max_retry_after
+
+        self.bucket = TokenBucket(global_rate)
+        self.stats = {"sent": 0, "failed": 0, "retry_after": 0, "commits": 0}
+
+    async def deliver(
+        self,
+        reminders,
+        send,
+        mark_sent,
+        release=None,
+        priority=PRIORITY_BULK,
+        chat_key: str = "telegram_id",
+    ):
+        """Отправить напоминания и пометить отправленные.
+
+        send(reminder) — корутина, отправляющая одно сообщение;
+        mark_sent(ids) — синхронная функция, помечающая пачку напоминаний
+        отправленными (выполняется в потоке БД);
+        release(failures) — необязательная синхронная функция, получающая
+        неотправленные напоминания [(reminder, класс ошибки, текст ошибки)]
+        (тоже в потоке БД);
+        priority — приоритет сообщений (PRIORITY_*) или функция
+        priority(reminder): при общей очереди за токенами срочные идут первыми.
+        Возвращает число успешно отправленных напоминаний.
+        """
+        if not reminders:
+            return 0
+
+        from src.repository import db
+
+        loop = asyncio.get_running_loop()
+        priority_of = priority if callable(priority) else lambda reminder: priority
+
+        # Очередь сообщений каждого чата: порядок внутри чата сохраняется,
+        # а воркер не простаивает, ожидая интервала одного чата
+        chats = OrderedDict()
+        for reminder in reminders:
+            chats.setdefault(reminder[chat_key], deque()).append([reminder, 0])
+
+        ready = asyncio.Queue()
+        for chat_id in chats:
+            ready.put_nowait(chat_id)
+
+        remaining = len(reminders)
+        done = asyncio.Event()
+        sent_ids = []
+        failures = []
+        sent_total = 0
+        pending_timers = set()
+
+        async def flush():
+            nonlocal sent_ids
+            if not sent_ids:
+                return
+            batch, sent_ids = sent_ids, []
+            await db.run(mark_sent, batch)
+            self.stats["commits"] += 1
+
+        def requeue(chat_id, delay: float):
+            def put():
+                pending_timers.discard(handle)
+                ready.put_nowait(chat_id)
+
+            handle = loop.call_later(delay, put)
+            pending_timers.add(handle)
+
+        def finish_one():
+            nonlocal remaining
+            remaining -= 1
+            if remaining == 0:
+                done.set()
+
+        async def worker():
+            nonlocal sent_total
+            while True:
+                chat_id = await ready.get()
+                queue = chats[chat_id]
+                item = queue[0]
+                reminder = item[0]
+
+                await self.bucket.acquire(priority_of(reminder))
+                try:
+                    await send(reminder)
+                except TelegramRetryAfter as e:
+                    self.stats["retry_after"] += 1
+                    item[1] += 1
+                    logger.warning(
+                        f"⏳ Лимит Telegram, повтор через {e.retry_after} с "
+                        f"(напоминание {reminder['id']})"
+                    )
+                    self.bucket.pause(e.retry_after)
+                    if item[1] <= self.max_retry_after:
+                        requeue(chat_id, e.retry_after)
+                        continue
+                    queue.popleft()
+                    self.stats["failed"] += 1
+                    failures.append((reminder, outbox.TRANSIENT, str(e)))
+                    finish_one()
+                except Exception as e:
+                    queue.popleft()
+                    self.stats["failed"] += 1
+                    error_class = classify_error(e)
+                    failures.append((reminder, error_class, str(e)))
+                    logger.error(
+                        f"❌ Ошибка при отправке напоминания {reminder['id']}: {e}"
+                    )
+                    finish_one()
+
+                    # Остальные сообщения в этот чат тоже не дойдут
+                    while error_class == outbox.UNREACHABLE and queue:
+                        self.stats["failed"] += 1
+                        failures.append((queue.popleft()[0], error_class, str(e)))
+                        finish_one()
+                else:
+                    queue.popleft()
+                    self.stats["sent"] += 1
+                    sent_total += 1
+                    sent_ids.append(reminder["id"])
+                    if len(sent_ids) >= self.commit_batch:
+                        await flush()
+                    finish_one()
+
+                if queue:
+                    requeue(chat_id, self.per_chat_interval)
+
+        tasks = [
+            asyncio.create_task(worker()) for _ in range(min(self.workers, len(chats)))
+        ]
+        try:
+            await done.wait()
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            for handle in pending_timers:
+                handle.cancel()
+            await flush()
+            if release is not None and failures:
+                await db.run(release, failures)
+
+        return sent_total
+
+
+# Синглтон экземпляр
+_delivery_pipeline = None
+
+
+def get_delivery_pipeline() -> DeliveryPipeline:
+    """Получить общий конвейер доставки (лимиты Telegram общие на бота)"""
+    global _delivery_pipeline
+    if _delivery_pipeline is None:
+        _delivery_pipeline = DeliveryPipeline()
+    return _delivery_pipeline
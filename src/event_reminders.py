@@ -2,32 +2,72 @@
 """Модуль напоминаний о событиях"""
 
 import asyncio
+import json
 import logging
 from datetime import datetime, timedelta
+from functools import partial
 
 from aiogram import Bot
 
+from src import outbox
+from src.changes import DELETED, UPDATED, subscribe, unsubscribe
+from src.clock import system_clock
 from src.database import get_connection
+from src.delivery import PRIORITY_NORMAL, PRIORITY_URGENT, get_delivery_pipeline
+from src.recurrence import SERIES_COLUMNS, event_occurrences, fetch_exceptions
+from src.reminder_scheduler import get_reminder_scheduler
+from src.repository import db
+from src.timestamps import from_epoch, to_epoch
 
 logger = logging.getLogger(__name__)
 
 
+# Напоминания создаются при записи событий; периодическая сверка с БД —
+# только страховка от пропущенных уведомлений (например, правок из другого процесса)
+RECONCILE_INTERVAL = 3600
+
+# Поля события, от которых зависит расписание напоминаний
+SCHEDULE_FIELDS = ("event_datetime", "recurrence_rule", "exceptions")
+
+# Окно планирования: напоминания создаются для вхождений серии не дальше
+# этого срока (ближайшее вхождение — всегда), остальные — при сверке,
+# когда они попадут в окно. Первое незапланированное вхождение хранится
+# в events.plan_ts
+PLAN_HORIZON = timedelta(hours=48)
+
+# Событий за одну транзакцию сверки: первая сверка после миграции или
+# простоя планирует все серии, и одна длинная транзакция надолго заняла
+# бы блокировку записи
+RECONCILE_BATCH = 1000
+
+# Напоминания, которые при очереди за лимитом Telegram обгоняют остальные
+URGENT_REMINDER_TYPES = ("0.5h", "1h")
+
+
+def reminder_priority(reminder) -> int:
+    """Приоритет отправки напоминания о событии"""
+    if reminder["reminder_type"] in URGENT_REMINDER_TYPES:
+        return PRIORITY_URGENT
+    return PRIORITY_NORMAL
+
+
 class EventReminderService:
-    def __init__(self, bot: Bot):
+    def __init__(self, bot: Bot, clock=system_clock):
         self.bot = bot
+        self.clock = clock
         self.running = False
         self.reminder_schedule = [24, 12, 6, 3, 1, 0.5]  # Часы до события
 
     async def start(self):
         """Запуск сервиса напоминаний"""
         self.running = True
+        subscribe("event", self.on_event_changed)
         logger.info("🚀 Сервис напоминаний о событиях запущен")
 
         while self.running:
             try:
                 await self.check_upcoming_events()
-                await self.send_scheduled_reminders()
-                await asyncio.sleep(30)  # Проверяем каждые 30 секунд
+                await asyncio.sleep(RECONCILE_INTERVAL)
             except Exception as e:
                 logger.error(f"Ошибка в сервисе напоминаний: {e}")
                 await asyncio.sleep(60)
@@ -35,175 +75,351 @@ class EventReminderService:
     async def stop(self):
         """Остановка сервиса"""
         self.running = False
+        unsubscribe("event", self.on_event_changed)
         logger.info("🛑 Сервис напоминаний о событиях остановлен")
 
-    async def check_upcoming_events(self):
-        """Проверка предстоящих событий и создание напоминаний"""
+    # ==================== ИЗМЕНЕНИЯ СОБЫТИЙ ====================
+
+    def on_event_changed(self, event_id: int, action: str, field: str = None):
+        """Пересчёт напоминаний одного события после его изменения (в потоке БД)"""
+        if action == DELETED:
+            return  # Напоминания удаляются каскадно вместе с событием
+        if action == UPDATED and field not in SCHEDULE_FIELDS:
+            return  # Название и описание на расписание не влияют
+
+        event = self._fetch_event(event_id)
+        if event is None:
+            return
+        self._plan_event_reminders([event], reset=True)
+
+    def _fetch_event(self, event_id: int):
+        """Событие с полями, нужными для расчёта напоминаний"""
         conn = get_connection()
         cursor = conn.cursor()
+        cursor.execute(
+            f"SELECT {SERIES_COLUMNS}, title FROM events WHERE id = ?", (event_id,)
+        )
+        event = cursor.fetchone()
+        conn.close()
+        return event
 
-        now = datetime.now()
+    # ==================== СВЕРКА С БД ====================
 
-        # Ищем события в ближайшие 48 часов
-        time_threshold = now + timedelta(hours=48)
+    def _fetch_upcoming_events(
+        self, time_threshold: datetime, limit: int = RECONCILE_BATCH
+    ):
+        """События, незапланированное вхождение которых наступит до
+        time_threshold, ближайшие первыми (в потоке БД).
 
+        Прошедшие вхождения тоже попадают в выборку: планирование
+        передвинет plan_ts на следующее вхождение или обнулит его.
+        """
+        conn = get_connection()
+        cursor = conn.cursor()
         cursor.execute(
             """
             SELECT e.*, u.telegram_id, u.username
             FROM events e
             JOIN users u ON e.user_id = u.telegram_id
-            WHERE e.event_datetime BETWEEN ? AND ?
-            AND (e.last_reminder_sent IS NULL OR e.last_reminder_sent < ?)
+            WHERE e.plan_ts <= ? AND u.is_active = 1
+            ORDER BY e.plan_ts
+            LIMIT ?
             """,
-            (
-                now.strftime("%Y-%m-%d %H:%M"),
-                time_threshold.strftime("%Y-%m-%d %H:%M"),
-                (now - timedelta(hours=1)).strftime("%Y-%m-%d %H:%M"),
-            ),
+            (to_epoch(time_threshold), limit),
         )
 
         events = cursor.fetchall()
         conn.close()
+        return events
+
+    async def check_upcoming_events(self):
+        """Сверка: создание напоминаний для событий, пропущенных уведомлениями"""
+        now = self.clock.now()
+
+        # Ищем события в ближайшие 48 часов
+        time_threshold = now + PLAN_HORIZON
+
+        # Спланированные события уходят из выборки, следующая пачка — новые
+        while True:
+            events = await db.run(self._fetch_upcoming_events, time_threshold)
+            if not events:
+                break
+            planned = await self.schedule_event_reminders(events)
+            if not planned or len(events) < RECONCILE_BATCH:
+                break
+
+    # ==================== СОЗДАНИЕ НАПОМИНАНИЙ ====================
+
+    def compute_reminder_times(self, event_ts: int, now: datetime) -> list:
+        """Расписание напоминаний для одного вхождения события:
+        [(reminder_type, reminder_time)]"""
+        event_time = from_epoch(event_ts)
+
+        # Пропускаем события в прошлом
+        if event_time <= now:
+            return []
 
-        for event in events:
-            await self.schedule_event_reminders(event)
+        reminder_times = []
+        for hours_before in self.reminder_schedule:
+            reminder_time = event_time - timedelta(hours=hours_before)
 
-    async def schedule_event_reminders(self, event):
-        """Создание напоминаний для события"""
+            # Не создаем напоминания, которые должны были быть более 10 минут назад
+            if (now - reminder_time).total_seconds() < 600:  # 600 секунд = 10 минут
+                reminder_times.append((f"{hours_before}h", reminder_time))
+
+        return reminder_times
+
+    def _plan_event_reminders(
+        self, events, now: datetime = None, reset: bool = False
+    ) -> int:
+        """Пересоздание напоминаний для пачки событий одной транзакцией (в потоке БД).
+
+        reset=True удаляет и уже отправленные напоминания — время события сменилось.
+        У повторяющихся событий напоминания создаются для каждого вхождения
+        в окне PLAN_HORIZON.
+        """
+        now = now or self.clock.now()
+
+        conn = get_connection()
         try:
-            event_time = datetime.strptime(event["event_datetime"], "%Y-%m-%d %H:%M")
-            now = datetime.now()
-
-            # Пропускаем события в прошлом
-            if event_time <= now:
-                return
-
-            # Для каждого времени в расписании создаем напоминание
-            for hours_before in self.reminder_schedule:
-                reminder_time = event_time - timedelta(hours=hours_before)
-
-                # Если время напоминания еще не наступило и не в прошлом
-                if reminder_time < event_time:
-                    # Не создаем напоминания, которые должны были быть более 10 минут назад
-                    if (
-                        now - reminder_time
-                    ).total_seconds() < 600:  # 600 секунд = 10 минут
-                        await self.create_reminder(
-                            event["id"], reminder_time, f"{hours_before}h"
+            exceptions = fetch_exceptions(conn, [event["id"] for event in events])
+
+            now_str = now.strftime("%Y-%m-%d %H:%M")
+            event_ids = []
+            rows = []
+            cursors = []
+            for event in events:
+                try:
+                    occurrences, plan_ts = self._occurrences_to_plan(
+                        event, now, exceptions.get(event["id"], ())
+                    )
+                    event_rows = [
+                        (
+                            event["id"],
+                            occurrence_ts,
+                            reminder_type,
+                            reminder_time.strftime("%Y-%m-%d %H:%M"),
+                            to_epoch(reminder_time),
+                        )
+                        for occurrence_ts in occurrences
+                        for reminder_type, reminder_time in (
+                            self.compute_reminder_times(occurrence_ts, now)
                         )
+                    ]
+                except (TypeError, ValueError, OverflowError) as e:
+                    # plan_ts обнуляется, чтобы сверка не выбирала событие снова
+                    logger.error(f"Некорректное время события {event['id']}: {e}")
+                    event_rows, plan_ts = [], None
+                rows.extend(event_rows)
+                event_ids.append((event["id"],))
+                cursors.append((now_str, plan_ts, event["id"]))
+
+            if not event_ids:
+                return 0
+
+            ids_json = json.dumps([event_id for (event_id,) in event_ids])
+            if reset:
+                conn.executemany(
+                    "DELETE FROM event_reminders WHERE event_id = ?", event_ids
+                )
+            else:
+                # Наступившие, но ещё не отправленные напоминания оставляем:
+                # заново они не создаются (их время уже прошло) и пропали бы
+                now_ts = to_epoch(now)
+                conn.executemany(
+                    "DELETE FROM event_reminders "
+                    "WHERE event_id = ? AND reminder_sent = 0 AND reminder_ts > ?",
+                    [(row[0], now_ts) for row in event_ids],
+                )
+            conn.executemany(
+                """
+                INSERT OR IGNORE INTO event_reminders
+                    (event_id, occurrence_ts, reminder_type, reminder_time, reminder_ts)
+                VALUES (?, ?, ?, ?, ?)
+                """,
+                rows,
+            )
 
-            # Обновляем время последнего напоминания
-            conn = get_connection()
-            cursor = conn.cursor()
-            cursor.execute(
-                "UPDATE events SET last_reminder_sent = ? WHERE id = ?",
-                (now.strftime("%Y-%m-%d %H:%M"), event["id"]),
+            # Запоминаем время создания напоминаний и первое незапланированное
+            # вхождение: до его попадания в окно сверка событие не трогает
+            conn.executemany(
+                "UPDATE events SET last_reminder_sent = ?, plan_ts = ? WHERE id = ?",
+                cursors,
             )
+
+            created = conn.execute(
+                """
+                SELECT id, reminder_ts FROM event_reminders
+                WHERE reminder_sent = 0
+                AND event_id IN (SELECT value FROM json_each(?))
+                """,
+                (ids_json,),
+            ).fetchall()
             conn.commit()
+        finally:
             conn.close()
 
-            logger.info(
-                f"Созданы напоминания для события {event['id']}: {event['title']}"
-            )
+        scheduler = get_reminder_scheduler()
+        for reminder_id, reminder_ts in created:
+            scheduler.schedule("event", reminder_id, from_epoch(reminder_ts))
 
+        logger.info(
+            f"Созданы напоминания для {len(event_ids)} событий: {len(created)}"
+        )
+        return len(created)
+
+    def _occurrences_to_plan(self, event, now: datetime, exceptions) -> tuple:
+        """(epoch вхождений, для которых создаются напоминания, plan_ts)"""
+        horizon = now + PLAN_HORIZON
+        planned = []
+        for occurrence in event_occurrences(event, now, exceptions):
+            if planned and occurrence > horizon:
+                return planned, to_epoch(occurrence)
+            planned.append(to_epoch(occurrence))
+        return planned, None
+
+    async def schedule_event_reminders(self, events) -> bool:
+        """Создание напоминаний для списка событий"""
+        try:
+            await db.run(self._plan_event_reminders, list(events))
+            return True
         except Exception as e:
-            logger.error(
-                f"Ошибка при создании напоминаний для события {event['id']}: {e}"
-            )
+            logger.error(f"Ошибка при создании напоминаний для событий: {e}")
+            return False
 
-    async def create_reminder(
-        self, event_id: int, reminder_time: datetime, reminder_type: str
-    ):
-        """Создание записи о напоминании в БД"""
-        conn = get_connection()
-        cursor = conn.cursor()
+    def fetch_pending_reminder_times(self):
+        """Все неотправленные напоминания для загрузки в планировщик.
 
-        # Проверяем, не существует ли уже такое напоминание
-        cursor.execute(
+        Захваченные другим отправителем ставятся на истечение аренды
+        """
+        conn = get_connection()
+        rows = conn.execute(
             """
-            SELECT id FROM event_reminders
-            WHERE event_id = ? AND reminder_type = ? AND reminder_sent = 0
-            """,
-            (event_id, reminder_type),
-        )
+            SELECT id, MAX(reminder_ts, IFNULL(lease_until, 0)) AS due_ts
+            FROM event_reminders WHERE reminder_sent = 0
+            """
+        ).fetchall()
+        conn.close()
+        return [(row["id"], row["due_ts"]) for row in rows]
 
-        existing = cursor.fetchone()
+    # ==================== ОТПРАВКА ====================
 
-        if not existing:
-            cursor.execute(
+    def _claim_due_reminders(self, now_ts: int, token: str) -> tuple:
+        """Захват пачки наступивших напоминаний (выполняется в потоке БД).
+
+        Возвращает (число захваченных строк, напоминания с данными событий).
+        """
+        conn = get_connection()
+        try:
+            claimed = outbox.claim(conn, "event_reminders", now_ts, token)
+            if not claimed:
+                return 0, []
+
+            reminders = conn.execute(
                 """
-                INSERT INTO event_reminders (event_id, reminder_type, reminder_time)
-                VALUES (?, ?, ?)
+                SELECT er.*, e.title, e.event_ts, e.description, e.location,
+                    u.telegram_id, u.username
+                FROM event_reminders er
+                JOIN events e ON er.event_id = e.id
+                JOIN users u ON e.user_id = u.telegram_id
+                WHERE er.id IN (SELECT value FROM json_each(?))
+                AND u.is_active = 1
+                ORDER BY er.reminder_ts
                 """,
-                (
-                    event_id,
-                    reminder_type,
-                    reminder_time.strftime("%Y-%m-%d %H:%M"),
-                ),
-            )
+                (json.dumps(claimed),),
+            ).fetchall()
+
+            # Пользователь удалён или отключён — отправлять некому
+            skipped = set(claimed) - {reminder["id"] for reminder in reminders}
+            if skipped:
+                outbox.finish(conn, "event_reminders", skipped, token, outbox.FAILED)
+                conn.commit()
+        finally:
+            conn.close()
+        return len(claimed), reminders
+
+    def _mark_reminders_sent(self, reminder_ids: list, token: str):
+        """Помечаем пачку захваченных напоминаний отправленными одной транзакцией"""
+        conn = get_connection()
+        outbox.finish(conn, "event_reminders", reminder_ids, token)
+        conn.commit()
+        conn.close()
+
+    def _release_reminders(self, failures: list, token: str) -> tuple:
+        """Неотправленные напоминания: повтор с задержкой или dead letters.
+
+        Напоминание о начавшемся вхождении повторять поздно.
+        """
+        now_ts = to_epoch(self.clock.now())
+        rows = []
+        for reminder, error_class, error in failures:
+            if error_class == outbox.TRANSIENT and reminder["occurrence_ts"] <= now_ts:
+                error_class = outbox.PERMANENT
+                error = f"событие уже началось: {error}"
+            rows.append((reminder["id"], reminder["telegram_id"], error_class, error))
+
+        conn = get_connection()
+        try:
+            retried, dead = outbox.release(conn, "event_reminders", rows, token, now_ts)
             conn.commit()
-            logger.info(
-                f"Создано напоминание для события {event_id}: {reminder_type} в {reminder_time}"
-            )
+        finally:
+            conn.close()
+        logger.warning(f"🔁 Повтор отправки: {retried}, в dead letters: {dead}")
+        return retried, dead
 
+    def _fetch_leased_reminders(self, now_ts: int) -> list:
+        """Наступившие напоминания, захваченные другими отправителями"""
+        conn = get_connection()
+        rows = outbox.leased(conn, "event_reminders", now_ts)
         conn.close()
+        return rows
 
     async def send_scheduled_reminders(self):
-        """Отправка запланированных напоминаний о событиях"""
-        conn = get_connection()
-        cursor = conn.cursor()
+        """Отправка запланированных напоминаний о событиях.
 
-        now = datetime.now()
-        # Используем локальное время для сравнения
-        now_local_str = now.strftime("%Y-%m-%d %H:%M:%S")
+        Напоминания захватываются пачками, поэтому параллельные запуски
+        (в том числе из разных процессов) не отправляют одно и то же.
+        """
+        now = self.clock.now()
 
         logger.info(
-            f"🔍 Проверка напоминаний о событиях, локальное время: {now_local_str}"
+            f"🔍 Проверка напоминаний о событиях, локальное время: {now:%Y-%m-%d %H:%M:%S}"
         )
 
-        # Исправленный запрос для событий
-        cursor.execute(
-            """
-            SELECT er.*, e.title, e.event_datetime, e.description, e.location,
-                u.telegram_id, u.username
-            FROM event_reminders er
-            JOIN events e ON er.event_id = e.id
-            JOIN users u ON e.user_id = u.telegram_id
-            WHERE er.reminder_sent = 0
-            AND strftime('%Y-%m-%d %H:%M:%S', er.reminder_time) <= ?
-        """,
-            (now_local_str,),
-        )
-
-        reminders = cursor.fetchall()
-
-        logger.info(f"📨 Найдено напоминаний о событиях для отправки: {len(reminders)}")
-
+        token = outbox.new_claim_token()
+        mark_sent = partial(self._mark_reminders_sent, token=token)
+        release = partial(self._release_reminders, token=token)
         sent_count = 0
-        for reminder in reminders:
-            try:
-                logger.info(f"📤 Отправка напоминания о событии {reminder['id']}")
+        while True:
+            claimed, reminders = await db.run(
+                self._claim_due_reminders, to_epoch(self.clock.now()), token
+            )
+            if not claimed:
+                break
 
-                await self.send_event_reminder(reminder)
-                sent_count += 1
+            logger.info(
+                f"📨 Захвачено напоминаний о событиях для отправки: {len(reminders)}"
+            )
 
-                # Помечаем напоминание как отправленное
-                cursor.execute(
-                    "UPDATE event_reminders SET reminder_sent = 1 WHERE id = ?",
-                    (reminder["id"],),
-                )
-                conn.commit()
-                logger.info(
-                    f"✅ Напоминание о событии {reminder['id']} отправлено и помечено"
-                )
+            # Отправка параллельно, но в пределах лимитов Telegram
+            sent = await get_delivery_pipeline().deliver(
+                reminders,
+                self.send_event_reminder,
+                mark_sent,
+                release,
+                priority=reminder_priority,
+            )
+            sent_count += sent
 
-            except Exception as e:
-                logger.error(
-                    f"❌ Ошибка при отправке напоминания о событии {reminder['id']}: {e}",
-                    exc_info=True,
-                )
+            if claimed < outbox.CLAIM_BATCH:
+                break
 
-        conn.close()
+        # Строки, захваченные другим отправителем, проверим после его аренды,
+        # отложенные повторы — в назначенное время
+        scheduler = get_reminder_scheduler()
+        leased = await db.run(self._fetch_leased_reminders, to_epoch(self.clock.now()))
+        for reminder_id, lease_until in leased:
+            scheduler.schedule("event", reminder_id, from_epoch(lease_until))
 
         if sent_count > 0:
             logger.info(f"🎉 Отправлено {sent_count} напоминаний о событиях")
@@ -214,10 +430,11 @@ class EventReminderService:
             # Преобразуем sqlite3.Row в словарь
             reminder_dict = dict(reminder)
 
-            event_time = datetime.strptime(
-                reminder_dict["event_datetime"], "%Y-%m-%d %H:%M"
+            # У повторяющегося события напоминание относится к своему вхождению
+            event_time = from_epoch(
+                reminder_dict.get("occurrence_ts") or reminder_dict["event_ts"]
             )
-            now = datetime.now()
+            now = self.clock.now()
 
             # Вычисляем оставшееся время
             time_left = event_time - now
@@ -293,22 +510,26 @@ class EventReminderService:
 
     async def cleanup_old_reminders(self):
         """Очистка старых напоминаний"""
+        deleted_count = await db.run(self._delete_old_reminders)
+
+        if deleted_count > 0:
+            logger.info(f"Удалено {deleted_count} старых напоминаний о событиях")
+
+    def _delete_old_reminders(self) -> int:
+        """Удаление напоминаний старше недели"""
         conn = get_connection()
         cursor = conn.cursor()
 
-        week_ago = datetime.now() - timedelta(days=7)
+        week_ago = self.clock.now() - timedelta(days=7)
 
         cursor.execute(
-            "DELETE FROM event_reminders WHERE reminder_time < ?",
-            (week_ago.strftime("%Y-%m-%d %H:%M"),),
+            "DELETE FROM event_reminders WHERE reminder_ts < ?", (to_epoch(week_ago),)
         )
 
         deleted_count = cursor.rowcount
         conn.commit()
         conn.close()
-
-        if deleted_count > 0:
-            logger.info(f"Удалено {deleted_count} старых напоминаний о событиях")
+        return deleted_count
 
 
 # Синглтон экземпляр
@@ -0,0 +1,256 @@
+# src/fsm_storage.py
+"""Хранилище состояний FSM aiogram в SQLite (таблица fsm_storage).
+
+MemoryStorage терял незаконченные диалоги добавления и редактирования при
+перезапуске, держал брошенные состояния в памяти вечно и не позволял
+второму процессу видеть состояние пользователя. SQLiteStorage:
+
+* читает через кэш в памяти: состояние запрашивается на каждом апдейте,
+  и после первого чтения ответ берётся из памяти. ``FSM_CACHE_TTL`` —
+  сколько секунд доверять кэшу; если апдейты одного пользователя могут
+  попасть в разные процессы (webhook за балансировщиком), ставьте 0;
+* объединяет записи: изменения копятся в памяти и через
+  ``FSM_FLUSH_INTERVAL`` секунд пишутся одной транзакцией — несколько
+  update_data/set_state подряд дают одну запись строки (0 — писать сразу,
+  до возврата из обработчика);
+* забывает брошенные диалоги: состояние, не менявшееся дольше
+  ``FSM_STATE_TTL`` секунд, читается как пустое, а такие строки раз в
+  час удаляются из таблицы.
+
+Запросы к БД выполняются в потоках БД (src/repository.py) и не
+блокируют цикл событий.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import BaseStorage, DefaultKeyBuilder, StorageKey
+
+from src.database import get_connection
+from src.repository import db
+
+logger = logging.getLogger(__name__)
+
+FSM_FLUSH_INTERVAL = float(os.getenv("FSM_FLUSH_INTERVAL", "0.5"))  # секунд
+FSM_CACHE_TTL = float(os.getenv("FSM_CACHE_TTL", "60"))  # секунд
+FSM_STATE_TTL = int(os.getenv("FSM_STATE_TTL", str(24 * 3600)))  # секунд
+FSM_CACHE_SIZE = int(os.getenv("FSM_CACHE_SIZE", "10000"))
+
+PURGE_INTERVAL = 3600  # секунд
+
+
+# ==================== ЗАПРОСЫ ====================
+
+
+def _load(key: str):
+    conn = get_connection()
+    try:
+        row = conn.execute(
+            "SELECT state, data, updated_at FROM fsm_storage WHERE key = ?", (key,)
+        ).fetchone()
+    finally:
+        conn.close()
+    if row is None:
+        return None
+    return row["state"], json.loads(row["data"]), row["updated_at"]
+
+
+def _write(rows: list, purge_before: int = None) -> int:
+    """Записать изменённые ключи одной транзакцией, вернуть число удалённых
+    просроченных строк"""
+    conn = get_connection()
+    try:
+        conn.executemany(
+            """
+            INSERT INTO fsm_storage (key, state, data, updated_at)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT(key) DO UPDATE SET
+                state = excluded.state,
+                data = excluded.data,
+                updated_at = excluded.updated_at
+            """,
+            [row for row in rows if row[1] is not None or row[2] != "{}"],
+        )
+        # Пустое состояние без данных — строка не нужна
+        conn.executemany(
+            "DELETE FROM fsm_storage WHERE key = ?",
+            [(row[0],) for row in rows if row[1] is None and row[2] == "{}"],
+        )
+        purged = 0
+        if purge_before is not None:
+            purged = conn.execute(
+                "DELETE FROM fsm_storage WHERE updated_at < ?", (purge_before,)
+            ).rowcount
+        conn.commit()
+        return purged
+    finally:
+        conn.close()
+
+
+# ==================== ХРАНИЛИЩЕ ====================
+
+
+class _Record:
+    __slots__ = ("state", "data", "updated_at", "cached_at")
+
+    def __init__(self, state, data: dict, updated_at: float, cached_at: float):
+        self.state = state
+        self.data = data
+        self.updated_at = updated_at
+        self.cached_at = cached_at
+
+
+class SQLiteStorage(BaseStorage):
+    """FSM-хранилище aiogram поверх таблицы fsm_storage"""
+
+    def __init__(
+        self,
+        flush_interval: float = FSM_FLUSH_INTERVAL,
+        cache_ttl: float = FSM_CACHE_TTL,
+        state_ttl: int = FSM_STATE_TTL,
+        cache_size: int = FSM_CACHE_SIZE,
+        clock=time.time,
+    ):
+        self.flush_interval = flush_interval
+        self.cache_ttl = cache_ttl
+        self.state_ttl = state_ttl
+        self.cache_size = cache_size
+        self._clock = clock
+        self.key_builder = DefaultKeyBuilder(
+            with_bot_id=True, with_business_connection_id=True, with_destiny=True
+        )
+        self._cache = OrderedDict()
+        self._dirty = set()
+        self._flush_task = None
+        self._flush_lock = asyncio.Lock()
+        self._last_purge = 0
+        self.stats = {
+            "hits": 0,
+            "misses": 0,
+            "writes": 0,
+            "flushes": 0,
+            "rows_written": 0,
+            "purged": 0,
+        }
+
+    # ---------- BaseStorage ----------
+
+    async def set_state(self, key: StorageKey, state=None) -> None:
+        storage_key = self.key_builder.build(key)
+        record = await self._record(storage_key)
+        record.state = state.state if isinstance(state, State) else state
+        await self._changed(storage_key, record)
+
+    async def get_state(self, key: StorageKey):
+        return (await self._record(self.key_builder.build(key))).state
+
+    async def set_data(self, key: StorageKey, data: dict) -> None:
+        storage_key = self.key_builder.build(key)
+        record = await self._record(storage_key)
+        record.data = dict(data)
+        await self._changed(storage_key, record)
+
+    async def get_data(self, key: StorageKey) -> dict:
+        return dict((await self._record(self.key_builder.build(key))).data)
+
+    async def close(self) -> None:
+        """Записать отложенные изменения (вызывается при остановке бота)"""
+        await self.flush()
+        if self._flush_task is not None and not self._flush_task.done():
+            self._flush_task.cancel()
+
+    # ---------- Кэш ----------
+
+    async def _record(self, key: str) -> _Record:
+        now = self._clock()
+        record = self._cache.get(key)
+        fresh = record is not None and (
+            key in self._dirty or now - record.cached_at < self.cache_ttl
+        )
+
+        if fresh:
+            self._cache.move_to_end(key)
+            self.stats["hits"] += 1
+        else:
+            self.stats["misses"] += 1
+            row = await db.run(_load, key)
+            if key in self._dirty:
+                # Пока шло чтение, ключ изменили — в памяти новее
+                record = self._cache[key]
+            else:
+                state, data, updated_at = row if row else (None, {}, now)
+                record = _Record(state, data, updated_at, now)
+                self._cache[key] = record
+                self._evict()
+
+        if (record.state is not None or record.data) and (
+            now - record.updated_at > self.state_ttl
+        ):
+            # Диалог брошен давно — начинаем с чистого листа
+            record.state, record.data = None, {}
+            await self._changed(key, record)
+        return record
+
+    def _evict(self):
+        # Несохранённые изменения не вытесняем — они уйдут при записи
+        for key in list(self._cache):
+            if len(self._cache) <= self.cache_size:
+                break
+            if key not in self._dirty:
+                del self._cache[key]
+
+    # ---------- Запись ----------
+
+    async def _changed(self, key: str, record: _Record):
+        record.updated_at = self._clock()
+        self._dirty.add(key)
+        self.stats["writes"] += 1
+
+        if self.flush_interval <= 0:
+            await self.flush()
+        elif self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_later())
+
+    async def _flush_later(self):
+        await asyncio.sleep(self.flush_interval)
+        await self.flush()
+
+    async def flush(self):
+        """Записать все изменённые ключи одной транзакцией"""
+        async with self._flush_lock:
+            if not self._dirty:
+                return
+
+            keys = list(self._dirty)
+            self._dirty.clear()
+            rows = []
+            for key in keys:
+                record = self._cache[key]
+                data = json.dumps(record.data, ensure_ascii=False, default=str)
+                rows.append((key, record.state, data, int(record.updated_at)))
+
+            now = self._clock()
+            purge_before = None
+            if now - self._last_purge >= PURGE_INTERVAL:
+                purge_before = int(now - self.state_ttl)
+
+            try:
+                purged = await db.run(_write, rows, purge_before)
+            except Exception as e:
+                # Повторим при следующей записи или остановке
+                self._dirty.update(keys)
+                logger.error(f"❌ Не удалось сохранить состояния FSM: {e}")
+                return
+
+            if purge_before is not None:
+                self._last_purge = now
+                self.stats["purged"] += purged
+                if purged:
+                    logger.info(f"🧹 Удалено брошенных состояний FSM: {purged}")
+            self.stats["flushes"] += 1
+            self.stats["rows_written"] += len(rows)
@@ -1,7 +1,14 @@
 # src/handlers/__init__.py
 from .events.main import router as events_router
+from .inline import router as inline_router
 from .main import router as main_router
 from .schedule.main import router as schedule_router
 from .tasks.main import router as tasks_router
 
-__all__ = ["main_router", "schedule_router", "tasks_router", "events_router"]
+__all__ = [
+    "main_router",
+    "schedule_router",
+    "tasks_router",
+    "events_router",
+    "inline_router",
+]
@@ -3,6 +3,7 @@ from aiogram import F, Router
 from aiogram.fsm.context import FSMContext
 from aiogram.types import CallbackQuery, Message
 
+from src.repository import db
 from src.states import AddEventStates
 
 router = Router()
@@ -136,8 +137,6 @@ async def process_event_recurrence(callback: CallbackQuery, state: FSMContext):
     """Обработка выбора повторяемости"""
     from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup
 
-    from src.handlers.events.base import save_event
-
     recurrence_type = callback.data.replace("select_recurrence_", "")
 
     # Преобразуем в удобочитаемый текст
@@ -159,7 +158,7 @@ async def process_event_recurrence(callback: CallbackQuery, state: FSMContext):
     user_id = callback.from_user.id
 
     # Сохраняем событие
-    success, event_id, msg = save_event(user_id, data)
+    success, event_id, msg = await db.save_event(user_id, data)
 
     if success:
         # Формируем ответ
@@ -3,7 +3,30 @@
 
 from datetime import datetime
 
+from src.cache import invalidate_user
+from src.changes import DELETED, SAVED, UPDATED, notify_change
 from src.database import get_connection
+from src.pagination import Page, fetch_page
+from src.recurrence import (
+    SERIES_COLUMNS,
+    advance_series,
+    event_occurrences,
+    fetch_exceptions,
+    is_series,
+    refresh_series,
+)
+from src.timestamps import format_datetime, to_epoch
+
+
+# Ключ постраничного вывода событий и типы его частей в callback_data.
+# Список идёт по ближайшему вхождению (src/recurrence.py); next_ts не бывает
+# NULL: event_datetime обязателен, а триггер копирует event_ts в next_ts
+EVENT_PAGE_KEY = ("next_ts", "id")
+EVENT_PAGE_KEY_TYPES = (int, int)
+
+# Колонки событий для списков
+EVENT_LIST_COLUMNS = """id, title, event_datetime, event_ts, next_ts, location,
+    description, is_recurring, recurrence_rule, recurrence_until, recurrence_count"""
 
 
 def validate_event_title(title: str) -> tuple[bool, str]:
@@ -99,6 +122,12 @@ def normalize_datetime_for_db(datetime_str: str) -> str:
         return datetime_str
 
 
+def _owner(conn, event_id: int):
+    """Владелец записи — для инвалидации кэша списков после изменения"""
+    row = conn.execute("SELECT user_id FROM events WHERE id = ?", (event_id,)).fetchone()
+    return row[0] if row else None
+
+
 def save_event(user_id: int, data: dict) -> tuple[bool, int, str]:
     """Сохранение события в базу данных"""
     conn = get_connection()
@@ -117,8 +146,11 @@ def save_event(user_id: int, data: dict) -> tuple[bool, int, str]:
 
         cursor.execute(
             """
-            INSERT INTO events (user_id, title, description, event_datetime, location, is_recurring, recurrence_rule)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
+            INSERT INTO events (
+                user_id, title, description, event_datetime, location,
+                is_recurring, recurrence_rule, recurrence_until, recurrence_count
+            )
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
             """,
             (
                 user_id,
@@ -128,10 +160,14 @@ def save_event(user_id: int, data: dict) -> tuple[bool, int, str]:
                 data.get("location", None),
                 data.get("is_recurring", False),
                 data.get("recurrence_rule", None),
+                data.get("recurrence_until", None),
+                data.get("recurrence_count", None),
             ),
         )
         conn.commit()
         event_id = cursor.lastrowid
+        invalidate_user(user_id)
+        notify_change("event", event_id, SAVED)
         return True, event_id, "Событие успешно сохранено"
 
     except Exception as e:
@@ -147,6 +183,8 @@ def update_event(event_id: int, field: str, value) -> tuple[bool, str]:
     cursor = conn.cursor()
 
     try:
+        owner = _owner(conn, event_id)
+
         # Для пустых значений ставим None
         if value is None or (isinstance(value, str) and value.lower() == "нет"):
             value = None
@@ -182,6 +220,9 @@ def update_event(event_id: int, field: str, value) -> tuple[bool, str]:
             )
 
         conn.commit()
+        if cursor.rowcount > 0:
+            invalidate_user(owner)
+            notify_change("event", event_id, UPDATED, field)
         return True, "Поле успешно обновлено"
 
     except Exception as e:
@@ -194,32 +235,100 @@ def update_event(event_id: int, field: str, value) -> tuple[bool, str]:
 def get_event(event_id: int):
     """Получение события по ID"""
     conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("SELECT * FROM events WHERE id = ?", (event_id,))
-    event = cursor.fetchone()
-    conn.close()
+    try:
+        event = conn.execute(
+            "SELECT * FROM events WHERE id = ?", (event_id,)
+        ).fetchone()
+        now = datetime.now()
+        if event and event["series_active"] and event["next_ts"] < to_epoch(now):
+            # Ближайшее вхождение прошло — показываем следующее
+            refresh_series(conn, [event], now)
+            conn.commit()
+            event = conn.execute(
+                "SELECT * FROM events WHERE id = ?", (event_id,)
+            ).fetchone()
+    finally:
+        conn.close()
 
     if event:
         return dict(event)
     return None
 
 
+def _advance_user_series(conn, user_id: int):
+    """Передвинуть прошедшие серии пользователя на ближайшее вхождение"""
+    if advance_series(conn, datetime.now(), user_id):
+        conn.commit()
+
+
 def get_user_events(user_id: int):
-    """Получение событий пользователя"""
+    """Получение событий пользователя в порядке ближайшего вхождения"""
     conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute(
-        """
-        SELECT id, title, event_datetime, location, description, is_recurring, recurrence_rule
-        FROM events
-        WHERE user_id = ?
-        ORDER BY event_datetime
-        """,
-        (user_id,),
-    )
-    events = [dict(row) for row in cursor.fetchall()]
-    conn.close()
-    return events
+    try:
+        _advance_user_series(conn, user_id)
+        rows = conn.execute(
+            f"""
+            SELECT {EVENT_LIST_COLUMNS}
+            FROM events
+            WHERE user_id = ?
+            ORDER BY next_ts, id
+            """,
+            (user_id,),
+        ).fetchall()
+    finally:
+        conn.close()
+    return [dict(row) for row in rows]
+
+
+def get_user_events_page(user_id: int, cursor=None) -> Page:
+    """Страница событий в порядке get_user_events"""
+    conn = get_connection()
+    try:
+        _advance_user_series(conn, user_id)
+        return fetch_page(
+            conn,
+            f"""
+            SELECT {EVENT_LIST_COLUMNS}
+            FROM events
+            WHERE user_id = ?
+            """,
+            (user_id,),
+            EVENT_PAGE_KEY,
+            cursor,
+        )
+    finally:
+        conn.close()
+
+
+def skip_event_occurrence(event_id: int) -> tuple[bool, str]:
+    """Пропустить ближайшее вхождение повторяющегося события"""
+    now = datetime.now()
+    conn = get_connection()
+    try:
+        event = conn.execute(
+            f"SELECT {SERIES_COLUMNS}, next_ts, user_id FROM events WHERE id = ?",
+            (event_id,),
+        ).fetchone()
+        exceptions = fetch_exceptions(conn, [event_id]).get(event_id, ())
+        upcoming = None
+        if event is not None and is_series(event):
+            upcoming = next(event_occurrences(event, now, exceptions), None)
+        if upcoming is None:
+            return False, "У события нет предстоящих повторений"
+
+        conn.execute(
+            "INSERT OR IGNORE INTO event_exceptions (event_id, occurrence_ts) "
+            "VALUES (?, ?)",
+            (event_id, to_epoch(upcoming)),
+        )
+        refresh_series(conn, [event], now)
+        conn.commit()
+    finally:
+        conn.close()
+
+    invalidate_user(event["user_id"])
+    notify_change("event", event_id, UPDATED, "exceptions")
+    return True, f"Повторение {upcoming:%d.%m.%Y %H:%M} пропущено"
 
 
 def delete_event(event_id: int) -> bool:
@@ -228,20 +337,35 @@ def delete_event(event_id: int) -> bool:
     cursor = conn.cursor()
 
     try:
+        owner = _owner(conn, event_id)
         cursor.execute("DELETE FROM events WHERE id = ?", (event_id,))
         conn.commit()
-        return cursor.rowcount > 0
+        deleted = cursor.rowcount > 0
+        if deleted:
+            invalidate_user(owner)
+            notify_change("event", event_id, DELETED)
+        return deleted
     finally:
         conn.close()
 
 
+def format_event_time(event: dict) -> str:
+    """Ближайшее вхождение события в виде ДД.ММ.ГГГГ ЧЧ:ММ (без strptime)"""
+    for column in ("next_ts", "event_ts"):
+        if event.get(column) is not None:
+            return format_datetime(event[column])
+    return event.get("event_datetime") or ""
+
+
 def format_event_details(event: dict) -> str:
     """Форматирование деталей события для отображения"""
     response = "🎯 <b>Детали события:</b>\n\n"
     response += f"📝 <b>Название:</b> {event['title']}\n"
 
     # Форматируем дату и время
-    if event.get("event_datetime"):
+    if event.get("event_ts") is not None:
+        response += f"📅 <b>Дата и время:</b> {format_event_time(event)}\n"
+    elif event.get("event_datetime"):
         try:
             event_dt = datetime.strptime(event["event_datetime"], "%Y-%m-%d %H:%M")
             response += (
@@ -264,6 +388,12 @@ def format_event_details(event: dict) -> str:
             "monthly": "Ежемесячно",
             "yearly": "Ежегодно",
         }.get(event["recurrence_rule"], event["recurrence_rule"])
+        if event.get("recurrence_until") is not None:
+            recurrence_text += f" до {format_datetime(event['recurrence_until'])}"
+        if event.get("recurrence_count"):
+            recurrence_text += f", {event['recurrence_count']} раз"
         response += f"🔄 <b>Повторяемость:</b> {recurrence_text}\n"
+        if event.get("next_ts") not in (None, event.get("event_ts")):
+            response += f"⏭ <b>Ближайшее:</b> {format_datetime(event['next_ts'])}\n"
 
     return response
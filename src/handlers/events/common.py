@@ -5,8 +5,10 @@ from aiogram import F, Router
 from aiogram.types import CallbackQuery
 
 from src.keyboards import get_event_detail_keyboard
+from src.navigation import render
+from src.repository import db
 
-from .base import format_event_details, get_event
+from .base import format_event_details
 
 router = Router()
 
@@ -18,17 +20,14 @@ async def back_to_event_handler(callback: CallbackQuery):
         event_id = int(callback.data.split("_")[3])
         await callback.answer()
 
-        event = get_event(event_id)
+        event = await db.get_event(event_id)
         if not event:
             await callback.message.answer("❌ Событие не найдено!")
             return
 
         response = format_event_details(event)
-        await callback.message.answer(
-            response,
-            reply_markup=get_event_detail_keyboard(event_id),
-            parse_mode="HTML",
-        )
+        keyboard = get_event_detail_keyboard(event_id, event["series_active"])
+        await render(callback, response, keyboard)
     except Exception as e:
         await callback.answer("❌ Ошибка при возврате к событию")
 
@@ -12,13 +12,13 @@ from src.keyboards import (
     get_event_detail_keyboard,
     get_recurrence_keyboard,
 )
+from src.navigation import render
+from src.repository import db
 from src.states import EditEventStates
 
 from .base import (
-    delete_event,
     format_event_details,
-    get_event,
-    update_event,
+    format_event_time,
     validate_datetime,
     validate_description,
     validate_event_title,
@@ -42,7 +42,7 @@ async def handle_edit_event(callback: CallbackQuery):
 
         await callback.answer()
 
-        event = get_event(event_id)
+        event = await db.get_event(event_id)
         if not event:
             await callback.message.answer("❌ Событие не найдено!")
             return
@@ -50,9 +50,7 @@ async def handle_edit_event(callback: CallbackQuery):
         response = format_event_details(event)
         response += "\n<b>Выберите что изменить:</b>"
 
-        await callback.message.answer(
-            response, reply_markup=get_edit_event_keyboard(event_id), parse_mode="HTML"
-        )
+        await render(callback, response, get_edit_event_keyboard(event_id))
     except Exception as e:
         logger.error(f"Ошибка в handle_edit_event: {e}")
         await callback.answer("❌ Ошибка при редактировании")
@@ -71,30 +69,21 @@ async def handle_delete_event(callback: CallbackQuery):
 
         await callback.answer()
 
-        event = get_event(event_id)
+        event = await db.get_event(event_id)
         if not event:
             await callback.message.answer("❌ Событие не найдено!")
             return
 
         # Форматируем дату для отображения
-        event_datetime = event["event_datetime"]
-        try:
-            from datetime import datetime
-
-            dt = datetime.strptime(event_datetime, "%Y-%m-%d %H:%M")
-            formatted_date = dt.strftime("%d.%m.%Y %H:%M")
-        except:
-            formatted_date = event_datetime
+        formatted_date = format_event_time(event)
 
         response = f"🗑️ <b>Удаление события:</b>\n\n"
         response += f"📝 <b>Название:</b> {event['title']}\n"
         response += f"📅 <b>Дата и время:</b> {formatted_date}\n\n"
         response += "<b>Вы действительно хотите удалить это событие?</b>"
 
-        await callback.message.answer(
-            response,
-            reply_markup=get_delete_event_confirmation_keyboard(event_id),
-            parse_mode="HTML",
+        await render(
+            callback, response, get_delete_event_confirmation_keyboard(event_id)
         )
     except Exception as e:
         logger.error(f"Ошибка в handle_delete_event: {e}")
@@ -111,7 +100,7 @@ async def handle_confirm_delete_event(callback: CallbackQuery):
 
         await callback.answer()
 
-        success = delete_event(event_id)
+        success = await db.delete_event(event_id)
         if success:
             await callback.message.answer("✅ Событие удалено!")
             # Вернуться к списку событий
@@ -153,7 +142,7 @@ async def handle_edit_event_field(callback: CallbackQuery, state: FSMContext):
         await callback.answer()
         await state.update_data(event_id=event_id, field_name=field_name)
 
-        event = get_event(event_id)
+        event = await db.get_event(event_id)
         if not event:
             await callback.message.answer("❌ Событие не найдено!")
             return
@@ -239,7 +228,7 @@ async def handle_select_recurrence(callback: CallbackQuery):
 
         if event_id:
             # Для редактирования существующего события
-            success, msg = update_event(event_id, "recurrence_rule", recurrence_type)
+            success, msg = await db.update_event(event_id, "recurrence_rule", recurrence_type)
             if success:
                 await callback.message.answer(
                     f"✅ <b>Повторяемость изменена на {recurrence_text}!</b>",
@@ -247,12 +236,14 @@ async def handle_select_recurrence(callback: CallbackQuery):
                 )
 
                 # Показываем обновленное событие
-                event = get_event(event_id)
+                event = await db.get_event(event_id)
                 if event:
                     response = format_event_details(event)
                     await callback.message.answer(
                         response,
-                        reply_markup=get_event_detail_keyboard(event_id),
+                        reply_markup=get_event_detail_keyboard(
+                            event_id, event["series_active"]
+                        ),
                         parse_mode="HTML",
                     )
             else:
@@ -308,7 +299,7 @@ async def handle_event_field_value_input(message: Message, state: FSMContext):
         if field_name == "datetime":
             db_field_name = "event_datetime"
 
-        success, msg = update_event(event_id, db_field_name, value_to_save)
+        success, msg = await db.update_event(event_id, db_field_name, value_to_save)
 
         if success:
             field_display_names = {
@@ -324,12 +315,14 @@ async def handle_event_field_value_input(message: Message, state: FSMContext):
             )
 
             # Показываем обновленное событие
-            event = get_event(event_id)
+            event = await db.get_event(event_id)
             if event:
                 response = format_event_details(event)
                 await message.answer(
                     response,
-                    reply_markup=get_event_detail_keyboard(event_id),
+                    reply_markup=get_event_detail_keyboard(
+                        event_id, event["series_active"]
+                    ),
                     parse_mode="HTML",
                 )
         else:
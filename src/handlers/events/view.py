@@ -9,55 +9,37 @@ from src.keyboards import (
     get_events_list_keyboard,
     get_events_selection_keyboard,
 )
+from src.navigation import render
+from src.pagination import decode_cursor
+from src.repository import db
 
-from .base import format_event_details, get_event, get_user_events
+from .base import EVENT_PAGE_KEY_TYPES, format_event_details, format_event_time
 
 router = Router()
 
 
-# Словарь для кэширования событий
-user_events_cache = {}
-
-
-async def show_events_list(message: Message, user_id: int):
-    """Показать список событий"""
-    events = get_user_events(user_id)
-    user_events_cache[user_id] = events
+async def show_events_list(target: Message | CallbackQuery, user_id: int):
+    """Показать список событий (по кнопке раздела — на месте сообщения)"""
+    page = await db.get_user_events_page(user_id)
+    events = page.items
 
     if not events:
         response = "🎯 <b>У вас пока нет событий!</b>\n\n"
         response += "Добавьте первое событие с помощью кнопки ниже:"
 
-        await message.answer(
-            response,
-            reply_markup=get_events_list_keyboard(),
-            parse_mode="HTML",
-        )
+        await render(target, response, get_events_list_keyboard())
         return
 
     response = "🎯 <b>Ваши события:</b>\n\n"
     response += "<i>Выберите событие для просмотра деталей:</i>\n\n"
 
-    for i, event in enumerate(events[:5], 1):
+    for i, event in enumerate(events, 1):
         title = event["title"]
-        event_datetime = event["event_datetime"]
-
-        # Форматируем дату
-        try:
-            from datetime import datetime
-
-            dt = datetime.strptime(event_datetime, "%Y-%m-%d %H:%M")
-            formatted_date = dt.strftime("%d.%m.%Y %H:%M")
-        except:
-            formatted_date = event_datetime
+        formatted_date = format_event_time(event)
 
         response += f"<b>{i}.</b> {formatted_date} - {title}\n"
 
-    await message.answer(
-        response,
-        reply_markup=get_events_selection_keyboard(events),
-        parse_mode="HTML",
-    )
+    await render(target, response, get_events_selection_keyboard(page))
 
 
 @router.callback_query(F.data.startswith("view_event_"))
@@ -66,25 +48,46 @@ async def view_event_handler(callback: CallbackQuery):
     event_id = int(callback.data.split("_")[2])
     await callback.answer()
 
-    event = get_event(event_id)
+    event = await db.get_event(event_id)
+    if not event:
+        await callback.message.answer("❌ Событие не найдено!")
+        return
+
+    response = format_event_details(event)
+    keyboard = get_event_detail_keyboard(event_id, event["series_active"])
+    await render(callback, response, keyboard)
+
+
+@router.callback_query(F.data.startswith("skip_occurrence_"))
+async def skip_occurrence_handler(callback: CallbackQuery):
+    """Пропустить ближайшее вхождение повторяющегося события"""
+    event_id = int(callback.data.split("_")[2])
+
+    success, msg = await db.skip_event_occurrence(event_id)
+    await callback.answer(f"⏭ {msg}" if success else f"❌ {msg}")
+
+    event = await db.get_event(event_id)
     if not event:
         await callback.message.answer("❌ Событие не найдено!")
         return
 
     response = format_event_details(event)
-    await callback.message.answer(
-        response, reply_markup=get_event_detail_keyboard(event_id), parse_mode="HTML"
-    )
+    keyboard = get_event_detail_keyboard(event_id, event["series_active"])
+    await render(callback, response, keyboard)
 
 
 @router.callback_query(F.data.startswith("events_page_"))
 async def events_page_handler(callback: CallbackQuery):
     """Обработка переключения страниц событий"""
-    start_index = int(callback.data.split("_")[2])
+    cursor = decode_cursor(callback.data, "events_page_", EVENT_PAGE_KEY_TYPES)
     user_id = callback.from_user.id
     await callback.answer()
 
-    events = user_events_cache.get(user_id, [])
+    page = await db.get_user_events_page(user_id, cursor)
+    if not page.items and cursor:
+        # События страницы удалены — начинаем сначала
+        page = await db.get_user_events_page(user_id)
+    events = page.items
     if not events:
         await callback.message.answer("❌ Список событий пуст!")
         return
@@ -92,30 +95,13 @@ async def events_page_handler(callback: CallbackQuery):
     response = "🎯 <b>Ваши события:</b>\n\n"
     response += "<i>Выберите событие для просмотра деталей:</i>\n\n"
 
-    for i in range(start_index, len(events)):
-        if i >= start_index + 5:
-            break
-
-        event = events[i]
+    for i, event in enumerate(events, page.position + 1):
         title = event["title"]
-        event_datetime = event["event_datetime"]
-
-        # Форматируем дату
-        try:
-            from datetime import datetime
+        formatted_date = format_event_time(event)
 
-            dt = datetime.strptime(event_datetime, "%Y-%m-%d %H:%M")
-            formatted_date = dt.strftime("%d.%m.%Y %H:%M")
-        except:
-            formatted_date = event_datetime
-
-        response += f"<b>{i + 1}.</b> {formatted_date} - {title}\n"
+        response += f"<b>{i}.</b> {formatted_date} - {title}\n"
 
-    await callback.message.answer(
-        response,
-        reply_markup=get_events_selection_keyboard(events, start_index),
-        parse_mode="HTML",
-    )
+    await render(callback, response, get_events_selection_keyboard(page))
 
 
 @router.callback_query(F.data == "back_to_events")
@@ -123,4 +109,4 @@ async def back_to_events_handler(callback: CallbackQuery):
     """Вернуться к списку событий"""
     await callback.answer()
     user_id = callback.from_user.id
-    await show_events_list(callback.message, user_id)
+    await show_events_list(callback, user_id)
@@ -0,0 +1,124 @@
+# src/handlers/inline.py
+"""Inline-режим: «@бот сдать» в любом чате находит задачи и события.
+
+Telegram присылает inline-запрос на каждое нажатие клавиши, поэтому:
+
+* ответ на запрос (пользователь, текст) кэшируется в общем кэше
+  (src/cache.py) с коротким TTL и сбрасывается при любой записи
+  пользователя; Telegram дополнительно кэширует ответ у себя
+  (``cache_time``, ``is_personal`` — результаты у каждого свои);
+* запрос, которого нет в кэше, ждёт ``INLINE_DEBOUNCE`` секунд — если за
+  это время пришёл следующий запрос того же пользователя (он продолжил
+  набирать), предыдущий не идёт в БД и остаётся без ответа: клиент
+  Telegram всё равно показывает результаты только последнего запроса.
+
+Inline-режим включается у @BotFather командой /setinline.
+"""
+
+import asyncio
+import logging
+import os
+
+from aiogram import Router
+from aiogram.types import (
+    InlineQuery,
+    InlineQueryResultArticle,
+    InputTextMessageContent,
+)
+
+from src.cache import get_list_cache
+from src.handlers.events.base import format_event_details, format_event_time
+from src.handlers.tasks.base import format_deadline, format_task_details
+from src.keyboards import SEARCH_KIND_EMOJI
+from src.repository import db
+
+router = Router()
+logger = logging.getLogger(__name__)
+
+INLINE_DEBOUNCE = float(os.getenv("INLINE_DEBOUNCE", "0.3"))  # секунд
+INLINE_CACHE_TTL = float(os.getenv("INLINE_CACHE_TTL", "30"))  # секунд
+INLINE_CACHE_TIME = 10  # секунд, кэш на стороне Telegram
+
+# Последний inline-запрос каждого пользователя, ожидающий debounce
+_latest = {}
+
+stats = {"queries": 0, "cache_hits": 0, "superseded": 0, "loaded": 0}
+
+
+def normalize_query(query: str) -> str:
+    return " ".join(query.lower().split())
+
+
+def build_results(items: list) -> list:
+    """Найденные задачи и события -> статьи inline-ответа"""
+    results = []
+    for item in items:
+        if item["kind"] == "task":
+            text = format_task_details(item)
+            description = (
+                f"До: {format_deadline(item)}" if item.get("deadline") else "Задача"
+            )
+        else:
+            text = format_event_details(item)
+            description = format_event_time(item)
+
+        results.append(
+            InlineQueryResultArticle(
+                id=f"{item['kind']}_{item['id']}",
+                title=f"{SEARCH_KIND_EMOJI[item['kind']]} {item['title']}",
+                description=description,
+                input_message_content=InputTextMessageContent(
+                    message_text=text, parse_mode="HTML"
+                ),
+            )
+        )
+    return results
+
+
+async def _load(user_id: int, query: str) -> list:
+    stats["loaded"] += 1
+    return build_results(await db.find_items(user_id, query))
+
+
+@router.inline_query()
+async def handle_inline_query(inline_query: InlineQuery):
+    """Поиск задач и событий пользователя из любого чата"""
+    user_id = inline_query.from_user.id
+    query = normalize_query(inline_query.query)
+    stats["queries"] += 1
+
+    if not query:
+        await inline_query.answer([], cache_time=INLINE_CACHE_TIME, is_personal=True)
+        return
+
+    list_cache = get_list_cache()
+    results = list_cache.get("inline", user_id, query)
+    if results is not None:
+        stats["cache_hits"] += 1
+    else:
+        _latest[user_id] = inline_query.id
+        try:
+            await asyncio.sleep(INLINE_DEBOUNCE)
+            if _latest.get(user_id) != inline_query.id:
+                # Пользователь продолжил набирать — отвечаем на новый запрос
+                stats["superseded"] += 1
+                return
+        finally:
+            if _latest.get(user_id) == inline_query.id:
+                del _latest[user_id]
+
+        try:
+            results = await list_cache.get_or_load(
+                "inline",
+                user_id,
+                _load,
+                user_id,
+                query,
+                key=query,
+                ttl=INLINE_CACHE_TTL,
+            )
+        except Exception as e:
+            logger.error(f"Ошибка inline-поиска для пользователя {user_id}: {e}")
+            results = []
+
+    await inline_query.answer(results, cache_time=INLINE_CACHE_TIME, is_personal=True)
@@ -1,12 +1,20 @@
 # src/handlers/main.py
+import html
+from datetime import datetime
+
 from aiogram import F, Router
-from aiogram.filters import Command
+from aiogram.filters import Command, CommandObject
 from aiogram.fsm.context import FSMContext
 from aiogram.types import CallbackQuery, Message
 
 # Импортируем функции для показа разделов
-from src.database import get_connection
-from src.keyboards import get_main_keyboard
+from src.keyboards import (
+    SEARCH_KIND_EMOJI,
+    get_main_keyboard,
+    get_search_results_keyboard,
+)
+from src.navigation import notify, render
+from src.repository import db
 
 from .events.main import router as events_router
 from .events.view import show_events_list
@@ -34,24 +42,14 @@ def register_routers(dp):
 async def cmd_start(message: Message):
     """Начало работы - главное меню"""
     user_id = message.from_user.id
-    conn = get_connection()
-    cursor = conn.cursor()
 
     # Регистрируем пользователя
-    cursor.execute(
-        """
-        INSERT OR IGNORE INTO users (telegram_id, username, first_name, last_name)
-        VALUES (?, ?, ?, ?)
-        """,
-        (
-            user_id,
-            message.from_user.username,
-            message.from_user.first_name,
-            message.from_user.last_name,
-        ),
+    await db.register_user(
+        user_id,
+        message.from_user.username,
+        message.from_user.first_name,
+        message.from_user.last_name,
     )
-    conn.commit()
-    conn.close()
 
     # Сбрасываем раздел
     user_current_section[user_id] = "main"
@@ -128,30 +126,116 @@ async def cmd_stats(message: Message):
     user_id = message.from_user.id
     user_current_section[user_id] = "main"
 
-    conn = get_connection()
-    cursor = conn.cursor()
-
-    cursor.execute(
-        "SELECT COUNT(*) FROM tasks WHERE user_id = ? AND is_completed = FALSE",
-        (user_id,),
-    )
-    active_tasks = cursor.fetchone()[0]
-    cursor.execute("SELECT COUNT(*) FROM events WHERE user_id = ?", (user_id,))
-    events_count = cursor.fetchone()[0]
-    cursor.execute("SELECT COUNT(*) FROM schedule WHERE user_id = ?", (user_id,))
-    schedule_count = cursor.fetchone()[0]
-    conn.close()
+    counters = await db.get_user_counters(user_id)
 
     await message.answer(
         f"📊 <b>Ваша статистика:</b>\n\n"
-        f"• Активных задач: {active_tasks}\n"
-        f"• Событий: {events_count}\n"
-        f"• Уроков в расписании: {schedule_count}",
+        f"• Активных задач: {counters['active_tasks']}\n"
+        f"• Просроченных: {counters['overdue_tasks']}\n"
+        f"• Дедлайнов в ближайшие 7 дней: {counters['upcoming_deadlines']}\n"
+        f"• Завершено задач: {counters['completed_tasks']} "
+        f"(за эту неделю: {counters['completed_this_week']})\n"
+        f"• Событий: {counters['events']}\n"
+        f"• Уроков в расписании: {counters['lessons']}",
         reply_markup=get_main_keyboard(),
         parse_mode="HTML",
     )
 
 
+# ==================== ПОИСК ====================
+
+
+@router.message(Command("find"))
+async def cmd_find(message: Message, command: CommandObject, state: FSMContext):
+    """Поиск по задачам, событиям и урокам"""
+    user_id = message.from_user.id
+    query = (command.args or "").strip()
+
+    if not query:
+        await message.answer(
+            "🔎 Напишите, что найти, после команды.\n"
+            "Например: <code>/find физика</code>",
+            parse_mode="HTML",
+        )
+        return
+
+    # Запрос нужен для листания: в callback_data он может не поместиться
+    await state.update_data(find_query=query)
+    await show_search_results(message, user_id, query)
+
+
+async def show_search_results(target, user_id: int, query: str, offset: int = 0):
+    """Показать страницу результатов поиска"""
+    page = await db.search(user_id, query, offset)
+
+    if not page.items:
+        await render(target, f"🔎 По запросу «{html.escape(query)}» ничего не найдено")
+        return
+
+    response = f"🔎 <b>Найдено по запросу «{html.escape(query)}»:</b>\n\n"
+    for i, item in enumerate(page.items, page.position + 1):
+        emoji = SEARCH_KIND_EMOJI[item["kind"]]
+        response += f"<b>{i}.</b> {emoji} {html.escape(item['title'])}\n"
+        if item["snippet"]:
+            response += f"<i>{html.escape(item['snippet'])}</i>\n"
+
+    await render(target, response, get_search_results_keyboard(page))
+
+
+@router.callback_query(F.data.startswith("find_page_"))
+async def handle_find_page(callback: CallbackQuery, state: FSMContext):
+    """Листание результатов поиска"""
+    await callback.answer()
+
+    query = (await state.get_data()).get("find_query")
+    offset = callback.data.removeprefix("find_page_")
+    if not query or not offset.isdigit():
+        await notify(callback, "🔎 Результаты устарели, повторите поиск: /find текст")
+        return
+
+    await show_search_results(callback, callback.from_user.id, query, int(offset))
+
+
+# ==================== НАСТРОЙКИ НАПОМИНАНИЙ ====================
+
+
+@router.message(Command("remind_time"))
+async def cmd_remind_time(message: Message, command: CommandObject):
+    """Личное время утренних напоминаний о задачах"""
+    from src.task_reminders import get_task_reminder_service
+
+    user_id = message.from_user.id
+    value = (command.args or "").strip().lower()
+
+    if value in ("off", "сброс"):
+        reminder_time = None
+    else:
+        try:
+            reminder_time = datetime.strptime(value, "%H:%M").strftime("%H:%M")
+        except ValueError:
+            await message.answer(
+                "⏰ Укажите время утренних напоминаний о задачах.\n"
+                "Например: <code>/remind_time 08:30</code>\n"
+                "Вернуть время по умолчанию: <code>/remind_time off</code>",
+                parse_mode="HTML",
+            )
+            return
+
+    if not await db.set_reminder_time(user_id, reminder_time):
+        await message.answer("❌ Сначала запустите бота командой /start")
+        return
+
+    # Пересчитываем напоминания сразу, не дожидаясь ежечасной сверки
+    task_service = get_task_reminder_service()
+    if task_service:
+        await task_service.check_upcoming_deadlines()
+
+    if reminder_time:
+        await message.answer(f"✅ Напоминания о задачах будут приходить в {reminder_time}")
+    else:
+        await message.answer("✅ Время напоминаний о задачах сброшено")
+
+
 # ==================== ПОМОЩЬ ====================
 
 
@@ -179,7 +263,10 @@ async def show_main_help(message: Message):
         "<b>Основные команды:</b>\n"
         "/start - начать работы с ботом\n"
         "/menu - вернуться в главное меню\n"
-        "/stats - статистика\n\n"
+        "/stats - статистика\n"
+        "/find текст - поиск по задачам, событиям и урокам\n"
+        "/remind_time ЧЧ:ММ - время утренних напоминаний о задачах\n"
+        "@бот текст в любом чате - поделиться задачей или событием\n\n"
         "<b>Основные разделы:</b>\n"
         "• <b>Расписание</b> - управление расписанием занятий\n"
         "• <b>Задачи</b> - управление задачами и дедлайнами\n"
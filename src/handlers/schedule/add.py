@@ -3,6 +3,7 @@ from aiogram import F, Router
 from aiogram.fsm.context import FSMContext
 from aiogram.types import CallbackQuery, Message
 
+from src.repository import db
 from src.states import AddLessonStates
 
 router = Router()
@@ -150,7 +151,7 @@ async def process_teacher(message: Message, state: FSMContext):
     """Обработка преподавателя и завершение добавления"""
     from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup
 
-    from src.handlers.schedule.base import save_lesson, validate_teacher
+    from src.handlers.schedule.base import validate_teacher
 
     teacher = message.text.strip()
     is_valid, error = validate_teacher(teacher)
@@ -168,7 +169,7 @@ async def process_teacher(message: Message, state: FSMContext):
     user_id = message.from_user.id
 
     # Сохраняем урок
-    success, lesson_id, msg = save_lesson(user_id, data)
+    success, lesson_id, msg = await db.save_lesson(user_id, data)
 
     if success:
         # Формируем ответ
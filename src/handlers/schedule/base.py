@@ -4,7 +4,15 @@
 import re
 from typing import Optional, Tuple
 
+from src.cache import invalidate_user
+from src.changes import DELETED, SAVED, UPDATED, notify_change
 from src.database import get_connection
+from src.pagination import Page, fetch_page
+
+
+# Ключ постраничного вывода уроков и типы его частей в callback_data
+LESSON_PAGE_KEY = ("day_rank", "start_time", "id")
+LESSON_PAGE_KEY_TYPES = (int, str, int)
 
 
 def validate_subject(subject: str) -> tuple[bool, str]:
@@ -132,6 +140,12 @@ def validate_teacher(teacher: str) -> tuple[bool, str]:
     return True, ""
 
 
+def _owner(conn, lesson_id: int):
+    """Владелец записи — для инвалидации кэша списков после изменения"""
+    row = conn.execute("SELECT user_id FROM schedule WHERE id = ?", (lesson_id,)).fetchone()
+    return row[0] if row else None
+
+
 def save_lesson(user_id: int, data: dict) -> tuple[bool, int, str]:
     """Сохранение урока в базу данных"""
     conn = get_connection()
@@ -156,6 +170,8 @@ def save_lesson(user_id: int, data: dict) -> tuple[bool, int, str]:
         )
         conn.commit()
         lesson_id = cursor.lastrowid
+        invalidate_user(user_id)
+        notify_change("lesson", lesson_id, SAVED)
         return True, lesson_id, "Урок успешно сохранен"
 
     except Exception as e:
@@ -171,6 +187,8 @@ def update_lesson(lesson_id: int, field: str, value) -> tuple[bool, str]:
     cursor = conn.cursor()
 
     try:
+        owner = _owner(conn, lesson_id)
+
         if field == "time":
             start_time, end_time = value
             cursor.execute(
@@ -205,6 +223,9 @@ def update_lesson(lesson_id: int, field: str, value) -> tuple[bool, str]:
                 )
 
         conn.commit()
+        if cursor.rowcount > 0:
+            invalidate_user(owner)
+            notify_change("lesson", lesson_id, UPDATED, field)
         return True, "Поле успешно обновлено"
 
     except Exception as e:
@@ -236,17 +257,7 @@ def get_user_lessons(user_id: int):
         SELECT id, subject, day_of_week, start_time, end_time, build, room, teacher
         FROM schedule
         WHERE user_id = ?
-        ORDER BY
-            CASE day_of_week
-                WHEN 'Понедельник' THEN 1
-                WHEN 'Вторник' THEN 2
-                WHEN 'Среда' THEN 3
-                WHEN 'Четверг' THEN 4
-                WHEN 'Пятница' THEN 5
-                WHEN 'Суббота' THEN 6
-                ELSE 7
-            END,
-            start_time
+        ORDER BY day_rank, start_time, id
         """,
         (user_id,),
     )
@@ -255,15 +266,40 @@ def get_user_lessons(user_id: int):
     return lessons
 
 
+def get_user_lessons_page(user_id: int, cursor=None) -> Page:
+    """Страница уроков в порядке get_user_lessons"""
+    conn = get_connection()
+    try:
+        return fetch_page(
+            conn,
+            """
+            SELECT id, subject, day_of_week, start_time, end_time, build, room,
+                teacher, day_rank
+            FROM schedule
+            WHERE user_id = ?
+            """,
+            (user_id,),
+            LESSON_PAGE_KEY,
+            cursor,
+        )
+    finally:
+        conn.close()
+
+
 def delete_lesson(lesson_id: int) -> bool:
     """Удаление урока"""
     conn = get_connection()
     cursor = conn.cursor()
 
     try:
+        owner = _owner(conn, lesson_id)
         cursor.execute("DELETE FROM schedule WHERE id = ?", (lesson_id,))
         conn.commit()
-        return cursor.rowcount > 0
+        deleted = cursor.rowcount > 0
+        if deleted:
+            invalidate_user(owner)
+            notify_change("lesson", lesson_id, DELETED)
+        return deleted
     finally:
         conn.close()
 
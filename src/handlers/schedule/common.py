@@ -4,8 +4,10 @@
 from aiogram import F, Router
 from aiogram.types import CallbackQuery
 
-from src.handlers.schedule.base import format_lesson_details, get_lesson
+from src.handlers.schedule.base import format_lesson_details
 from src.keyboards import get_lesson_detail_keyboard
+from src.navigation import render
+from src.repository import db
 
 router = Router()
 
@@ -16,15 +18,13 @@ async def back_to_lesson_handler(callback: CallbackQuery):
     lesson_id = int(callback.data.split("_")[3])
     await callback.answer()
 
-    lesson = get_lesson(lesson_id)
+    lesson = await db.get_lesson(lesson_id)
     if not lesson:
         await callback.message.answer("❌ Урок не найден!")
         return
 
     response = format_lesson_details(lesson)
-    await callback.message.answer(
-        response, reply_markup=get_lesson_detail_keyboard(lesson_id), parse_mode="HTML"
-    )
+    await render(callback, response, get_lesson_detail_keyboard(lesson_id))
 
 
 @router.callback_query(F.data == "schedule_help_btn")
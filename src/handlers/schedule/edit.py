@@ -8,10 +8,7 @@ from aiogram.fsm.context import FSMContext
 from aiogram.types import CallbackQuery, Message
 
 from src.handlers.schedule.base import (
-    delete_lesson,
     format_lesson_details,
-    get_lesson,
-    update_lesson,
     validate_build,
     validate_room,
     validate_subject,
@@ -24,6 +21,8 @@ from src.keyboards import (
     get_edit_lesson_keyboard,
     get_lesson_detail_keyboard,
 )
+from src.navigation import render
+from src.repository import db
 from src.states import EditLessonStates
 
 router = Router()
@@ -42,7 +41,7 @@ async def handle_edit_lesson(callback: CallbackQuery):
 
         await callback.answer()
 
-        lesson = get_lesson(lesson_id)
+        lesson = await db.get_lesson(lesson_id)
         if not lesson:
             await callback.message.answer("❌ Урок не найден!")
             return
@@ -50,11 +49,7 @@ async def handle_edit_lesson(callback: CallbackQuery):
         response = format_lesson_details(lesson)
         response += "\n<b>Выберите что изменить:</b>"
 
-        await callback.message.answer(
-            response,
-            reply_markup=get_edit_lesson_keyboard(lesson_id),
-            parse_mode="HTML",
-        )
+        await render(callback, response, get_edit_lesson_keyboard(lesson_id))
     except Exception as e:
         logger.error(f"Ошибка в handle_edit_lesson: {e}")
         await callback.answer("❌ Ошибка при редактировании")
@@ -72,7 +67,7 @@ async def handle_delete_lesson(callback: CallbackQuery):
 
         await callback.answer()
 
-        lesson = get_lesson(lesson_id)
+        lesson = await db.get_lesson(lesson_id)
         if not lesson:
             await callback.message.answer("❌ Урок не найден!")
             return
@@ -83,11 +78,7 @@ async def handle_delete_lesson(callback: CallbackQuery):
         response += f"🕒 <b>Время:</b> {lesson['start_time']}-{lesson['end_time']}\n\n"
         response += "<b>Вы действительно хотите удалить этот урок?</b>"
 
-        await callback.message.answer(
-            response,
-            reply_markup=get_delete_confirmation_keyboard(lesson_id),
-            parse_mode="HTML",
-        )
+        await render(callback, response, get_delete_confirmation_keyboard(lesson_id))
     except Exception as e:
         logger.error(f"Ошибка в handle_delete_lesson: {e}")
         await callback.answer("❌ Ошибка при удалении")
@@ -102,7 +93,7 @@ async def handle_confirm_delete_lesson(callback: CallbackQuery):
 
         await callback.answer()
 
-        success = delete_lesson(lesson_id)
+        success = await db.delete_lesson(lesson_id)
         if success:
             await callback.message.answer("✅ Урок удалён!")
             # Вернуться к списку расписания
@@ -133,7 +124,7 @@ async def handle_edit_field(callback: CallbackQuery, state: FSMContext):
         await callback.answer()
         await state.update_data(lesson_id=lesson_id, field_name=field_name)
 
-        lesson = get_lesson(lesson_id)
+        lesson = await db.get_lesson(lesson_id)
         if not lesson:
             await callback.message.answer("❌ Урок не найден!")
             return
@@ -184,7 +175,7 @@ async def handle_select_day(callback: CallbackQuery):
 
         await callback.answer(f"Выбран день: {new_day}")
 
-        success, msg = update_lesson(lesson_id, "day", new_day)
+        success, msg = await db.update_lesson(lesson_id, "day", new_day)
         if success:
             await callback.message.answer(
                 f"✅ <b>День недели изменён на {new_day}!</b>",
@@ -192,7 +183,7 @@ async def handle_select_day(callback: CallbackQuery):
             )
 
             # Показываем обновленный урок
-            lesson = get_lesson(lesson_id)
+            lesson = await db.get_lesson(lesson_id)
             if lesson:
                 response = format_lesson_details(lesson)
                 await callback.message.answer(
@@ -249,7 +240,7 @@ async def handle_field_value_input(message: Message, state: FSMContext):
             return
 
         # Обновляем урок
-        success, msg = update_lesson(lesson_id, field_name, value_to_save)
+        success, msg = await db.update_lesson(lesson_id, field_name, value_to_save)
 
         if success:
             field_display_names = {
@@ -266,7 +257,7 @@ async def handle_field_value_input(message: Message, state: FSMContext):
             )
 
             # Показываем обновленный урок
-            lesson = get_lesson(lesson_id)
+            lesson = await db.get_lesson(lesson_id)
             if lesson:
                 response = format_lesson_details(lesson)
                 await message.answer(
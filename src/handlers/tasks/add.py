@@ -13,12 +13,12 @@ from aiogram.types import (
 )
 
 from src.handlers.tasks.base import (
-    save_task,
     validate_deadline,
     validate_description,
     validate_title,
 )
 from src.keyboards import get_priority_selection_keyboard
+from src.repository import db
 from src.states import AddTaskStates
 
 router = Router()
@@ -146,7 +146,7 @@ async def handle_select_priority_for_new(callback: CallbackQuery, state: FSMCont
         user_id = callback.from_user.id
 
         # Сохраняем задачу
-        success, task_id, msg = save_task(user_id, {**data, "priority": priority})
+        success, task_id, msg = await db.save_task(user_id, {**data, "priority": priority})
 
         if success:
             response = "🎉 <b>Задача успешно добавлена!</b>\n\n"
@@ -2,12 +2,24 @@
 """Базовые функции для работы с задачами"""
 
 import logging
+import time
 from datetime import datetime
 
+from src.cache import invalidate_user
+from src.changes import DELETED, SAVED, UPDATED, notify_change
 from src.database import get_connection
+from src.pagination import Page, fetch_page
+from src.timestamps import format_date, from_epoch, today_epoch
 
 logger = logging.getLogger(__name__)
 
+# Ключ постраничного вывода активных задач и типы его частей в callback_data
+TASK_PAGE_KEY = ("priority_rank", "deadline_key", "id")
+TASK_PAGE_KEY_TYPES = (int, int, int)
+
+# Сколько последних завершённых задач показывать в обзоре
+RECENT_COMPLETED = 3
+
 
 # ==================== ВАЛИДАЦИЯ ====================
 
@@ -86,6 +98,12 @@ def normalize_date_for_db(date_str: str):
         return date_str
 
 
+def _owner(conn, task_id: int):
+    """Владелец записи — для инвалидации кэша списков после изменения"""
+    row = conn.execute("SELECT user_id FROM tasks WHERE id = ?", (task_id,)).fetchone()
+    return row[0] if row else None
+
+
 def save_task(user_id: int, data: dict) -> tuple[bool, int, str]:
     """Сохранение задачи в базу данных"""
     conn = get_connection()
@@ -114,6 +132,8 @@ def save_task(user_id: int, data: dict) -> tuple[bool, int, str]:
         )
         conn.commit()
         task_id = cursor.lastrowid
+        invalidate_user(user_id)
+        notify_change("task", task_id, SAVED)
         return True, task_id, "Задача успешно сохранена"
 
     except Exception as e:
@@ -129,6 +149,8 @@ def update_task(task_id: int, field: str, value) -> tuple[bool, str]:
     cursor = conn.cursor()
 
     try:
+        owner = _owner(conn, task_id)
+
         if field == "title":
             cursor.execute("UPDATE tasks SET title = ? WHERE id = ?", (value, task_id))
         elif field == "description":
@@ -154,8 +176,8 @@ def update_task(task_id: int, field: str, value) -> tuple[bool, str]:
             # SQLite использует 1 для True, 0 для False
             is_completed = 1 if value else 0
             cursor.execute(
-                "UPDATE tasks SET is_completed = ? WHERE id = ?",
-                (is_completed, task_id),
+                "UPDATE tasks SET is_completed = ?, completed_at = ? WHERE id = ?",
+                (is_completed, int(time.time()) if is_completed else None, task_id),
             )
         else:
             return False, f"Неизвестное поле: {field}"
@@ -165,6 +187,9 @@ def update_task(task_id: int, field: str, value) -> tuple[bool, str]:
         logger.info(
             f"Обновлена задача {task_id}, поле '{field}', затронуто строк: {rows_affected}"
         )
+        if rows_affected > 0:
+            invalidate_user(owner)
+            notify_change("task", task_id, UPDATED, field)
 
         return True, "Поле успешно обновлено"
 
@@ -197,37 +222,24 @@ def get_user_tasks(user_id: int, only_active=True):
     if only_active:
         cursor.execute(
             """
-            SELECT id, title, description, deadline, priority, is_completed
+            SELECT id, title, description, deadline, deadline_ts, priority, is_completed
             FROM tasks
             WHERE user_id = ? AND is_completed = 0
-            ORDER BY
-                CASE priority
-                    WHEN 'high' THEN 1
-                    WHEN 'medium' THEN 2
-                    WHEN 'low' THEN 3
-                    ELSE 4
-                END,
-                deadline
+            ORDER BY priority_rank, deadline_key, id
             """,
             (user_id,),
         )
     else:
         cursor.execute(
             """
-            SELECT id, title, description, deadline, priority, is_completed, created_at
+            SELECT id, title, description, deadline, deadline_ts, priority, is_completed,
+                created_at
             FROM tasks
             WHERE user_id = ?
             ORDER BY
                 is_completed,  -- Сначала активные
-                CASE WHEN is_completed = 0 THEN
-                    CASE priority
-                        WHEN 'high' THEN 1
-                        WHEN 'medium' THEN 2
-                        WHEN 'low' THEN 3
-                        ELSE 4
-                    END
-                ELSE 0 END,
-                CASE WHEN is_completed = 0 THEN deadline ELSE created_at END,
+                CASE WHEN is_completed = 0 THEN priority_rank ELSE 0 END,
+                CASE WHEN is_completed = 0 THEN deadline_ts ELSE created_at END,
                 id DESC  -- Новые задачи первыми
             """,
             (user_id,),
@@ -242,15 +254,84 @@ def get_user_tasks(user_id: int, only_active=True):
     return tasks
 
 
+def _tasks_page(conn, user_id: int, cursor=None) -> Page:
+    return fetch_page(
+        conn,
+        """
+        SELECT id, title, description, deadline, deadline_ts, priority,
+            is_completed, priority_rank, deadline_key
+        FROM tasks
+        WHERE user_id = ? AND is_completed = 0
+        """,
+        (user_id,),
+        TASK_PAGE_KEY,
+        cursor,
+    )
+
+
+def get_user_tasks_page(user_id: int, cursor=None) -> Page:
+    """Страница активных задач в порядке get_user_tasks(only_active=True)"""
+    conn = get_connection()
+    try:
+        return _tasks_page(conn, user_id, cursor)
+    finally:
+        conn.close()
+
+
+def get_task_overview(user_id: int) -> dict:
+    """Обзор задач для экрана списка за одно обращение к БД.
+
+    Первая страница активных задач, число завершённых и последние
+    завершённые — всё по индексам (user_id, is_completed, ...), без
+    чтения всей истории пользователя. Запросы идут в одной транзакции,
+    поэтому части обзора согласованы между собой.
+    """
+    conn = get_connection()
+    try:
+        conn.execute("BEGIN")
+        page = _tasks_page(conn, user_id)
+        completed_count = conn.execute(
+            "SELECT COUNT(*) FROM tasks WHERE user_id = ? AND is_completed = 1",
+            (user_id,),
+        ).fetchone()[0]
+        recent_completed = [
+            dict(row)
+            for row in conn.execute(
+                """
+                SELECT id, title, deadline, deadline_ts, priority, completed_at
+                FROM tasks
+                WHERE user_id = ? AND is_completed = 1
+                ORDER BY completed_at DESC, id DESC
+                LIMIT ?
+                """,
+                (user_id, RECENT_COMPLETED),
+            )
+        ]
+        conn.commit()
+    finally:
+        conn.close()
+
+    return {
+        "page": page,
+        "completed_count": completed_count,
+        "recent_completed": recent_completed,
+    }
+
+
 def delete_task(task_id: int) -> bool:
     """Удаление задачи"""
     conn = get_connection()
     cursor = conn.cursor()
 
     try:
+        owner = _owner(conn, task_id)
         cursor.execute("DELETE FROM tasks WHERE id = ?", (task_id,))
         conn.commit()
-        return cursor.rowcount > 0
+        deleted = cursor.rowcount > 0
+        if deleted:
+            invalidate_user(owner)
+            notify_change("task", task_id, DELETED)
+        return deleted
     finally:
         conn.close()
 
@@ -266,7 +347,17 @@ def format_task_details(task: dict) -> str:
     if task.get("description"):
         response += f"📄 <b>Описание:</b> {task['description']}\n"
 
-    if task.get("deadline"):
+    if task.get("deadline_ts") is not None:
+        deadline_date = from_epoch(task["deadline_ts"]).date()
+        formatted_deadline = deadline_date.strftime("%d.%m.%Y")
+        today = datetime.now().date()
+
+        if deadline_date < today:
+            response += f"⏰ <b>Дедлайн:</b> {formatted_deadline} <b>(ПРОСРОЧЕНО!)</b>\n"
+        else:
+            days_left = (deadline_date - today).days
+            response += f"📅 <b>Дедлайн:</b> {formatted_deadline} (осталось {days_left} дней)\n"
+    elif task.get("deadline"):
         # Форматируем дату из ГГГГ-ММ-ДД в ДД.ММ.ГГГГ
         try:
             deadline_date = datetime.strptime(task["deadline"], "%Y-%m-%d").date()
@@ -296,6 +387,13 @@ def format_task_details(task: dict) -> str:
     return response
 
 
+def format_deadline(task: dict) -> str:
+    """Дедлайн задачи в виде ДД.ММ.ГГГГ (из epoch-колонки, без strptime)"""
+    if task.get("deadline_ts") is not None:
+        return format_date(task["deadline_ts"])
+    return task.get("deadline") or ""
+
+
 def format_task_preview(task: dict) -> str:
     """Форматирование краткой информации о задаче для списка"""
     title = task["title"][:25] + "..." if len(task["title"]) > 25 else task["title"]
@@ -303,7 +401,7 @@ def format_task_preview(task: dict) -> str:
     preview = f"📝 {title}"
 
     if task.get("deadline"):
-        preview += f"\n📅 до: {task['deadline']}"
+        preview += f"\n📅 до: {format_deadline(task)}"
 
     priority_emoji = {"high": "🔴", "medium": "🟡", "low": "🟢"}.get(
         task.get("priority", "medium"), "⚪"
@@ -321,26 +419,24 @@ def get_tasks_statistics(user_id: int) -> dict:
     conn = get_connection()
     cursor = conn.cursor()
 
-    cursor.execute(
-        "SELECT COUNT(*) FROM tasks WHERE user_id = ? AND is_completed = FALSE",
-        (user_id,),
-    )
-    active_count = cursor.fetchone()[0]
-
-    cursor.execute(
-        "SELECT COUNT(*) FROM tasks WHERE user_id = ? AND is_completed = TRUE",
-        (user_id,),
-    )
-    completed_count = cursor.fetchone()[0]
-
+    # Количества ведут триггеры в user_stats, просроченные — диапазон по индексу
     cursor.execute(
         """
-        SELECT COUNT(*) FROM tasks
-        WHERE user_id = ? AND deadline < date('now') AND is_completed = FALSE
+        SELECT
+            active_tasks,
+            completed_tasks,
+            (
+                SELECT COUNT(*) FROM tasks
+                WHERE user_id = user_stats.user_id AND is_completed = 0
+                  AND deadline_ts < ?
+            )
+        FROM user_stats
+        WHERE user_id = ?
         """,
-        (user_id,),
+        (today_epoch(), user_id),
     )
-    overdue_count = cursor.fetchone()[0]
+    row = cursor.fetchone()
+    active_count, completed_count, overdue_count = row if row else (0, 0, 0)
 
     conn.close()
 
@@ -359,10 +455,10 @@ def get_tasks_by_priority(user_id: int, priority: str):
 
     cursor.execute(
         """
-        SELECT id, title, description, deadline, priority, is_completed
+        SELECT id, title, description, deadline, deadline_ts, priority, is_completed
         FROM tasks
         WHERE user_id = ? AND priority = ? AND is_completed = FALSE
-        ORDER BY deadline
+        ORDER BY deadline_ts
         """,
         (user_id, priority),
     )
@@ -376,18 +472,18 @@ def get_upcoming_deadlines(user_id: int, days_ahead: int = 7):
     """Получение задач с ближайшими дедлайнами"""
     conn = get_connection()
     cursor = conn.cursor()
+    today = today_epoch()
 
     cursor.execute(
         """
-        SELECT id, title, description, deadline, priority, is_completed
+        SELECT id, title, description, deadline, deadline_ts, priority, is_completed
         FROM tasks
         WHERE user_id = ?
           AND is_completed = FALSE
-          AND deadline IS NOT NULL
-          AND deadline BETWEEN date('now') AND date('now', ?)
-        ORDER BY deadline
+          AND deadline_ts BETWEEN ? AND ?
+        ORDER BY deadline_ts
         """,
-        (user_id, f"+{days_ahead} days"),
+        (user_id, today, today + days_ahead * 86400),
     )
 
     tasks = [dict(row) for row in cursor.fetchall()]
@@ -6,8 +6,10 @@ import logging
 from aiogram import F, Router
 from aiogram.types import CallbackQuery
 
-from src.handlers.tasks.base import format_task_details, get_task
+from src.handlers.tasks.base import format_task_details
 from src.keyboards import get_task_detail_keyboard
+from src.navigation import render
+from src.repository import db
 
 router = Router()
 logger = logging.getLogger(__name__)
@@ -22,15 +24,13 @@ async def handle_back_to_task(callback: CallbackQuery):
 
         await callback.answer()
 
-        task = get_task(task_id)
+        task = await db.get_task(task_id)
         if not task:
             await callback.message.answer("❌ Задача не найдена!")
             return
 
         response = format_task_details(task)
-        await callback.message.answer(
-            response, reply_markup=get_task_detail_keyboard(task_id), parse_mode="HTML"
-        )
+        await render(callback, response, get_task_detail_keyboard(task_id))
     except Exception as e:
         logger.error(f"Ошибка в handle_back_to_task: {e}")
         await callback.answer("❌ Ошибка при возврате к задаче")
@@ -2,17 +2,14 @@
 
 import asyncio
 import logging
-from datetime import datetime
 
 from aiogram import F, Router
 from aiogram.fsm.context import FSMContext
 from aiogram.types import CallbackQuery, Message
 
 from src.handlers.tasks.base import (
-    delete_task,
+    format_deadline,
     format_task_details,
-    get_task,
-    update_task,
     validate_deadline,
     validate_description,
     validate_title,
@@ -23,6 +20,8 @@ from src.keyboards import (
     get_priority_selection_keyboard,
     get_task_detail_keyboard,
 )
+from src.navigation import render
+from src.repository import db
 from src.states import EditTaskStates
 
 router = Router()
@@ -58,7 +57,7 @@ async def handle_edit_task(callback: CallbackQuery):
 
         await callback.answer()
 
-        task = get_task(task_id)
+        task = await db.get_task(task_id)
         if not task:
             await callback.message.answer("❌ Задача не найдена!")
             return
@@ -66,9 +65,7 @@ async def handle_edit_task(callback: CallbackQuery):
         response = format_task_details(task)
         response += "\n<b>Выберите что изменить:</b>"
 
-        await callback.message.answer(
-            response, reply_markup=get_edit_task_keyboard(task_id), parse_mode="HTML"
-        )
+        await render(callback, response, get_edit_task_keyboard(task_id))
     except Exception as e:
         logger.error(f"Ошибка в handle_edit_task: {e}")
         await callback.answer("❌ Ошибка при редактировании")
@@ -86,7 +83,7 @@ async def handle_delete_task(callback: CallbackQuery):
 
         await callback.answer()
 
-        task = get_task(task_id)
+        task = await db.get_task(task_id)
         if not task:
             await callback.message.answer("❌ Задача не найдена!")
             return
@@ -98,21 +95,11 @@ async def handle_delete_task(callback: CallbackQuery):
             response += f"📄 <b>Описание:</b> {task['description']}\n"
 
         if task.get("deadline"):
-            # Форматируем дату из ГГГГ-ММ-ДД в ДД.ММ.ГГГГ
-            try:
-                deadline_date = datetime.strptime(task["deadline"], "%Y-%m-%d")
-                formatted_deadline = deadline_date.strftime("%d.%m.%Y")
-                response += f"📅 <b>Дедлайн:</b> {formatted_deadline}\n"
-            except:
-                response += f"📅 <b>Дедлайн:</b> {task['deadline']}\n"
+            response += f"📅 <b>Дедлайн:</b> {format_deadline(task)}\n"
 
         response += "\n<b>Вы действительно хотите удалить эту задачу?</b>"
 
-        await callback.message.answer(
-            response,
-            reply_markup=get_delete_task_confirmation_keyboard(task_id),
-            parse_mode="HTML",
-        )
+        await render(callback, response, get_delete_task_confirmation_keyboard(task_id))
     except Exception as e:
         logger.error(f"Ошибка в handle_delete_task: {e}")
         await callback.answer("❌ Ошибка при удалении")
@@ -127,7 +114,7 @@ async def handle_confirm_delete_task(callback: CallbackQuery):
 
         await callback.answer()
 
-        success = delete_task(task_id)
+        success = await db.delete_task(task_id)
         if success:
             await callback.message.answer("✅ Задача удалена!")
 
@@ -172,7 +159,7 @@ async def handle_edit_task_field(callback: CallbackQuery, state: FSMContext):
         await callback.answer()
         await state.update_data(task_id=task_id, field_name=field_name)
 
-        task = get_task(task_id)
+        task = await db.get_task(task_id)
         if not task:
             logger.error(f"Задача {task_id} не найдена в базе!")
             await callback.message.answer("❌ Задача не найдена!")
@@ -229,7 +216,7 @@ async def handle_select_priority_for_edit(callback: CallbackQuery):
 
         await callback.answer(f"Выбран приоритет: {new_priority}")
 
-        success, msg = update_task(task_id, "priority", new_priority)
+        success, msg = await db.update_task(task_id, "priority", new_priority)
         if success:
             await callback.message.answer(
                 f"✅ <b>Приоритет задачи изменён на {new_priority}!</b>",
@@ -237,7 +224,7 @@ async def handle_select_priority_for_edit(callback: CallbackQuery):
             )
 
             # Показываем обновленную задачу
-            task = get_task(task_id)
+            task = await db.get_task(task_id)
             if task:
                 response = format_task_details(task)
                 await callback.message.answer(
@@ -286,7 +273,7 @@ async def handle_task_field_value_input(message: Message, state: FSMContext):
             return
 
         # Обновляем задачу
-        success, msg = update_task(task_id, field_name, new_value)
+        success, msg = await db.update_task(task_id, field_name, new_value)
 
         if success:
             field_display_names = {
@@ -301,7 +288,7 @@ async def handle_task_field_value_input(message: Message, state: FSMContext):
             )
 
             # Показываем обновленную задачу
-            task = get_task(task_id)
+            task = await db.get_task(task_id)
             if task:
                 response = format_task_details(task)
                 await message.answer(
@@ -332,7 +319,7 @@ async def handle_complete_task(callback: CallbackQuery):
         await callback.answer()
 
         # Обновляем задачу
-        success, msg = update_task(task_id, "complete", True)
+        success, msg = await db.update_task(task_id, "complete", True)
 
         if success:
             logger.info(f"Задача {task_id} успешно завершена")
@@ -2,44 +2,46 @@
 """Обработчики для просмотра задач"""
 
 import logging
-from datetime import datetime
 
 from aiogram import F, Router
 from aiogram.types import CallbackQuery, Message
 
-from src.handlers.tasks.base import format_task_details, get_task, get_user_tasks
+from src.handlers.tasks.base import (
+    TASK_PAGE_KEY_TYPES,
+    format_deadline,
+    format_task_details,
+)
 from src.keyboards import (
     get_task_detail_keyboard,
     get_tasks_list_keyboard,
     get_tasks_selection_keyboard,
 )
+from src.navigation import notify, render
+from src.pagination import decode_cursor
+from src.repository import db
 
 router = Router()
 logger = logging.getLogger(__name__)
 
-# Словарь для кэширования задач
-user_tasks_cache = {}
-
 
-async def show_tasks_list(message: Message, user_id: int):
-    """Показать список задач"""
+async def show_tasks_list(target: Message | CallbackQuery, user_id: int):
+    """Показать список задач (по кнопке раздела — на месте сообщения)"""
     try:
         logger.info(f"Показать список задач для пользователя ID: {user_id}")
 
-        # Получаем задачи
-        active_tasks = get_user_tasks(user_id, only_active=True)
-        all_tasks = get_user_tasks(user_id, only_active=False)
-        completed_tasks = [t for t in all_tasks if t.get("is_completed") == 1]
+        # Первая страница активных задач, число и последние завершённые
+        overview = await db.get_task_overview(user_id)
+        page = overview["page"]
+        active_tasks = page.items
+        completed_count = overview["completed_count"]
 
         logger.info(
-            f"Активных задач: {len(active_tasks)}, завершенных: {len(completed_tasks)}"
+            f"Активных задач на странице: {len(active_tasks)}, "
+            f"завершенных: {completed_count}"
         )
 
-        # Кэшируем активные задачи для пагинации
-        user_tasks_cache[user_id] = active_tasks
-
         # Формируем ответ
-        if not active_tasks and not completed_tasks:
+        if not active_tasks and not completed_count:
             response = "✅ <b>У вас пока нет задач!</b>\n\n"
             response += "Добавьте первую задачу с помощью кнопки ниже:"
             keyboard = get_tasks_list_keyboard()
@@ -50,33 +52,12 @@ async def show_tasks_list(message: Message, user_id: int):
                 response += "<i>Выберите активную задачу для просмотра деталей:</i>\n\n"
                 response += "📋 <b>Активные задачи:</b>\n\n"
 
-                for i, task in enumerate(active_tasks[:5], 1):
+                for i, task in enumerate(active_tasks, 1):
                     title = task["title"]
                     response += f"<b>{i}.</b> {title}\n"
 
                 if task.get("deadline"):
-                    # Форматируем дату
-                    try:
-                        deadline_str = task["deadline"]
-                        # Пробуем разные форматы
-                        date_obj = None
-                        for fmt in ["%Y-%m-%d", "%Y-%m-%d", "%d.%m.%Y", "%d/%m/%Y"]:
-                            try:
-                                date_obj = datetime.strptime(deadline_str, fmt)
-                                break
-                            except ValueError:
-                                continue
-
-                        if date_obj:
-                            formatted_deadline = date_obj.strftime("%d.%m.%Y")
-                            response += f"📅 <i>До: {formatted_deadline}</i>\n"
-                        else:
-                            response += f"📅 <i>До: {deadline_str}</i>\n"
-                    except Exception as e:
-                        logger.error(
-                            f"Ошибка форматирования даты {task['deadline']}: {e}"
-                        )
-                        response += f"📅 <i>До: {task['deadline']}</i>\n"
+                    response += f"📅 <i>До: {format_deadline(task)}</i>\n"
 
                     priority_emoji = {"high": "🔴", "medium": "🟡", "low": "🟢"}.get(
                         task.get("priority", "medium"), "⚪"
@@ -84,13 +65,12 @@ async def show_tasks_list(message: Message, user_id: int):
 
                     response += f"{priority_emoji} <i>Приоритет: {task.get('priority', 'medium')}</i>\n\n"
 
-            if completed_tasks:
+            if completed_count:
                 response += "\n🏁 <b>Завершённые задачи:</b>\n"
-                response += f"<i>Всего завершено: {len(completed_tasks)}</i>\n\n"
+                response += f"<i>Всего завершено: {completed_count}</i>\n\n"
 
-                # Показываем последние 3 завершенные задачи (самые новые)
-                recent_completed = completed_tasks[-3:]  # Берем последние 3
-                recent_completed.reverse()  # Переворачиваем, чтобы самые новые были первыми
+                # Последние завершённые задачи (самые новые первыми)
+                recent_completed = overview["recent_completed"]
 
                 for i, task in enumerate(recent_completed, 1):
                     title = (
@@ -101,35 +81,23 @@ async def show_tasks_list(message: Message, user_id: int):
                     response += f"✅ <b>{title}</b>\n"
 
                     if task.get("deadline"):
-                        # Форматируем дату из ГГГГ-ММ-ДД в ДД.ММ.ГГГГ
-                        try:
-                            deadline_date = datetime.strptime(
-                                task["deadline"], "%Y-%m-%d"
-                            )
-                            formatted_deadline = deadline_date.strftime("%d.%m.%Y")
-                            response += f"📅 <i>До: {formatted_deadline}</i>\n"
-                        except:
-                            response += f"📅 <i>До: {task['deadline']}</i>\n"
+                        response += f"📅 <i>До: {format_deadline(task)}</i>\n"
 
                     if i < len(recent_completed):
                         response += "\n"
 
             # Выбираем клавиатуру
             if active_tasks:
-                keyboard = get_tasks_selection_keyboard(active_tasks)
+                keyboard = get_tasks_selection_keyboard(page)
             else:
                 keyboard = get_tasks_list_keyboard()
 
-        # Отправляем сообщение
-        await message.answer(
-            response,
-            reply_markup=keyboard,
-            parse_mode="HTML",
-        )
+        # Показываем список
+        await render(target, response, keyboard)
 
     except Exception as e:
         logger.error(f"Ошибка в show_tasks_list: {e}", exc_info=True)
-        await message.answer("❌ Ошибка при загрузке списка задач")
+        await notify(target, "❌ Ошибка при загрузке списка задач")
 
 
 @router.callback_query(F.data.startswith("view_task_"))
@@ -141,15 +109,13 @@ async def handle_view_task(callback: CallbackQuery):
 
         await callback.answer()
 
-        task = get_task(task_id)
+        task = await db.get_task(task_id)
         if not task:
             await callback.message.answer("❌ Задача не найдена!")
             return
 
         response = format_task_details(task)
-        await callback.message.answer(
-            response, reply_markup=get_task_detail_keyboard(task_id), parse_mode="HTML"
-        )
+        await render(callback, response, get_task_detail_keyboard(task_id))
     except Exception as e:
         logger.error(f"Ошибка в handle_view_task: {e}")
         await callback.answer("❌ Ошибка при загрузке задачи")
@@ -159,15 +125,19 @@ async def handle_view_task(callback: CallbackQuery):
 async def handle_tasks_page(callback: CallbackQuery):
     """Обработка переключения страниц задач"""
     try:
-        start_index = int(callback.data.split("_")[2])
+        cursor = decode_cursor(callback.data, "tasks_page_", TASK_PAGE_KEY_TYPES)
         user_id = callback.from_user.id
         logger.info(
-            f"Переключение страницы задач. Пользователь: {user_id}, старт: {start_index}"
+            f"Переключение страницы задач. Пользователь: {user_id}, курсор: {cursor}"
         )
 
         await callback.answer()
 
-        tasks = user_tasks_cache.get(user_id, [])
+        page = await db.get_user_tasks_page(user_id, cursor)
+        if not page.items and cursor:
+            # Задачи страницы удалены или завершены — начинаем сначала
+            page = await db.get_user_tasks_page(user_id)
+        tasks = page.items
         if not tasks:
             await callback.message.answer("❌ Список задач пуст!")
             return
@@ -175,31 +145,12 @@ async def handle_tasks_page(callback: CallbackQuery):
         response = "✅ <b>Активные задачи:</b>\n\n"
         response += "<i>Выберите задачу для просмотра деталей:</i>\n\n"
 
-        for i, task in enumerate(tasks[start_index : start_index + 5], 1):
+        for i, task in enumerate(tasks, page.position + 1):
             title = task["title"]
-            response += f"<b>{start_index + i}.</b> {title}\n"
+            response += f"<b>{i}.</b> {title}\n"
 
         if task.get("deadline"):
-            # Форматируем дату
-            try:
-                deadline_str = task["deadline"]
-                # Пробуем разные форматы
-                date_obj = None
-                for fmt in ["%Y-%m-%d", "%Y-%m-%d", "%d.%m.%Y", "%d/%m/%Y"]:
-                    try:
-                        date_obj = datetime.strptime(deadline_str, fmt)
-                        break
-                    except ValueError:
-                        continue
-
-                if date_obj:
-                    formatted_deadline = date_obj.strftime("%d.%m.%Y")
-                    response += f"📅 <i>До: {formatted_deadline}</i>\n"
-                else:
-                    response += f"📅 <i>До: {deadline_str}</i>\n"
-            except Exception as e:
-                logger.error(f"Ошибка форматирования даты {task['deadline']}: {e}")
-                response += f"📅 <i>До: {task['deadline']}</i>\n"
+            response += f"📅 <i>До: {format_deadline(task)}</i>\n"
 
             priority_emoji = {"high": "🔴", "medium": "🟡", "low": "🟢"}.get(
                 task.get("priority", "medium"), "⚪"
@@ -207,11 +158,7 @@ async def handle_tasks_page(callback: CallbackQuery):
 
             response += f"{priority_emoji} <i>Приоритет: {task.get('priority', 'medium')}</i>\n\n"
 
-        await callback.message.answer(
-            response,
-            reply_markup=get_tasks_selection_keyboard(tasks, start_index),
-            parse_mode="HTML",
-        )
+        await render(callback, response, get_tasks_selection_keyboard(page))
     except Exception as e:
         logger.error(f"Ошибка в handle_tasks_page: {e}")
         await callback.answer("❌ Ошибка при переключении страницы")
@@ -225,7 +172,7 @@ async def handle_back_to_tasks(callback: CallbackQuery):
         logger.info(f"Возврат к списку задач. Пользователь: {user_id}")
 
         await callback.answer()
-        await show_tasks_list(callback.message, user_id)
+        await show_tasks_list(callback, user_id)
     except Exception as e:
         logger.error(f"Ошибка в handle_back_to_tasks: {e}")
         await callback.answer("❌ Ошибка при возврате к списку")
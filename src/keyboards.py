@@ -1,5 +1,4 @@
 # src/keyboards.py
-from datetime import datetime
 
 from aiogram.types import (
     InlineKeyboardButton,
@@ -8,6 +7,9 @@ from aiogram.types import (
     ReplyKeyboardMarkup,
 )
 
+from src.pagination import PAGE_SIZE
+from src.timestamps import format_date
+
 # ==================== ГЛАВНАЯ КЛАВИАТУРА ====================
 
 
@@ -72,16 +74,16 @@ def get_add_lesson_keyboard():
     return InlineKeyboardMarkup(inline_keyboard=keyboard)
 
 
-def get_lessons_selection_keyboard(lessons, start_index=0):
+def get_lessons_selection_keyboard(page):
     """Клавиатура для выбора урока из списка"""
     keyboard = []
 
-    for i, lesson in enumerate(lessons[start_index : start_index + 5], start=1):
+    for i, lesson in enumerate(page.items, start=page.position + 1):
         lesson_id = lesson["id"]
         subject = lesson["subject"][:20]
         day = lesson["day_of_week"]
         time = lesson["start_time"]
-        button_text = f"{start_index + i}. {day[:3]} {time} - {subject}"
+        button_text = f"{i}. {day[:3]} {time} - {subject}"
 
         keyboard.append(
             [
@@ -91,20 +93,18 @@ def get_lessons_selection_keyboard(lessons, start_index=0):
             ]
         )
 
-    # Кнопки навигации если много уроков
+    # Кнопки навигации: курсоры соседних страниц (src/pagination.py)
     nav_buttons = []
-    if start_index > 0:
+    prev_data = page.prev_data("lessons_page_")
+    if prev_data:
         nav_buttons.append(
-            InlineKeyboardButton(
-                text="⬅️ Назад", callback_data=f"lessons_page_{max(0, start_index - 5)}"
-            )
+            InlineKeyboardButton(text="⬅️ Назад", callback_data=prev_data)
         )
 
-    if len(lessons) > start_index + 5:
+    next_data = page.next_data("lessons_page_")
+    if next_data:
         nav_buttons.append(
-            InlineKeyboardButton(
-                text="Далее ➡️", callback_data=f"lessons_page_{start_index + 5}"
-            )
+            InlineKeyboardButton(text="Далее ➡️", callback_data=next_data)
         )
 
     if nav_buttons:
@@ -282,14 +282,14 @@ def get_tasks_list_keyboard():
     return InlineKeyboardMarkup(inline_keyboard=keyboard)
 
 
-def get_tasks_selection_keyboard(tasks, start_index=0):
+def get_tasks_selection_keyboard(page):
     """Клавиатура для выбора задачи из списка"""
     keyboard = []
 
-    for i, task in enumerate(tasks[start_index : start_index + 5], start=1):
+    for i, task in enumerate(page.items, start=page.position + 1):
         task_id = task["id"]
         title = task["title"][:25]
-        button_text = f"{start_index + i}. {title}"
+        button_text = f"{i}. {title}"
 
         keyboard.append(
             [
@@ -299,20 +299,18 @@ def get_tasks_selection_keyboard(tasks, start_index=0):
             ]
         )
 
-    # Кнопки навигации если много задач
+    # Кнопки навигации: курсоры соседних страниц (src/pagination.py)
     nav_buttons = []
-    if start_index > 0:
+    prev_data = page.prev_data("tasks_page_")
+    if prev_data:
         nav_buttons.append(
-            InlineKeyboardButton(
-                text="⬅️ Назад", callback_data=f"tasks_page_{max(0, start_index - 5)}"
-            )
+            InlineKeyboardButton(text="⬅️ Назад", callback_data=prev_data)
         )
 
-    if len(tasks) > start_index + 5:
+    next_data = page.next_data("tasks_page_")
+    if next_data:
         nav_buttons.append(
-            InlineKeyboardButton(
-                text="Далее ➡️", callback_data=f"tasks_page_{start_index + 5}"
-            )
+            InlineKeyboardButton(text="Далее ➡️", callback_data=next_data)
         )
 
     if nav_buttons:
@@ -458,23 +456,23 @@ def get_events_list_keyboard():
     return InlineKeyboardMarkup(inline_keyboard=keyboard)
 
 
-def get_events_selection_keyboard(events, start_index=0):
+def get_events_selection_keyboard(page):
     """Клавиатура для выбора события из списка"""
     keyboard = []
 
-    for i, event in enumerate(events[start_index : start_index + 5], start=1):
+    for i, event in enumerate(page.items, start=page.position + 1):
         event_id = event["id"]
         title = event["title"][:25]
 
-        # Форматируем дату из ГГГГ-ММ-ДД ЧЧ:ММ в ДД.ММ.ГГГГ
-        event_date_time = event["event_datetime"]
-        try:
-            dt = datetime.strptime(event_date_time, "%Y-%m-%d %H:%M")
-            formatted_date = dt.strftime("%d.%m.%Y")
-        except Exception:
-            formatted_date = event_date_time[:10]
+        # Дата ближайшего вхождения в формате ДД.ММ.ГГГГ
+        if event.get("next_ts") is not None:
+            formatted_date = format_date(event["next_ts"])
+        elif event.get("event_ts") is not None:
+            formatted_date = format_date(event["event_ts"])
+        else:
+            formatted_date = event["event_datetime"][:10]
 
-        button_text = f"{start_index + i}. {formatted_date} - {title}"
+        button_text = f"{i}. {formatted_date} - {title}"
 
         keyboard.append(
             [
@@ -484,20 +482,18 @@ def get_events_selection_keyboard(events, start_index=0):
             ]
         )
 
-    # Кнопки навигации если много событий
+    # Кнопки навигации: курсоры соседних страниц (src/pagination.py)
     nav_buttons = []
-    if start_index > 0:
+    prev_data = page.prev_data("events_page_")
+    if prev_data:
         nav_buttons.append(
-            InlineKeyboardButton(
-                text="⬅️ Назад", callback_data=f"events_page_{max(0, start_index - 5)}"
-            )
+            InlineKeyboardButton(text="⬅️ Назад", callback_data=prev_data)
         )
 
-    if len(events) > start_index + 5:
+    next_data = page.next_data("events_page_")
+    if next_data:
         nav_buttons.append(
-            InlineKeyboardButton(
-                text="Далее ➡️", callback_data=f"events_page_{start_index + 5}"
-            )
+            InlineKeyboardButton(text="Далее ➡️", callback_data=next_data)
         )
 
     if nav_buttons:
@@ -516,7 +512,7 @@ def get_events_selection_keyboard(events, start_index=0):
     return InlineKeyboardMarkup(inline_keyboard=keyboard)
 
 
-def get_event_detail_keyboard(event_id):
+def get_event_detail_keyboard(event_id, recurring=False):
     """Кнопки для деталей события"""
     keyboard = [
         [
@@ -527,12 +523,23 @@ def get_event_detail_keyboard(event_id):
                 text="🗑️ Удалить", callback_data=f"delete_event_{event_id}"
             ),
         ],
+    ]
+    if recurring:
+        keyboard.append(
+            [
+                InlineKeyboardButton(
+                    text="⏭ Пропустить ближайшее",
+                    callback_data=f"skip_occurrence_{event_id}",
+                )
+            ]
+        )
+    keyboard.append(
         [
             InlineKeyboardButton(
                 text="🔙 Назад к событиям", callback_data="back_to_events"
             )
-        ],
-    ]
+        ]
+    )
     return InlineKeyboardMarkup(inline_keyboard=keyboard)
 
 
@@ -717,3 +724,45 @@ def get_delete_event_confirmation_keyboard(event_id):
         ]
     ]
     return InlineKeyboardMarkup(inline_keyboard=keyboard)
+
+
+# ==================== INLINE КЛАВИАТУРЫ ПОИСКА ====================
+
+SEARCH_KIND_EMOJI = {"task": "✅", "event": "🎯", "lesson": "📅"}
+
+
+def get_search_results_keyboard(page):
+    """Клавиатура результатов поиска: переход к деталям и страницы"""
+    keyboard = []
+
+    for i, item in enumerate(page.items, start=page.position + 1):
+        emoji = SEARCH_KIND_EMOJI[item["kind"]]
+        keyboard.append(
+            [
+                InlineKeyboardButton(
+                    text=f"{i}. {emoji} {item['title'][:25]}",
+                    callback_data=f"view_{item['kind']}_{item['id']}",
+                )
+            ]
+        )
+
+    # Ранжированные результаты листаются по смещению (src/search.py)
+    nav_buttons = []
+    if page.has_prev:
+        nav_buttons.append(
+            InlineKeyboardButton(
+                text="⬅️ Назад",
+                callback_data=f"find_page_{max(0, page.position - PAGE_SIZE)}",
+            )
+        )
+    if page.has_next:
+        nav_buttons.append(
+            InlineKeyboardButton(
+                text="Далее ➡️",
+                callback_data=f"find_page_{page.position + len(page.items)}",
+            )
+        )
+    if nav_buttons:
+        keyboard.append(nav_buttons)
+
+    return InlineKeyboardMarkup(inline_keyboard=keyboard)
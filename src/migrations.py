@@ -0,0 +1,774 @@
+# src/migrations.py
+"""Версионные миграции схемы БД.
+
+Номер применённой миграции хранится в ``PRAGMA user_version``. При старте
+``migrate()`` читает версию и, если она актуальна, сразу возвращается —
+тёплый старт стоит одного PRAGMA. Иначе недостающие шаги применяются по
+порядку, каждый в своей транзакции вместе с обновлением user_version.
+
+Шаги идемпотентны: базы, созданные до появления миграций, имеют
+user_version = 0, но уже содержат часть схемы.
+
+Новая миграция добавляется в конец ``MIGRATIONS``; изменять уже
+выпущенные шаги нельзя.
+"""
+
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+
+def _columns(conn, table: str) -> list:
+    return [col[1] for col in conn.execute(f"PRAGMA table_info({table})")]
+
+
+def _add_column(conn, table: str, column: str, declaration: str) -> bool:
+    """ALTER TABLE ADD COLUMN, если колонки ещё нет"""
+    if column in _columns(conn, table):
+        return False
+    conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {declaration}")
+    return True
+
+
+# ==================== МИГРАЦИИ ====================
+
+
+def _create_base_tables(conn):
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            telegram_id INTEGER UNIQUE NOT NULL,
+            username TEXT,
+            first_name TEXT,
+            last_name TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """
+    )
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS schedule (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            subject TEXT NOT NULL,
+            day_of_week TEXT NOT NULL,
+            start_time TEXT NOT NULL,
+            end_time TEXT NOT NULL,
+            build TEXT,
+            room TEXT,
+            teacher TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users (telegram_id) ON DELETE CASCADE
+        )
+        """
+    )
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS tasks (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            title TEXT NOT NULL,
+            description TEXT,
+            deadline DATE,
+            priority TEXT CHECK(priority IN ('high', 'medium', 'low')),
+            is_completed BOOLEAN DEFAULT 0,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users (telegram_id) ON DELETE CASCADE
+        )
+        """
+    )
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS events (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            title TEXT NOT NULL,
+            description TEXT,
+            event_datetime DATETIME NOT NULL,
+            location TEXT,
+            is_recurring BOOLEAN DEFAULT 0,
+            recurrence_rule TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users (telegram_id) ON DELETE CASCADE
+        )
+        """
+    )
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS event_reminders (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            event_id INTEGER NOT NULL,
+            reminder_type TEXT NOT NULL,
+            reminder_time DATETIME NOT NULL,
+            reminder_sent BOOLEAN DEFAULT 0,
+            FOREIGN KEY (event_id) REFERENCES events(id) ON DELETE CASCADE
+        )
+        """
+    )
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS task_reminders (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            task_id INTEGER NOT NULL,
+            reminder_type TEXT NOT NULL,
+            reminder_time DATETIME NOT NULL,
+            reminder_sent BOOLEAN DEFAULT 0,
+            FOREIGN KEY (task_id) REFERENCES tasks(id) ON DELETE CASCADE
+        )
+        """
+    )
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_schedule_user_id ON schedule(user_id)")
+
+
+def _add_last_reminder_sent(conn):
+    # Время последнего создания напоминаний
+    _add_column(conn, "events", "last_reminder_sent", "DATETIME")
+    _add_column(conn, "tasks", "last_reminder_sent", "DATETIME")
+
+
+def _fix_invalid_deadlines(conn):
+    # Раньше выполнялось fix_invalid_dates() на каждом старте: strptime по
+    # каждой задаче в Python. date() возвращает NULL для нераспознанной
+    # строки, а с модификатором нормализует несуществующие даты
+    # (2024-02-30 -> 2024-03-01): всё, что не равно своей нормальной форме,
+    # strptime("%Y-%m-%d") тоже отверг бы
+    cursor = conn.execute(
+        """
+        UPDATE tasks SET deadline = NULL
+        WHERE deadline IS NOT NULL AND date(deadline, '+0 days') IS NOT deadline
+        """
+    )
+    if cursor.rowcount:
+        logger.info(f"🧹 Исправлено некорректных дедлайнов: {cursor.rowcount}")
+
+
+def _unique_reminders(conn):
+    # Одно напоминание каждого типа на задачу/событие: повторная генерация
+    # через INSERT OR IGNORE не создаёт дублей. Перед созданием уникального
+    # индекса удаляем накопившиеся дубли, оставляя уже отправленную запись
+    for table, key in (("task_reminders", "task_id"), ("event_reminders", "event_id")):
+        conn.execute(
+            f"""
+            DELETE FROM {table} WHERE id NOT IN (
+                SELECT id FROM (
+                    SELECT id, ROW_NUMBER() OVER (
+                        PARTITION BY {key}, reminder_type
+                        ORDER BY reminder_sent DESC, id
+                    ) AS rn
+                    FROM {table}
+                ) WHERE rn = 1
+            )
+            """
+        )
+        conn.execute(
+            f"CREATE UNIQUE INDEX IF NOT EXISTS idx_{table}_unique "
+            f"ON {table}({key}, reminder_type)"
+        )
+
+
+# (таблица, epoch-колонка, текстовая колонка)
+EPOCH_COLUMNS = (
+    ("tasks", "deadline_ts", "deadline"),
+    ("events", "event_ts", "event_datetime"),
+    ("task_reminders", "reminder_ts", "reminder_time"),
+    ("event_reminders", "reminder_ts", "reminder_time"),
+)
+
+
+def _epoch_columns(conn):
+    # Целочисленные UTC epoch-колонки: по ним идут все сравнения и сортировки
+    for table, ts_column, text_column in EPOCH_COLUMNS:
+        if _add_column(conn, table, ts_column, "INTEGER"):
+            # Текст хранится в локальном времени; модификатор 'utc' переводит в UTC
+            conn.execute(
+                f"""
+                UPDATE {table}
+                SET {ts_column} = CAST(strftime('%s', {text_column}, 'utc') AS INTEGER)
+                WHERE {text_column} IS NOT NULL
+                """
+            )
+
+    # Дедлайны и время событий вводятся в обработчиках текстом —
+    # epoch-колонку поддерживают триггеры. Напоминания пишет только код
+    # сервисов, он заполняет reminder_ts сам
+    for table, ts_column, text_column in EPOCH_COLUMNS[:2]:
+        conn.execute(
+            f"""
+            CREATE TRIGGER IF NOT EXISTS trg_{table}_{ts_column}_insert
+            AFTER INSERT ON {table} WHEN NEW.{text_column} IS NOT NULL
+            BEGIN
+                UPDATE {table}
+                SET {ts_column} = CAST(strftime('%s', NEW.{text_column}, 'utc') AS INTEGER)
+                WHERE id = NEW.id;
+            END
+            """
+        )
+        conn.execute(
+            f"""
+            CREATE TRIGGER IF NOT EXISTS trg_{table}_{ts_column}_update
+            AFTER UPDATE OF {text_column} ON {table}
+            BEGIN
+                UPDATE {table}
+                SET {ts_column} = CAST(strftime('%s', NEW.{text_column}, 'utc') AS INTEGER)
+                WHERE id = NEW.id;
+            END
+            """
+        )
+
+
+def _hot_query_indexes(conn):
+    # Индексы по текстовым колонкам заменены индексами по epoch-колонкам
+    for index in (
+        "idx_tasks_user_id",
+        "idx_events_user_id",
+        "idx_tasks_deadline",
+        "idx_events_datetime",
+        "idx_tasks_user_open",
+        "idx_events_user_datetime",
+        "idx_tasks_open_deadline",
+        "idx_task_reminders_pending",
+        "idx_task_reminders_time",
+        "idx_event_reminders_pending",
+        "idx_event_reminders_time",
+    ):
+        conn.execute(f"DROP INDEX IF EXISTS {index}")
+
+    # Списки задач и событий пользователя: фильтр и сортировка по одному индексу
+    conn.execute(
+        """
+        CREATE INDEX IF NOT EXISTS idx_tasks_user_open_ts
+        ON tasks(user_id, is_completed, deadline_ts)
+        """
+    )
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_events_user_ts ON events(user_id, event_ts)"
+    )
+
+    # Сверка с БД: невыполненные задачи по дедлайну и события по времени
+    conn.execute(
+        """
+        CREATE INDEX IF NOT EXISTS idx_tasks_open_deadline_ts
+        ON tasks(deadline_ts) WHERE is_completed = 0
+        """
+    )
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_events_ts ON events(event_ts)")
+
+    # Очередь напоминаний: частичный индекс только по неотправленным,
+    # покрывает загрузку планировщика (id, reminder_ts) и выборку наступивших
+    for table in ("task_reminders", "event_reminders"):
+        conn.execute(
+            f"""
+            CREATE INDEX IF NOT EXISTS idx_{table}_pending_ts
+            ON {table}(reminder_ts) WHERE reminder_sent = 0
+            """
+        )
+        # Очистка старых напоминаний по времени
+        conn.execute(
+            f"CREATE INDEX IF NOT EXISTS idx_{table}_ts ON {table}(reminder_ts)"
+        )
+
+
+def _page_keys(conn):
+    # Ключи сортировки списков для постраничного вывода по ключу
+    # (src/pagination.py). Виртуальные генерируемые колонки не занимают
+    # места в строке и индексируются как обычные
+    _add_column(
+        conn,
+        "tasks",
+        "priority_rank",
+        """INTEGER GENERATED ALWAYS AS (
+            CASE priority
+                WHEN 'high' THEN 1
+                WHEN 'medium' THEN 2
+                WHEN 'low' THEN 3
+                ELSE 4
+            END
+        ) VIRTUAL""",
+    )
+    # Задачи без дедлайна идут первыми, как при ORDER BY deadline_ts;
+    # NULL в ключе сломал бы сравнение (a, b, id) > (?, ?, ?)
+    _add_column(
+        conn,
+        "tasks",
+        "deadline_key",
+        "INTEGER GENERATED ALWAYS AS (IFNULL(deadline_ts, 0)) VIRTUAL",
+    )
+    _add_column(
+        conn,
+        "schedule",
+        "day_rank",
+        """INTEGER GENERATED ALWAYS AS (
+            CASE day_of_week
+                WHEN 'Понедельник' THEN 1
+                WHEN 'Вторник' THEN 2
+                WHEN 'Среда' THEN 3
+                WHEN 'Четверг' THEN 4
+                WHEN 'Пятница' THEN 5
+                WHEN 'Суббота' THEN 6
+                ELSE 7
+            END
+        ) VIRTUAL""",
+    )
+
+    # id в конце каждого индекса неявно (rowid), поэтому порядок
+    # (…, id) берётся из индекса без сортировки
+    conn.execute(
+        """
+        CREATE INDEX IF NOT EXISTS idx_tasks_user_page
+        ON tasks(user_id, is_completed, priority_rank, deadline_key)
+        """
+    )
+    conn.execute(
+        """
+        CREATE INDEX IF NOT EXISTS idx_schedule_user_page
+        ON schedule(user_id, day_rank, start_time)
+        """
+    )
+    # Покрывается новым индексом как префиксом
+    conn.execute("DROP INDEX IF EXISTS idx_schedule_user_id")
+
+
+def _completed_at(conn):
+    # Время завершения задачи (epoch): последние завершённые выбираются
+    # по индексу, без загрузки всей истории пользователя
+    if _add_column(conn, "tasks", "completed_at", "INTEGER"):
+        # Для уже завершённых задач точное время неизвестно — берём создание
+        conn.execute(
+            """
+            UPDATE tasks
+            SET completed_at = CAST(strftime('%s', created_at) AS INTEGER)
+            WHERE is_completed = 1
+            """
+        )
+    conn.execute(
+        """
+        CREATE INDEX IF NOT EXISTS idx_tasks_user_completed
+        ON tasks(user_id, is_completed, completed_at)
+        """
+    )
+
+
+# Счётчики user_stats: колонка -> условие строки, попадающей в счётчик
+STATS_COUNTERS = {
+    "tasks": {
+        "active_tasks": "{row}.is_completed = 0",
+        "completed_tasks": "{row}.is_completed = 1",
+    },
+    "events": {"events": "1"},
+    "schedule": {"lessons": "1"},
+}
+
+
+def _stats_upsert(table: str, row: str, sign: str) -> str:
+    """INSERT ... ON CONFLICT, прибавляющий строку row (NEW/OLD) к счётчикам"""
+    counters = STATS_COUNTERS[table]
+    columns = ", ".join(counters)
+    values = ", ".join(
+        f"{sign}({condition.format(row=row)})" for condition in counters.values()
+    )
+    updates = ", ".join(
+        f"{column} = {column} + excluded.{column}" for column in counters
+    )
+    return (
+        f"INSERT INTO user_stats (user_id, {columns}) VALUES ({row}.user_id, {values}) "
+        f"ON CONFLICT(user_id) DO UPDATE SET {updates};"
+    )
+
+
+def _user_stats(conn):
+    # Материализованные счётчики для /stats: чтение — поиск по первичному
+    # ключу вместо COUNT(*) по задачам, событиям и урокам. Счётчики ведут
+    # триггеры, поэтому их не обходит ни одна запись, включая каскадное
+    # удаление. Внешнего ключа на users нет: при каскадном удалении
+    # пользователя триггеры задач обновляют строку уже после удаления
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS user_stats (
+            user_id INTEGER PRIMARY KEY,
+            active_tasks INTEGER NOT NULL DEFAULT 0,
+            completed_tasks INTEGER NOT NULL DEFAULT 0,
+            events INTEGER NOT NULL DEFAULT 0,
+            lessons INTEGER NOT NULL DEFAULT 0
+        )
+        """
+    )
+    conn.execute(
+        """
+        INSERT OR REPLACE INTO user_stats
+            (user_id, active_tasks, completed_tasks, events, lessons)
+        SELECT user_id, SUM(active), SUM(completed), SUM(events), SUM(lessons)
+        FROM (
+            SELECT user_id, is_completed = 0 AS active, is_completed = 1 AS completed,
+                0 AS events, 0 AS lessons
+            FROM tasks
+            UNION ALL
+            SELECT user_id, 0, 0, 1, 0 FROM events
+            UNION ALL
+            SELECT user_id, 0, 0, 0, 1 FROM schedule
+        )
+        GROUP BY user_id
+        """
+    )
+
+    for table in STATS_COUNTERS:
+        conn.execute(
+            f"""
+            CREATE TRIGGER IF NOT EXISTS trg_{table}_stats_insert
+            AFTER INSERT ON {table}
+            BEGIN
+                {_stats_upsert(table, "NEW", "")}
+            END
+            """
+        )
+        conn.execute(
+            f"""
+            CREATE TRIGGER IF NOT EXISTS trg_{table}_stats_delete
+            AFTER DELETE ON {table}
+            BEGIN
+                {_stats_upsert(table, "OLD", "-")}
+            END
+            """
+        )
+        # Смена владельца или статуса: вычесть старую строку, прибавить новую
+        watched = "user_id, is_completed" if table == "tasks" else "user_id"
+        conn.execute(
+            f"""
+            CREATE TRIGGER IF NOT EXISTS trg_{table}_stats_update
+            AFTER UPDATE OF {watched} ON {table}
+            BEGIN
+                {_stats_upsert(table, "OLD", "-")}
+                {_stats_upsert(table, "NEW", "")}
+            END
+            """
+        )
+
+
+# Источники полнотекстового индекса:
+# таблица -> (код вида, заголовок, текст, индексируемые колонки).
+# rowid в search_index = id * len(SEARCH_SOURCES) + код вида
+SEARCH_SOURCES = {
+    "tasks": (0, "{row}.title", "{row}.description", "title, description"),
+    "events": (
+        1,
+        "{row}.title",
+        "IFNULL({row}.description, '') || ' ' || IFNULL({row}.location, '')",
+        "title, description, location",
+    ),
+    "schedule": (2, "{row}.subject", "{row}.teacher", "subject, teacher"),
+}
+
+
+def _fold(expression: str) -> str:
+    # unicode61 не приводит «ё» к «е» — приводим сами (и в запросе тоже)
+    return f"replace(replace({expression}, 'ё', 'е'), 'Ё', 'Е')"
+
+
+def _search_values(table: str, row: str) -> str:
+    """rowid, owner, title, body, label строки row (NEW или сама таблица)"""
+    code, title, body, _ = SEARCH_SOURCES[table]
+    title, body = title.format(row=row), body.format(row=row)
+    return (
+        f"{row}.id * {len(SEARCH_SOURCES)} + {code}, 'u' || {row}.user_id, "
+        f"{_fold(title)}, {_fold(body)}, {title}"
+    )
+
+
+def _search_index(conn):
+    # Полнотекстовый поиск (src/search.py) по задачам, событиям и урокам.
+    # Владелец хранится токеном u<id> в колонке owner: фильтр
+    # «owner:u42 AND запрос» пересекает списки документов внутри FTS5
+    # и не перебирает совпадения других пользователей. label — исходный
+    # заголовок для показа (title хранится с «ё», приведённой к «е»).
+    # Префиксные индексы до 8 символов: без них запрос «физ*» сливает
+    # списки всех слов с этим началом целиком, и частые слова стоят
+    # сотни миллисекунд; со своим индексом префикс — один список,
+    # по которому FTS5 переходит сразу к записям владельца
+    conn.execute(
+        """
+        CREATE VIRTUAL TABLE IF NOT EXISTS search_index USING fts5(
+            owner, title, body, label UNINDEXED,
+            tokenize = 'unicode61 remove_diacritics 2',
+            prefix = '2 3 4 5 6 7 8'
+        )
+        """
+    )
+    conn.execute("DELETE FROM search_index")
+
+    for table in SEARCH_SOURCES:
+        conn.execute(
+            f"""
+            INSERT INTO search_index (rowid, owner, title, body, label)
+            SELECT {_search_values(table, table)} FROM {table}
+            """
+        )
+
+        code, _, _, columns = SEARCH_SOURCES[table]
+        rowid = f"{len(SEARCH_SOURCES)} + {code}"
+        conn.execute(
+            f"""
+            CREATE TRIGGER IF NOT EXISTS trg_{table}_search_insert
+            AFTER INSERT ON {table}
+            BEGIN
+                INSERT INTO search_index (rowid, owner, title, body, label)
+                VALUES ({_search_values(table, "NEW")});
+            END
+            """
+        )
+        conn.execute(
+            f"""
+            CREATE TRIGGER IF NOT EXISTS trg_{table}_search_delete
+            AFTER DELETE ON {table}
+            BEGIN
+                DELETE FROM search_index WHERE rowid = OLD.id * {rowid};
+            END
+            """
+        )
+        conn.execute(
+            f"""
+            CREATE TRIGGER IF NOT EXISTS trg_{table}_search_update
+            AFTER UPDATE OF user_id, {columns} ON {table}
+            BEGIN
+                DELETE FROM search_index WHERE rowid = OLD.id * {rowid};
+                INSERT INTO search_index (rowid, owner, title, body, label)
+                VALUES ({_search_values(table, "NEW")});
+            END
+            """
+        )
+
+    # Ранжирование по умолчанию (ORDER BY rank): owner не учитывается,
+    # совпадение в заголовке весит в 10 раз больше, чем в тексте
+    conn.execute(
+        """
+        INSERT INTO search_index (search_index, rank)
+        VALUES ('rank', 'bm25(0.0, 10.0, 1.0, 0.0)')
+        """
+    )
+    conn.execute("INSERT INTO search_index (search_index) VALUES ('optimize')")
+
+
+def _fsm_storage(conn):
+    # Состояния диалогов aiogram (src/fsm_storage.py): переживают перезапуск
+    # и доступны нескольким процессам. updated_at — для очистки брошенных
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS fsm_storage (
+            key TEXT PRIMARY KEY,
+            state TEXT,
+            data TEXT NOT NULL DEFAULT '{}',
+            updated_at INTEGER NOT NULL
+        ) WITHOUT ROWID
+        """
+    )
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_fsm_storage_updated ON fsm_storage(updated_at)"
+    )
+
+
+def _recurring_events(conn):
+    # Повторяющиеся события (src/recurrence.py): границы серии, пропущенные
+    # вхождения и ближайшее вхождение next_ts — ключ списков.
+    # series_active = 1, пока серия может продолжиться. plan_ts — первое
+    # вхождение, для которого ещё нет напоминаний (NULL — планировать
+    # нечего): сверка берёт только события, у которых оно вошло в окно
+    _add_column(conn, "events", "recurrence_until", "INTEGER")
+    _add_column(conn, "events", "recurrence_count", "INTEGER")
+    _add_column(conn, "events", "next_ts", "INTEGER")
+    _add_column(conn, "events", "series_active", "INTEGER NOT NULL DEFAULT 0")
+    _add_column(conn, "events", "plan_ts", "INTEGER")
+
+    active = (
+        "IFNULL({row}.recurrence_rule IN ('daily', 'weekly', 'monthly', 'yearly'), 0)"
+    )
+    conn.execute(
+        f"""
+        UPDATE events
+        SET next_ts = event_ts, plan_ts = event_ts,
+            series_active = {active.format(row="events")}
+        """
+    )
+    # Изменение расписания возвращает next_ts и plan_ts на начало серии,
+    # дальше их догоняют advance_series() и планирование напоминаний.
+    # При вставке срабатывает тоже: триггер epoch-колонки заполняет
+    # event_ts через UPDATE
+    conn.execute(
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_events_series_reset
+        AFTER UPDATE OF event_ts, recurrence_rule, recurrence_until, recurrence_count
+        ON events
+        BEGIN
+            UPDATE events
+            SET next_ts = NEW.event_ts, plan_ts = NEW.event_ts,
+                series_active = {active.format(row="NEW")}
+            WHERE id = NEW.id;
+        END
+        """
+    )
+
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS event_exceptions (
+            event_id INTEGER NOT NULL,
+            occurrence_ts INTEGER NOT NULL,
+            PRIMARY KEY (event_id, occurrence_ts),
+            FOREIGN KEY (event_id) REFERENCES events(id) ON DELETE CASCADE
+        ) WITHOUT ROWID
+        """
+    )
+
+    # Напоминание относится к конкретному вхождению серии
+    if _add_column(conn, "event_reminders", "occurrence_ts", "INTEGER"):
+        conn.execute(
+            """
+            UPDATE event_reminders SET occurrence_ts = (
+                SELECT event_ts FROM events WHERE events.id = event_reminders.event_id
+            )
+            """
+        )
+    conn.execute("DROP INDEX IF EXISTS idx_event_reminders_unique")
+    conn.execute(
+        """
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_event_reminders_occurrence
+        ON event_reminders(event_id, occurrence_ts, reminder_type)
+        """
+    )
+
+    # Списки идут по ближайшему вхождению, сверка — по plan_ts
+    conn.execute("DROP INDEX IF EXISTS idx_events_user_ts")
+    conn.execute("DROP INDEX IF EXISTS idx_events_ts")
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_events_user_next ON events(user_id, next_ts)"
+    )
+    conn.execute(
+        """
+        CREATE INDEX IF NOT EXISTS idx_events_plan
+        ON events(plan_ts) WHERE plan_ts IS NOT NULL
+        """
+    )
+    conn.execute(
+        """
+        CREATE INDEX IF NOT EXISTS idx_events_series_next
+        ON events(next_ts) WHERE series_active = 1
+        """
+    )
+
+
+def _reminder_outbox(conn):
+    # Очередь отправки (src/outbox.py): pending → claimed → sent/failed.
+    # reminder_sent = 1 у завершённых строк, прежние запросы ожидающих
+    # напоминаний не меняются. claim_token и lease_until заполнены только
+    # у захваченных строк: после истечения аренды строку захватят снова
+    for table in ("task_reminders", "event_reminders"):
+        added = _add_column(
+            conn,
+            table,
+            "state",
+            "TEXT NOT NULL DEFAULT 'pending' "
+            "CHECK (state IN ('pending', 'claimed', 'sent', 'failed'))",
+        )
+        if added:
+            conn.execute(f"UPDATE {table} SET state = 'sent' WHERE reminder_sent = 1")
+        _add_column(conn, table, "claim_token", "TEXT")
+        _add_column(conn, table, "lease_until", "INTEGER")
+
+        # Захват и загрузка планировщика читают lease_until из индекса
+        conn.execute(f"DROP INDEX IF EXISTS idx_{table}_pending_ts")
+        conn.execute(
+            f"""
+            CREATE INDEX IF NOT EXISTS idx_{table}_outbox
+            ON {table}(reminder_ts, lease_until) WHERE reminder_sent = 0
+            """
+        )
+
+
+def _delivery_retries(conn):
+    # Повторы с экспоненциальной задержкой: attempts — число неудачных
+    # попыток, время следующей хранится в lease_until ожидающей строки.
+    # Безнадёжные отправки уходят в dead_letters, пользователи, которым
+    # бот не может писать, отключаются (is_active = 0)
+    for table in ("task_reminders", "event_reminders"):
+        _add_column(conn, table, "attempts", "INTEGER NOT NULL DEFAULT 0")
+    _add_column(conn, "users", "is_active", "INTEGER NOT NULL DEFAULT 1")
+
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS dead_letters (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            kind TEXT NOT NULL,
+            reminder_id INTEGER NOT NULL,
+            telegram_id INTEGER,
+            attempts INTEGER NOT NULL,
+            error TEXT,
+            failed_ts INTEGER NOT NULL
+        )
+        """
+    )
+
+
+def _reminder_timing(conn):
+    # Личное время утренних напоминаний о задачах ('ЧЧ:ММ', NULL — 9:00
+    # со сдвигом сглаживания, см. src/task_reminders.py)
+    _add_column(conn, "users", "reminder_time", "TEXT")
+
+
+# Порядок менять нельзя: номер миграции = позиция в списке
+MIGRATIONS = [
+    ("Базовые таблицы", _create_base_tables),
+    ("Колонки last_reminder_sent", _add_last_reminder_sent),
+    ("Исправление некорректных дедлайнов", _fix_invalid_deadlines),
+    ("Уникальные напоминания (…_id, reminder_type)", _unique_reminders),
+    ("Epoch-колонки и триггеры", _epoch_columns),
+    ("Индексы горячих запросов", _hot_query_indexes),
+    ("Ключи постраничного вывода", _page_keys),
+    ("Время завершения задач", _completed_at),
+    ("Счётчики user_stats", _user_stats),
+    ("Полнотекстовый поиск", _search_index),
+    ("Хранилище состояний FSM", _fsm_storage),
+    ("Повторяющиеся события", _recurring_events),
+    ("Очередь отправки напоминаний", _reminder_outbox),
+    ("Повторы отправки и dead letters", _delivery_retries),
+    ("Время напоминаний пользователя", _reminder_timing),
+]
+
+LATEST_VERSION = len(MIGRATIONS)
+
+
+# ==================== ЗАПУСК ====================
+
+
+def get_version(conn) -> int:
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(conn, target: int = LATEST_VERSION) -> int:
+    """Применить недостающие миграции, вернуть итоговую версию схемы"""
+    version = get_version(conn)
+    if version >= target:
+        return version
+
+    for number in range(version + 1, target + 1):
+        description, step = MIGRATIONS[number - 1]
+        started = time.perf_counter()
+
+        # IMMEDIATE берёт блокировку записи сразу: второй процесс, стартующий
+        # одновременно, дождётся её и увидит уже обновлённую версию
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if get_version(conn) >= number:
+                conn.rollback()
+                continue
+            step(conn)
+            conn.execute(f"PRAGMA user_version = {number}")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            logger.error(f"❌ Миграция {number} ({description}) не применена")
+            raise
+
+        logger.info(
+            f"🗄️ Миграция {number}: {description} "
+            f"({(time.perf_counter() - started) * 1000:.1f} мс)"
+        )
+
+    return get_version(conn)
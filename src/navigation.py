@@ -0,0 +1,116 @@
+# src/navigation.py
+"""Показ экранов раздела редактированием сообщения вместо отправки нового.
+
+Переходы внутри раздела (список → детали → назад, листание страниц,
+меню редактирования) редактируют сообщение, на кнопке которого нажали:
+меньше исходящих запросов к Bot API, меньше давления на лимиты и нет
+ленты одинаковых сообщений в чате.
+
+Хэш показанного содержимого (текст + клавиатура) запоминается по
+(chat_id, message_id); повторный показ того же экрана (двойное нажатие,
+«Назад» на первой странице) не отправляет запрос вовсе. Если хэша нет
+(другой экземпляр бота, перезапуск), Telegram отвечает «message is not
+modified» — это тоже считается пропуском. Если отредактировать сообщение
+нельзя, экран отправляется новым сообщением.
+"""
+
+import hashlib
+import logging
+from collections import OrderedDict
+
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.types import CallbackQuery, InlineKeyboardMarkup, Message
+
+logger = logging.getLogger(__name__)
+
+MAX_TRACKED_MESSAGES = 10_000
+
+# Хэши последнего показанного содержимого: (chat_id, message_id) -> digest
+_rendered = OrderedDict()
+
+stats = {"sent": 0, "edited": 0, "skipped": 0, "fallback": 0}
+
+
+def content_hash(text: str, reply_markup=None) -> bytes:
+    markup = reply_markup.model_dump_json(exclude_none=True) if reply_markup else ""
+    return hashlib.blake2b(f"{text}\0{markup}".encode(), digest_size=16).digest()
+
+
+def _remember(message: Message, digest: bytes):
+    key = (message.chat.id, message.message_id)
+    _rendered[key] = digest
+    _rendered.move_to_end(key)
+    while len(_rendered) > MAX_TRACKED_MESSAGES:
+        _rendered.popitem(last=False)
+
+
+async def _send(message: Message, text: str, reply_markup, parse_mode, digest):
+    sent = await message.answer(text, reply_markup=reply_markup, parse_mode=parse_mode)
+    stats["sent"] += 1
+    if isinstance(sent, Message):
+        _remember(sent, digest)
+    return sent
+
+
+async def notify(target, text: str, parse_mode: str = None):
+    """Отправить отдельное сообщение в чат экрана (ошибки, уведомления)"""
+    if isinstance(target, CallbackQuery):
+        if isinstance(target.message, Message):
+            target = target.message
+        else:
+            stats["sent"] += 1
+            return await target.bot.send_message(
+                target.from_user.id, text, parse_mode=parse_mode
+            )
+    stats["sent"] += 1
+    return await target.answer(text, parse_mode=parse_mode)
+
+
+async def render(target, text: str, reply_markup=None, parse_mode: str = "HTML"):
+    """Показать экран.
+
+    ``target`` — CallbackQuery (редактируется сообщение с нажатой кнопкой)
+    или Message (команда или кнопка главного меню — отправляется новое).
+    """
+    digest = content_hash(text, reply_markup)
+
+    if not isinstance(target, CallbackQuery):
+        return await _send(target, text, reply_markup, parse_mode, digest)
+
+    message = target.message
+    editable = (
+        isinstance(message, Message)
+        and message.text is not None
+        and (reply_markup is None or isinstance(reply_markup, InlineKeyboardMarkup))
+    )
+    if not editable:
+        if not isinstance(message, Message):
+            # Сообщение недоступно (слишком старое) — пишем в личный чат
+            stats["sent"] += 1
+            return await target.bot.send_message(
+                target.from_user.id,
+                text,
+                reply_markup=reply_markup,
+                parse_mode=parse_mode,
+            )
+        return await _send(message, text, reply_markup, parse_mode, digest)
+
+    key = (message.chat.id, message.message_id)
+    if _rendered.get(key) == digest:
+        stats["skipped"] += 1
+        return message
+
+    try:
+        await message.edit_text(text, reply_markup=reply_markup, parse_mode=parse_mode)
+    except TelegramBadRequest as e:
+        if "message is not modified" in str(e):
+            stats["skipped"] += 1
+            _remember(message, digest)
+            return message
+        logger.info(f"✏️ Редактирование невозможно ({e}), отправляем новое сообщение")
+        stats["fallback"] += 1
+        return await _send(message, text, reply_markup, parse_mode, digest)
+
+    stats["edited"] += 1
+    _remember(message, digest)
+    return message
@@ -0,0 +1,274 @@
+# src/outbox.py
+"""Очередь отправки напоминаний с захватом по аренде.
+
+Таблицы ``task_reminders`` и ``event_reminders`` работают как outbox:
+
+    pending → claimed (до lease_until) → sent / failed
+
+Отправитель сначала захватывает пачку наступивших напоминаний одним
+``UPDATE ... RETURNING`` под блокировкой записи: два процесса (или два
+запуска в одном процессе) не получат одну и ту же строку. Захват помечен
+токеном отправителя и действует ``LEASE_SECONDS``; отметить напоминание
+отправленным или вернуть его в очередь может только владелец токена.
+Если процесс упал, не завершив пачку, аренда истекает и строки снова
+захватываются — потерь нет, а повтор возможен только для сообщений,
+отправленных перед самым падением.
+
+``reminder_sent = 1`` у завершённых строк (sent и failed), поэтому
+запросы неотправленных напоминаний и частичный индекс по ним прежние.
+У ожидающих строк ``lease_until`` пуст, условие захвата
+``IFNULL(lease_until, 0) <= now`` покрывает и свободные, и просроченные.
+
+Неудачная отправка возвращается в очередь с экспоненциальной задержкой
+(время следующей попытки хранится в ``lease_until``). После
+``MAX_ATTEMPTS`` попыток или при постоянной ошибке строка завершается
+как failed и записывается в ``dead_letters``; если бот не может писать
+пользователю (заблокирован, чат удалён), пользователь отключается: его
+ожидающие напоминания удаляются, сверки его не читают. ``/start``
+включает пользователя обратно.
+
+Функции выполняются в потоке БД, соединение передаёт вызывающий код.
+"""
+
+import json
+import os
+import random
+import socket
+import uuid
+
+PENDING = "pending"
+CLAIMED = "claimed"
+SENT = "sent"
+FAILED = "failed"
+
+# Аренда должна с запасом покрывать отправку одной пачки
+# (CLAIM_BATCH сообщений при глобальном лимите ~30 в секунду)
+LEASE_SECONDS = int(os.getenv("REMINDER_LEASE_SECONDS", "300"))
+CLAIM_BATCH = 500
+
+# Классы ошибок отправки (src/delivery.py:classify_error)
+TRANSIENT = "transient"  # сеть, 5xx, исчерпанные 429 — повторить позже
+PERMANENT = "permanent"  # повтор не поможет — сразу в dead letters
+UNREACHABLE = "unreachable"  # бот не может писать пользователю
+
+MAX_ATTEMPTS = int(os.getenv("REMINDER_MAX_ATTEMPTS", "6"))
+BACKOFF_BASE = 60  # секунд до второй попытки
+BACKOFF_MAX = 6 * 3600
+
+# Счётчики для метрик: повторы, dead letters, отключённые пользователи
+stats = {"retries": 0, "dead_letters": 0, "deactivated": 0}
+
+
+def new_claim_token() -> str:
+    """Уникальный токен захвата: хост, процесс и случайный суффикс"""
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+def claim(
+    conn,
+    table: str,
+    now_ts: int,
+    token: str,
+    lease: int = LEASE_SECONDS,
+    limit: int = None,
+) -> list:
+    """Захватить до limit (по умолчанию CLAIM_BATCH) наступивших
+    напоминаний, вернуть их id.
+
+    IMMEDIATE берёт блокировку записи до чтения: второй отправитель
+    дождётся её и увидит строки уже захваченными.
+    """
+    if limit is None:
+        limit = CLAIM_BATCH
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        rows = conn.execute(
+            f"""
+            UPDATE {table}
+            SET state = '{CLAIMED}', claim_token = ?, lease_until = ?
+            WHERE id IN (
+                SELECT id FROM {table}
+                WHERE reminder_sent = 0 AND reminder_ts <= ?
+                AND IFNULL(lease_until, 0) <= ?
+                ORDER BY reminder_ts
+                LIMIT ?
+            )
+            RETURNING id
+            """,
+            (token, now_ts + lease, now_ts, now_ts, limit),
+        ).fetchall()
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return [row[0] for row in rows]
+
+
+def finish(conn, table: str, reminder_ids, token: str, state: str = SENT) -> int:
+    """Завершить захваченные напоминания (sent или failed).
+
+    Строки, захват которых истёк и перешёл к другому отправителю, не
+    меняются. Изменения коммитятся вызывающим кодом.
+    """
+    cursor = conn.executemany(
+        f"""
+        UPDATE {table}
+        SET state = ?, reminder_sent = 1, lease_until = NULL
+        WHERE id = ? AND claim_token = ? AND state = '{CLAIMED}'
+        """,
+        [(state, reminder_id, token) for reminder_id in reminder_ids],
+    )
+    return cursor.rowcount
+
+
+def backoff(attempts: int, rng=random) -> int:
+    """Задержка перед следующей попыткой после attempts неудачных.
+
+    Экспонента с джиттером: случайная точка второй половины интервала,
+    чтобы отказавшие вместе отправки не повторялись одной волной.
+    """
+    delay = min(BACKOFF_MAX, BACKOFF_BASE * 2 ** (attempts - 1))
+    return round(rng.uniform(delay / 2, delay))
+
+
+def release(conn, table: str, failures, token: str, now_ts: int) -> tuple:
+    """Разобрать неудачные отправки захваченных напоминаний.
+
+    failures — [(reminder_id, telegram_id, класс ошибки, текст ошибки)].
+    Временные ошибки возвращают строку в очередь с задержкой, остальные и
+    исчерпавшие попытки завершают её как failed с записью в dead_letters.
+    Возвращает (повторов, dead letters). Изменения коммитятся вызывающим
+    кодом.
+    """
+    retried = dead = 0
+    unreachable = set()
+    for reminder_id, telegram_id, error_class, error in failures:
+        row = conn.execute(
+            f"""
+            UPDATE {table} SET attempts = attempts + 1
+            WHERE id = ? AND claim_token = ? AND state = '{CLAIMED}'
+            RETURNING attempts
+            """,
+            (reminder_id, token),
+        ).fetchone()
+        if row is None:
+            continue  # захват истёк и перешёл к другому отправителю
+        attempts = row[0]
+
+        if error_class == TRANSIENT and attempts < MAX_ATTEMPTS:
+            conn.execute(
+                f"""
+                UPDATE {table}
+                SET state = '{PENDING}', claim_token = NULL, lease_until = ?
+                WHERE id = ?
+                """,
+                (now_ts + backoff(attempts), reminder_id),
+            )
+            retried += 1
+            continue
+
+        conn.execute(
+            f"""
+            UPDATE {table}
+            SET state = '{FAILED}', reminder_sent = 1, lease_until = NULL
+            WHERE id = ?
+            """,
+            (reminder_id,),
+        )
+        conn.execute(
+            """
+            INSERT INTO dead_letters
+                (kind, reminder_id, telegram_id, attempts, error, failed_ts)
+            VALUES (?, ?, ?, ?, ?, ?)
+            """,
+            (table, reminder_id, telegram_id, attempts, error, now_ts),
+        )
+        dead += 1
+        if error_class == UNREACHABLE:
+            unreachable.add(telegram_id)
+
+    if unreachable:
+        deactivate_users(conn, unreachable)
+    stats["retries"] += retried
+    stats["dead_letters"] += dead
+    return retried, dead
+
+
+def deactivate_users(conn, telegram_ids) -> int:
+    """Отключить пользователей, которым бот не может писать.
+
+    Их ожидающие напоминания удаляются (при включении их пересоздаст
+    сверка), события уходят из окна сверки (plan_ts = NULL).
+    """
+    ids = json.dumps(list(telegram_ids))
+    deactivated = conn.execute(
+        """
+        UPDATE users SET is_active = 0
+        WHERE telegram_id IN (SELECT value FROM json_each(?)) AND is_active = 1
+        """,
+        (ids,),
+    ).rowcount
+    conn.execute(
+        """
+        DELETE FROM task_reminders WHERE reminder_sent = 0 AND task_id IN (
+            SELECT id FROM tasks WHERE user_id IN (SELECT value FROM json_each(?))
+        )
+        """,
+        (ids,),
+    )
+    conn.execute(
+        """
+        DELETE FROM event_reminders WHERE reminder_sent = 0 AND event_id IN (
+            SELECT id FROM events WHERE user_id IN (SELECT value FROM json_each(?))
+        )
+        """,
+        (ids,),
+    )
+    conn.execute(
+        """
+        UPDATE events SET plan_ts = NULL
+        WHERE user_id IN (SELECT value FROM json_each(?))
+        """,
+        (ids,),
+    )
+    stats["deactivated"] += deactivated
+    return deactivated
+
+
+def reactivate_user(conn, telegram_id: int) -> bool:
+    """Включить пользователя обратно (он снова написал боту).
+
+    Ближайшая сверка пересоздаст напоминания его задач и событий.
+    Изменения коммитятся вызывающим кодом.
+    """
+    updated = conn.execute(
+        "UPDATE users SET is_active = 1 WHERE telegram_id = ? AND is_active = 0",
+        (telegram_id,),
+    ).rowcount
+    if not updated:
+        return False
+    conn.execute(
+        "UPDATE tasks SET last_reminder_sent = NULL "
+        "WHERE user_id = ? AND is_completed = 0",
+        (telegram_id,),
+    )
+    conn.execute(
+        "UPDATE events SET plan_ts = next_ts WHERE user_id = ?", (telegram_id,)
+    )
+    return True
+
+
+def leased(conn, table: str, now_ts: int) -> list:
+    """Наступившие напоминания, захваченные другими: [(id, lease_until)].
+
+    Планировщик ставит их на время истечения аренды, чтобы подобрать
+    строки упавшего отправителя.
+    """
+    return conn.execute(
+        f"""
+        SELECT id, lease_until FROM {table}
+        WHERE reminder_sent = 0 AND reminder_ts <= ? AND lease_until > ?
+        """,
+        (now_ts, now_ts),
+    ).fetchall()
+
@@ -0,0 +1,114 @@
+# src/pagination.py
+"""Постраничный вывод списков по ключу (keyset pagination).
+
+Страница выбирается условием ``(k1, k2, ..., id) > (?, ?, ..., ?)`` по тому
+же порядку, что и полный список, с ``LIMIT PAGE_SIZE + 1``: каждая страница —
+один запрос по индексу независимо от длины списка и от номера страницы.
+Курсор (ключ первой или последней строки) целиком лежит в callback_data
+кнопки, поэтому навигация не зависит от памяти процесса и работает после
+перезапуска и на нескольких экземплярах бота.
+
+Формат callback_data: ``<prefix><n|p><позиция>_<ключ1>_<ключ2>...``, где
+n — следующая страница (строки после ключа), p — предыдущая (строки до
+ключа), позиция — номер первой строки страницы для нумерации.
+"""
+
+PAGE_SIZE = 5
+
+
+class Page:
+    """Страница списка и ключи её границ"""
+
+    def __init__(self, items: list, key_columns: tuple, position: int,
+                 has_prev: bool, has_next: bool):
+        self.items = items
+        self.key_columns = key_columns
+        self.position = position
+        self.has_prev = has_prev
+        self.has_next = has_next
+
+    def _key(self, item: dict) -> tuple:
+        return tuple(item[column] for column in self.key_columns)
+
+    def next_data(self, prefix: str):
+        """callback_data кнопки «Далее» или None"""
+        if not self.has_next:
+            return None
+        return encode_cursor(
+            prefix, "n", self.position + len(self.items), self._key(self.items[-1])
+        )
+
+    def prev_data(self, prefix: str):
+        """callback_data кнопки «Назад» или None"""
+        if not self.has_prev:
+            return None
+        return encode_cursor(
+            prefix, "p", max(0, self.position - PAGE_SIZE), self._key(self.items[0])
+        )
+
+
+def encode_cursor(prefix: str, direction: str, position: int, key: tuple) -> str:
+    return f"{prefix}{direction}{position}_" + "_".join(str(part) for part in key)
+
+
+def decode_cursor(data: str, prefix: str, key_types: tuple):
+    """callback_data -> (direction, position, key) или None для первой страницы.
+
+    Старые кнопки со смещением (``tasks_page_5``) и повреждённые данные
+    открывают первую страницу.
+    """
+    parts = data[len(prefix):].split("_")
+    if len(parts) != len(key_types) + 1 or parts[0][:1] not in ("n", "p"):
+        return None
+    try:
+        position = int(parts[0][1:])
+        key = tuple(cast(part) for cast, part in zip(key_types, parts[1:]))
+    except ValueError:
+        return None
+    return parts[0][0], position, key
+
+
+def fetch_page(conn, select_sql: str, params: tuple, key_columns: tuple,
+               cursor=None) -> Page:
+    """Выполнить keyset-запрос страницы.
+
+    ``select_sql`` — SELECT с условием WHERE (без ORDER BY), выбирающий
+    в том числе ``key_columns``; последний ключ должен быть уникальным (id).
+    """
+    columns = ", ".join(key_columns)
+    placeholders = ", ".join("?" for _ in key_columns)
+
+    if cursor is None:
+        direction, position, key = "n", 0, None
+    else:
+        direction, position, key = cursor
+
+    if key is None:
+        sql = f"{select_sql} ORDER BY {columns} LIMIT ?"
+        args = (*params, PAGE_SIZE + 1)
+    elif direction == "n":
+        sql = (
+            f"{select_sql} AND ({columns}) > ({placeholders}) "
+            f"ORDER BY {columns} LIMIT ?"
+        )
+        args = (*params, *key, PAGE_SIZE + 1)
+    else:
+        descending = ", ".join(f"{column} DESC" for column in key_columns)
+        sql = (
+            f"{select_sql} AND ({columns}) < ({placeholders}) "
+            f"ORDER BY {descending} LIMIT ?"
+        )
+        args = (*params, *key, PAGE_SIZE + 1)
+
+    rows = [dict(row) for row in conn.execute(sql, args).fetchall()]
+    more = len(rows) > PAGE_SIZE
+    rows = rows[:PAGE_SIZE]
+
+    if direction == "p" and key is not None:
+        rows.reverse()
+        # Назад упёрлись в начало списка — нумерация с первой строки
+        if not more:
+            position = 0
+        return Page(rows, key_columns, position, has_prev=more, has_next=True)
+
+    return Page(rows, key_columns, position, has_prev=key is not None, has_next=more)
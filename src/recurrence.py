@@ -0,0 +1,180 @@
+# src/recurrence.py
+"""Вхождения повторяющихся событий.
+
+Событие хранит только начало серии (``event_ts``), правило
+(``recurrence_rule``: daily/weekly/monthly/yearly) и необязательные
+границы: ``recurrence_until`` (epoch последнего допустимого момента) и
+``recurrence_count`` (число вхождений). Пропущенные вхождения лежат в
+``event_exceptions``. Сами вхождения в БД не материализуются:
+``occurrences()`` лениво порождает их, начиная сразу с нужного номера,
+без перебора серии с начала.
+
+Для списков в ``events.next_ts`` хранится ближайшее непрошедшее
+вхождение. Его сбрасывает на начало серии триггер при изменении
+расписания, а ``advance_series()`` догоняет до текущего времени только
+устаревшие серии (``next_ts < now``). У разовых событий и закончившихся
+серий ``series_active = 0``, next_ts больше не двигается. Напоминания
+создаются для вхождений в скользящем окне (src/event_reminders.py,
+курсор ``events.plan_ts``).
+"""
+
+import calendar
+import json
+from datetime import datetime, timedelta
+
+from src.timestamps import from_epoch, to_epoch
+
+RULES = ("daily", "weekly", "monthly", "yearly")
+
+# Фиксированный шаг правила; месяцы и годы считаются по календарю
+PERIODS = {"daily": timedelta(days=1), "weekly": timedelta(weeks=1)}
+
+# Колонки события, нужные для расчёта вхождений
+SERIES_COLUMNS = "id, event_ts, recurrence_rule, recurrence_until, recurrence_count"
+
+
+def is_series(event) -> bool:
+    """Повторяется ли событие (правило "none" и пустое — разовые)"""
+    return event["recurrence_rule"] in RULES
+
+
+def nth_occurrence(start: datetime, rule: str, n: int) -> datetime:
+    """n-е вхождение серии (0 — начало).
+
+    Время суток сохраняется по местным часам. 31-е число в коротких месяцах
+    и 29 февраля в невисокосные годы сдвигаются на последний день месяца,
+    следующее вхождение снова считается от дня начала серии.
+    """
+    if rule in PERIODS:
+        return start + PERIODS[rule] * n
+    months = n if rule == "monthly" else 12 * n
+    year, month = divmod(start.month - 1 + months, 12)
+    year += start.year
+    day = min(start.day, calendar.monthrange(year, month + 1)[1])
+    return start.replace(year=year, month=month + 1, day=day)
+
+
+def _first_index(start: datetime, rule: str, after: datetime) -> int:
+    """Номер первого вхождения не раньше after"""
+    if after <= start:
+        return 0
+    if rule in PERIODS:
+        n = (after - start) // PERIODS[rule]
+    elif rule == "monthly":
+        n = (after.year - start.year) * 12 + after.month - start.month - 1
+    else:
+        n = after.year - start.year - 1
+    # Оценка снизу: до нужного вхождения остаётся не больше двух шагов
+    n = max(n, 0)
+    while nth_occurrence(start, rule, n) < after:
+        n += 1
+    return n
+
+
+def occurrences(
+    start: datetime,
+    rule: str = None,
+    after: datetime = None,
+    until: datetime = None,
+    count: int = None,
+    exceptions=(),
+):
+    """Ленивый генератор вхождений серии не раньше after.
+
+    count ограничивает число вхождений серии вместе с пропущенными
+    (как COUNT и EXDATE в RFC 5545): пропуск не продлевает серию.
+    Без правила серия состоит из одного вхождения — start.
+    """
+    if rule not in RULES:
+        rule, count = "daily", 1
+
+    n = _first_index(start, rule, after) if after is not None else 0
+    while count is None or n < count:
+        when = nth_occurrence(start, rule, n)
+        if until is not None and when > until:
+            return
+        if when not in exceptions:
+            yield when
+        n += 1
+
+
+def event_occurrences(event, after: datetime = None, exceptions=()):
+    """Вхождения события (строка с колонками SERIES_COLUMNS)"""
+    until = event["recurrence_until"]
+    return occurrences(
+        from_epoch(event["event_ts"]),
+        event["recurrence_rule"],
+        after=after,
+        until=from_epoch(until) if until is not None else None,
+        count=event["recurrence_count"],
+        exceptions=exceptions,
+    )
+
+
+# ==================== ХРАНЕНИЕ (в потоке БД) ====================
+
+
+def fetch_exceptions(conn, event_ids: list) -> dict:
+    """Пропущенные вхождения событий: event_id -> {datetime}"""
+    exceptions = {}
+    rows = conn.execute(
+        """
+        SELECT event_id, occurrence_ts FROM event_exceptions
+        WHERE event_id IN (SELECT value FROM json_each(?))
+        """,
+        (json.dumps(event_ids),),
+    )
+    for event_id, occurrence_ts in rows:
+        exceptions.setdefault(event_id, set()).add(from_epoch(occurrence_ts))
+    return exceptions
+
+
+def _next_position(event, now: datetime, exceptions) -> tuple:
+    """(next_ts, series_active) серии на момент now"""
+    upcoming = next(event_occurrences(event, now, exceptions), None)
+    if upcoming is not None:
+        return to_epoch(upcoming), 1
+
+    # Серия закончилась: в списках остаётся её последнее вхождение.
+    # Границы есть у каждой закончившейся серии, перебор конечен
+    last = None
+    for last in event_occurrences(event, from_epoch(event["next_ts"]), exceptions):
+        pass
+    return (to_epoch(last) if last else event["next_ts"]), 0
+
+
+def refresh_series(conn, events, now: datetime) -> int:
+    """Пересчитать next_ts серий (строки с SERIES_COLUMNS и next_ts)"""
+    events = [event for event in events if is_series(event)]
+    if not events:
+        return 0
+
+    exceptions = fetch_exceptions(conn, [event["id"] for event in events])
+    updates = []
+    for event in events:
+        next_ts, active = _next_position(event, now, exceptions.get(event["id"], ()))
+        updates.append((next_ts, active, event["id"]))
+
+    conn.executemany(
+        "UPDATE events SET next_ts = ?, series_active = ? WHERE id = ?", updates
+    )
+    return len(updates)
+
+
+def advance_series(conn, now: datetime, user_id: int = None) -> int:
+    """Догнать next_ts серий, ближайшее вхождение которых прошло.
+
+    Читаются только устаревшие серии (частичный индекс по next_ts
+    активных серий или индекс списка пользователя); изменения
+    коммитятся вызывающим кодом.
+    """
+    if user_id is None:
+        condition, params = "series_active = 1 AND next_ts < ?", (to_epoch(now),)
+    else:
+        condition = "user_id = ? AND next_ts < ? AND series_active = 1"
+        params = (user_id, to_epoch(now))
+
+    stale = conn.execute(
+        f"SELECT {SERIES_COLUMNS}, next_ts FROM events WHERE {condition}", params
+    ).fetchall()
+    return refresh_series(conn, stale, now)
@@ -0,0 +1,244 @@
+# src/reminder_scheduler.py
+"""Планировщик напоминаний на основе кучи.
+
+Вместо опроса БД каждые 30/60 секунд планировщик держит в памяти
+min-кучу ``(reminder_time, kind, reminder_id)`` и спит ровно до ближайшего
+напоминания. Новые и изменённые напоминания добавляются через
+``schedule()``, который будит цикл, если новое время раньше текущего.
+
+Время берётся из часов ``clock`` (src/clock.py): симуляция передаёт
+виртуальные часы, привязывает планировщик через ``bind()`` и вместо
+ожидания сама переводит часы на ``next_due()`` и вызывает ``dispatch_due()``.
+
+Отправка идёт в фоне и не держит цикл: пока расходится пачка утренних
+напоминаний о задачах, срочное напоминание о событии отправляется в срок
+и обгоняет пачку за общим лимитом (приоритеты src/delivery.py).
+Параллельные отправки одного типа безопасны — напоминания захватываются
+из очереди (src/outbox.py).
+"""
+
+import asyncio
+import heapq
+import itertools
+import logging
+import threading
+from collections import deque
+from datetime import datetime
+
+from src.clock import system_clock
+
+logger = logging.getLogger(__name__)
+
+# Страховочный интервал: раз в час перечитываем ожидающие напоминания из БД,
+# чтобы подхватить строки, созданные в обход планировщика
+MAX_SLEEP_SECONDS = 3600
+
+# Границы корзин гистограммы задержки отправки, в секундах
+LAG_BUCKETS = (0.1, 0.25, 0.5, 1.0, 5.0, 30.0, 60.0)
+
+
+class ReminderScheduler:
+    def __init__(
+        self,
+        max_sleep: float = MAX_SLEEP_SECONDS,
+        lag_samples: int = 10000,
+        clock=system_clock,
+    ):
+        self.max_sleep = max_sleep
+        self.clock = clock
+        self.running = False
+
+        self._heap = []
+        self._planned = {}  # (kind, reminder_id) -> timestamp, для отсева устаревших записей
+        self._counter = itertools.count()
+        self._handlers = {}
+        self._loaders = {}
+
+        self._wakeup = None
+        self._loop = None
+        self._loop_thread = None
+        self._dispatching = set()
+
+        self.lag_samples = deque(maxlen=lag_samples)
+        self.stats = {"wakeups": 0, "dispatches": 0, "reloads": 0}
+
+    def register(self, kind: str, handler, loader):
+        """Зарегистрировать тип напоминаний.
+
+        handler — корутина без аргументов, отправляющая наступившие напоминания;
+        loader — синхронная функция, возвращающая [(reminder_id, reminder_time)]
+        для всех неотправленных напоминаний этого типа.
+        """
+        self._handlers[kind] = handler
+        self._loaders[kind] = loader
+
+    # ==================== ПЛАНИРОВАНИЕ ====================
+
+    def schedule(self, kind: str, reminder_id: int, when: datetime):
+        """Добавить или перенести напоминание (можно вызывать из любого потока)"""
+        if self._loop is None:
+            return
+        if threading.get_ident() != self._loop_thread:
+            self._loop.call_soon_threadsafe(self._push, kind, reminder_id, when)
+        else:
+            self._push(kind, reminder_id, when)
+
+    def _push(self, kind: str, reminder_id: int, when: datetime):
+        timestamp = when.timestamp()
+        self._planned[(kind, reminder_id)] = timestamp
+        earliest = self._heap[0][0] if self._heap else None
+        heapq.heappush(self._heap, (timestamp, next(self._counter), kind, reminder_id))
+
+        # Будим цикл, только если новое напоминание раньше ближайшего
+        if earliest is None or timestamp < earliest:
+            self._wakeup.set()
+
+    async def load_pending(self):
+        """Загрузить все неотправленные напоминания из БД"""
+        from src.repository import db
+
+        self._heap.clear()
+        self._planned.clear()
+        for kind, loader in self._loaders.items():
+            rows = await db.run(loader)
+            for reminder_id, reminder_time in rows:
+                when = parse_reminder_time(reminder_time)
+                if when is not None:
+                    self._push(kind, reminder_id, when)
+        self.stats["reloads"] += 1
+        logger.info(f"⏱️ Загружено напоминаний в планировщик: {len(self._planned)}")
+
+    # ==================== ЦИКЛ ====================
+
+    def bind(self):
+        """Привязать планировщик к текущему циклу событий без запуска ожидания"""
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread = threading.get_ident()
+        self._wakeup = asyncio.Event()
+
+    async def start(self):
+        """Запуск планировщика"""
+        self.bind()
+        self.running = True
+        logger.info("🚀 Планировщик напоминаний запущен")
+
+        await self.load_pending()
+
+        while self.running:
+            try:
+                delay = self._next_delay()
+                if delay > 0:
+                    self._wakeup.clear()
+                    try:
+                        await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+                    except asyncio.TimeoutError:
+                        if not self._heap or self._heap[0][0] > self.clock.time():
+                            # Истёк страховочный интервал — сверяемся с БД
+                            await self.load_pending()
+                            continue
+                    self.stats["wakeups"] += 1
+                    continue
+
+                dispatch = asyncio.create_task(self.dispatch_due())
+                self._dispatching.add(dispatch)
+                dispatch.add_done_callback(self._dispatching.discard)
+            except Exception as e:
+                logger.error(f"Ошибка в планировщике напоминаний: {e}", exc_info=True)
+                await asyncio.sleep(1)
+
+    async def stop(self):
+        """Остановка планировщика"""
+        self.running = False
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+        # Незавершённые отправки прерываем: захват их напоминаний истечёт,
+        # и они уйдут при следующем запуске
+        for dispatch in list(self._dispatching):
+            dispatch.cancel()
+        await asyncio.gather(*self._dispatching, return_exceptions=True)
+        logger.info("🛑 Планировщик напоминаний остановлен")
+
+    def _next_delay(self) -> float:
+        if not self._heap:
+            return self.max_sleep
+        return min(self._heap[0][0] - self.clock.time(), self.max_sleep)
+
+    def next_due(self):
+        """Время ближайшего запланированного напоминания (epoch) или None"""
+        while self._heap:
+            timestamp, _, kind, reminder_id = self._heap[0]
+            if self._planned.get((kind, reminder_id)) == timestamp:
+                return timestamp
+            heapq.heappop(self._heap)  # перенесённое — устаревшая запись
+        return None
+
+    async def dispatch_due(self):
+        """Отправить все наступившие напоминания (типы — параллельно)"""
+        now = self.clock.time()
+        due = {}
+        while self._heap and self._heap[0][0] <= now:
+            timestamp, _, kind, reminder_id = heapq.heappop(self._heap)
+            # Пропускаем записи, перенесённые на другое время
+            if self._planned.get((kind, reminder_id)) != timestamp:
+                continue
+            del self._planned[(kind, reminder_id)]
+            due.setdefault(kind, []).append(timestamp)
+
+        await asyncio.gather(
+            *(self._dispatch(kind, timestamps) for kind, timestamps in due.items())
+        )
+
+    async def _dispatch(self, kind: str, timestamps: list):
+        handler = self._handlers.get(kind)
+        if handler is None:
+            return
+        self.stats["dispatches"] += 1
+        try:
+            await handler()
+        except Exception as e:
+            logger.error(f"Ошибка при отправке напоминаний ({kind}): {e}", exc_info=True)
+
+        finished = self.clock.time()
+        self.lag_samples.extend(finished - ts for ts in timestamps)
+
+    def lag_histogram(self) -> dict:
+        """Гистограмма задержки отправки относительно reminder_time"""
+        histogram = {f"<={bound}s": 0 for bound in LAG_BUCKETS}
+        histogram[f">{LAG_BUCKETS[-1]}s"] = 0
+        for lag in self.lag_samples:
+            for bound in LAG_BUCKETS:
+                if lag <= bound:
+                    histogram[f"<={bound}s"] += 1
+                    break
+            else:
+                histogram[f">{LAG_BUCKETS[-1]}s"] += 1
+        return histogram
+
+
+def parse_reminder_time(value):
+    """Разбор времени напоминания из БД: epoch-секунды или текст"""
+    if isinstance(value, datetime):
+        return value
+    if isinstance(value, (int, float)):
+        return datetime.fromtimestamp(value)
+    # fromisoformat реализован на C и на порядок быстрее strptime,
+    # что заметно при загрузке сотен тысяч напоминаний
+    try:
+        return datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        pass
+    logger.error(f"❌ Некорректное время напоминания: {value}")
+    return None
+
+
+# Синглтон экземпляр
+_reminder_scheduler = None
+
+
+def get_reminder_scheduler() -> ReminderScheduler:
+    """Получить экземпляр планировщика напоминаний"""
+    global _reminder_scheduler
+    if _reminder_scheduler is None:
+        _reminder_scheduler = ReminderScheduler()
+    return _reminder_scheduler
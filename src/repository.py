@@ -0,0 +1,313 @@
+# src/repository.py
+"""Асинхронный слой доступа к данным.
+
+Все синхронные функции из ``src/handlers/*/base.py`` выполняются в
+выделенных потоках БД через очередь ThreadPoolExecutor, поэтому медленный
+запрос или заблокированная база не останавливают цикл событий aiogram.
+Каждый поток БД переиспользует своё соединение из пула (src/db_pool.py).
+"""
+
+import asyncio
+import functools
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from src import outbox
+from src.database import get_connection
+from src.timestamps import date_to_epoch, today_epoch
+
+logger = logging.getLogger(__name__)
+
+DB_WORKERS = int(os.getenv("DB_WORKERS", "2"))
+
+USER_COUNTERS = (
+    "active_tasks",
+    "completed_tasks",
+    "events",
+    "lessons",
+    "overdue_tasks",
+    "upcoming_deadlines",
+    "completed_this_week",
+)
+
+
+# ==================== СИНХРОННЫЕ ЗАПРОСЫ ====================
+
+
+def register_user(telegram_id: int, username, first_name, last_name):
+    """Регистрация пользователя (если его ещё нет).
+
+    Отключённый после ошибок доставки пользователь включается снова
+    """
+    conn = get_connection()
+    try:
+        outbox.reactivate_user(conn, telegram_id)
+        conn.execute(
+            """
+            INSERT OR IGNORE INTO users (telegram_id, username, first_name, last_name)
+            VALUES (?, ?, ?, ?)
+            """,
+            (telegram_id, username, first_name, last_name),
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def get_user_counters(user_id: int, now: datetime = None) -> dict:
+    """Статистика пользователя для /stats одним запросом.
+
+    Количества задач, событий и уроков ведут триггеры в таблице user_stats
+    (поиск по первичному ключу). Счётчики, зависящие от текущей даты
+    (просроченные, дедлайны на неделю, завершённые за неделю), считаются
+    диапазоном по индексам задач и читают только попавшие в него записи.
+    """
+    now = now or datetime.now()
+    today = today_epoch(now)
+    week_start = date_to_epoch(now.date() - timedelta(days=now.weekday()))
+
+    conn = get_connection()
+    try:
+        row = conn.execute(
+            """
+            SELECT
+                active_tasks,
+                completed_tasks,
+                events,
+                lessons,
+                (
+                    SELECT COUNT(*) FROM tasks
+                    WHERE user_id = :user_id AND is_completed = 0
+                      AND deadline_ts < :today
+                ) AS overdue_tasks,
+                (
+                    SELECT COUNT(*) FROM tasks
+                    WHERE user_id = :user_id AND is_completed = 0
+                      AND deadline_ts BETWEEN :today AND :week_ahead
+                ) AS upcoming_deadlines,
+                (
+                    SELECT COUNT(*) FROM tasks
+                    WHERE user_id = :user_id AND is_completed = 1
+                      AND completed_at >= :week_start
+                ) AS completed_this_week
+            FROM user_stats
+            WHERE user_id = :user_id
+            """,
+            {
+                "user_id": user_id,
+                "today": today,
+                "week_ahead": today + 7 * 86400,
+                "week_start": week_start,
+            },
+        ).fetchone()
+    finally:
+        conn.close()
+
+    # Строки нет — у пользователя ещё не было ни задач, ни событий, ни уроков
+    return dict(row) if row else dict.fromkeys(USER_COUNTERS, 0)
+
+
+def set_reminder_time(telegram_id: int, value: str = None) -> bool:
+    """Личное время утренних напоминаний ('ЧЧ:ММ') или None — по умолчанию.
+
+    Открытые задачи пользователя помечаются для пересчёта напоминаний
+    ближайшей сверкой.
+    """
+    conn = get_connection()
+    try:
+        updated = conn.execute(
+            "UPDATE users SET reminder_time = ? WHERE telegram_id = ?",
+            (value, telegram_id),
+        ).rowcount
+        conn.execute(
+            "UPDATE tasks SET last_reminder_sent = NULL "
+            "WHERE user_id = ? AND is_completed = 0",
+            (telegram_id,),
+        )
+        conn.commit()
+    finally:
+        conn.close()
+    return bool(updated)
+
+
+# ==================== АСИНХРОННЫЙ РЕПОЗИТОРИЙ ====================
+
+
+class AsyncRepository:
+    """Awaitable-обёртки над функциями работы с БД"""
+
+    def __init__(self, max_workers: int = DB_WORKERS):
+        self.max_workers = max_workers
+        self._executor = None
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers, thread_name_prefix="db"
+            )
+        return self._executor
+
+    async def run(self, func, *args, **kwargs):
+        """Выполнить синхронную функцию в потоке БД"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._get_executor(), functools.partial(func, *args, **kwargs)
+        )
+
+    def shutdown(self):
+        """Дождаться завершения запросов и остановить потоки БД"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    # ---------- Пользователи ----------
+
+    async def register_user(self, telegram_id: int, username, first_name, last_name):
+        await self.run(register_user, telegram_id, username, first_name, last_name)
+
+    async def get_user_counters(self, user_id: int) -> dict:
+        return await self.run(get_user_counters, user_id)
+
+    async def set_reminder_time(self, telegram_id: int, value: str = None) -> bool:
+        return await self.run(set_reminder_time, telegram_id, value)
+
+    # ---------- Задачи ----------
+    # Модули base импортируются лениво: пакет src.handlers сам импортирует
+    # репозиторий, и импорт на уровне модуля дал бы циклическую зависимость
+
+    async def save_task(self, user_id: int, data: dict):
+        from src.handlers.tasks import base
+
+        return await self.run(base.save_task, user_id, data)
+
+    async def update_task(self, task_id: int, field: str, value):
+        from src.handlers.tasks import base
+
+        return await self.run(base.update_task, task_id, field, value)
+
+    async def get_task(self, task_id: int):
+        from src.handlers.tasks import base
+
+        return await self.run(base.get_task, task_id)
+
+    async def get_user_tasks(self, user_id: int, only_active=True):
+        from src.handlers.tasks import base
+
+        return await self.run(base.get_user_tasks, user_id, only_active)
+
+    async def get_user_tasks_page(self, user_id: int, cursor=None):
+        from src.handlers.tasks import base
+
+        return await self.run(base.get_user_tasks_page, user_id, cursor)
+
+    async def get_task_overview(self, user_id: int):
+        from src.handlers.tasks import base
+
+        return await self.run(base.get_task_overview, user_id)
+
+    async def delete_task(self, task_id: int):
+        from src.handlers.tasks import base
+
+        return await self.run(base.delete_task, task_id)
+
+    async def get_tasks_statistics(self, user_id: int):
+        from src.handlers.tasks import base
+
+        return await self.run(base.get_tasks_statistics, user_id)
+
+    async def get_tasks_by_priority(self, user_id: int, priority: str):
+        from src.handlers.tasks import base
+
+        return await self.run(base.get_tasks_by_priority, user_id, priority)
+
+    async def get_upcoming_deadlines(self, user_id: int, days_ahead: int = 7):
+        from src.handlers.tasks import base
+
+        return await self.run(base.get_upcoming_deadlines, user_id, days_ahead)
+
+    # ---------- События ----------
+
+    async def save_event(self, user_id: int, data: dict):
+        from src.handlers.events import base
+
+        return await self.run(base.save_event, user_id, data)
+
+    async def update_event(self, event_id: int, field: str, value):
+        from src.handlers.events import base
+
+        return await self.run(base.update_event, event_id, field, value)
+
+    async def get_event(self, event_id: int):
+        from src.handlers.events import base
+
+        return await self.run(base.get_event, event_id)
+
+    async def get_user_events(self, user_id: int):
+        from src.handlers.events import base
+
+        return await self.run(base.get_user_events, user_id)
+
+    async def get_user_events_page(self, user_id: int, cursor=None):
+        from src.handlers.events import base
+
+        return await self.run(base.get_user_events_page, user_id, cursor)
+
+    async def skip_event_occurrence(self, event_id: int):
+        from src.handlers.events import base
+
+        return await self.run(base.skip_event_occurrence, event_id)
+
+    async def delete_event(self, event_id: int):
+        from src.handlers.events import base
+
+        return await self.run(base.delete_event, event_id)
+
+    # ---------- Расписание ----------
+
+    async def save_lesson(self, user_id: int, data: dict):
+        from src.handlers.schedule import base
+
+        return await self.run(base.save_lesson, user_id, data)
+
+    async def update_lesson(self, lesson_id: int, field: str, value):
+        from src.handlers.schedule import base
+
+        return await self.run(base.update_lesson, lesson_id, field, value)
+
+    async def get_lesson(self, lesson_id: int):
+        from src.handlers.schedule import base
+
+        return await self.run(base.get_lesson, lesson_id)
+
+    async def get_user_lessons(self, user_id: int):
+        from src.handlers.schedule import base
+
+        return await self.run(base.get_user_lessons, user_id)
+
+    async def get_user_lessons_page(self, user_id: int, cursor=None):
+        from src.handlers.schedule import base
+
+        return await self.run(base.get_user_lessons_page, user_id, cursor)
+
+    async def delete_lesson(self, lesson_id: int):
+        from src.handlers.schedule import base
+
+        return await self.run(base.delete_lesson, lesson_id)
+
+    # ---------- Поиск ----------
+
+    async def search(self, user_id: int, query: str, offset: int = 0):
+        from src.search import search
+
+        return await self.run(search, user_id, query, offset)
+
+    async def find_items(self, user_id: int, query: str):
+        from src.search import find_items
+
+        return await self.run(find_items, user_id, query)
+
+
+# Общий экземпляр репозитория
+db = AsyncRepository()
@@ -0,0 +1,120 @@
+# src/search.py
+"""Полнотекстовый поиск по задачам, событиям и урокам (SQLite FTS5).
+
+Индекс search_index ведут триггеры на tasks, events и schedule
+(src/migrations.py), поэтому он всегда совпадает с данными. Запрос
+разбивается на слова, каждое ищется как префикс («физ» найдёт «физика»),
+все слова должны встретиться. Результаты ранжируются по bm25: совпадение
+в заголовке весит больше, чем в описании.
+
+У ранжированного списка нет устойчивого ключа (оценка bm25 зависит от
+всего корпуса), поэтому страницы выбираются по смещению — результатов
+поиска обычно немного, и листают их недалеко.
+"""
+
+import re
+
+from src.database import get_connection
+from src.migrations import SEARCH_SOURCES
+from src.pagination import PAGE_SIZE, Page
+
+# Код вида в rowid -> вид результата, вид -> таблица
+KINDS = {0: "task", 1: "event", 2: "lesson"}
+TABLES = {KINDS[source[0]]: table for table, source in SEARCH_SOURCES.items()}
+
+MAX_QUERY_TERMS = 8
+
+# Длиннее самого длинного префиксного индекса (prefix в search_index)
+# слова обрезаются: такой префикс почти так же избирателен, но ищется
+# по готовому списку, а не слиянием списков всех его продолжений
+MAX_PREFIX_LENGTH = 8
+
+
+def build_match_query(user_id: int, query: str):
+    """Запрос пользователя -> выражение MATCH или None, если искать нечего.
+
+    Слова берутся только из букв и цифр и заключаются в кавычки, поэтому
+    синтаксис FTS5 (AND, NEAR, *, двоеточия) в запросе не интерпретируется.
+    """
+    query = query.lower().replace("ё", "е")
+    terms = re.findall(r"\w+", query)[:MAX_QUERY_TERMS]
+    if not terms:
+        return None
+    words = " ".join(f'"{term[:MAX_PREFIX_LENGTH]}"*' for term in terms)
+    return f"owner:u{user_id} AND ({words})"
+
+
+def _ranked(conn, match: str, limit: int, offset: int = 0, kinds=None) -> list:
+    """Найденные записи индекса по убыванию релевантности"""
+    sql = """
+        SELECT rowid, label, snippet(search_index, 2, '', '', '…', 8) AS snippet
+        FROM search_index
+        WHERE search_index MATCH ?
+    """
+    if kinds:
+        codes = ", ".join(str(code) for code, kind in KINDS.items() if kind in kinds)
+        sql += f" AND rowid % {len(SEARCH_SOURCES)} IN ({codes})"
+    rows = conn.execute(
+        sql + " ORDER BY rank LIMIT ? OFFSET ?", (match, limit, offset)
+    ).fetchall()
+
+    return [
+        {
+            "kind": KINDS[row["rowid"] % len(SEARCH_SOURCES)],
+            "id": row["rowid"] // len(SEARCH_SOURCES),
+            "title": row["label"],
+            "snippet": (row["snippet"] or "").strip(),
+        }
+        for row in rows
+    ]
+
+
+def search(user_id: int, query: str, offset: int = 0) -> Page:
+    """Страница результатов поиска, самые релевантные первыми"""
+    match = build_match_query(user_id, query)
+    if match is None:
+        return Page([], (), 0, has_prev=False, has_next=False)
+
+    conn = get_connection()
+    try:
+        items = _ranked(conn, match, PAGE_SIZE + 1, offset)
+    finally:
+        conn.close()
+
+    return Page(
+        items[:PAGE_SIZE],
+        (),
+        offset,
+        has_prev=offset > 0,
+        has_next=len(items) > PAGE_SIZE,
+    )
+
+
+def find_items(user_id: int, query: str, kinds=("task", "event"), limit: int = 20):
+    """Найденные записи целиком, по убыванию релевантности (inline-режим).
+
+    Каждый элемент — строка таблицы вида с добавленным ключом ``kind``.
+    """
+    match = build_match_query(user_id, query)
+    if match is None:
+        return []
+
+    conn = get_connection()
+    try:
+        found = _ranked(conn, match, limit, kinds=kinds)
+        rows = {}
+        for kind in kinds:
+            ids = [item["id"] for item in found if item["kind"] == kind]
+            if not ids:
+                continue
+            placeholders = ", ".join("?" for _ in ids)
+            for row in conn.execute(
+                f"SELECT * FROM {TABLES[kind]} "
+                f"WHERE user_id = ? AND id IN ({placeholders})",
+                (user_id, *ids),
+            ):
+                rows[(kind, row["id"])] = {"kind": kind, **dict(row)}
+    finally:
+        conn.close()
+
+    return [rows[key] for key in ((i["kind"], i["id"]) for i in found) if key in rows]
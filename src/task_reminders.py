@@ -2,32 +2,79 @@
 """Модуль напоминаний о задачах (дедлайнах)"""
 
 import asyncio
+import json
 import logging
-from datetime import datetime, timedelta
+import os
+import zlib
+from datetime import datetime, time, timedelta
+from functools import partial
 
 from aiogram import Bot
 
+from src import outbox
+from src.changes import DELETED, UPDATED, subscribe, unsubscribe
+from src.clock import system_clock
 from src.database import get_connection
+from src.delivery import get_delivery_pipeline
+from src.reminder_scheduler import get_reminder_scheduler
+from src.repository import db
+from src.timestamps import format_date, from_epoch, to_epoch, today_epoch
 
 logger = logging.getLogger(__name__)
 
 
+# Напоминания создаются при записи задач; периодическая сверка с БД —
+# только страховка от пропущенных уведомлений (например, правок из другого процесса)
+RECONCILE_INTERVAL = 3600
+
+# Дедлайн считается наступающим в 9:00 указанного дня
+DEADLINE_TIME = time(9, 0)
+
+# (дней до дедлайна, час, минута, тип напоминания)
+TASK_REMINDER_SCHEDULE = [
+    (7, 9, 0, "7d"),  # За 7 дней в 9:00
+    (3, 9, 0, "3d"),  # За 3 дня в 9:00
+    (1, 9, 0, "1d"),  # За 1 день в 9:00
+    (1, 21, 0, "12h"),  # За 12 часов в 21:00
+]
+
+# Сглаживание пика: без личного времени напоминания пользователя сдвигаются
+# на постоянную для него долю окна, и 09:00 / 21:00 всех пользователей не
+# попадают в одну минуту под общий лимит Telegram. 0 — без сдвига
+REMINDER_SPREAD_MINUTES = min(int(os.getenv("REMINDER_SPREAD_MINUTES", "0")), 720)
+
+
+def spread_offset(user_id: int, spread_minutes: int) -> timedelta:
+    """Сдвиг напоминаний пользователя внутри окна (одинаков во всех процессах)"""
+    if spread_minutes <= 0:
+        return timedelta(0)
+    seconds = zlib.crc32(str(user_id).encode()) % (spread_minutes * 60)
+    return timedelta(seconds=seconds)
+
+
 class TaskReminderService:
-    def __init__(self, bot: Bot):
+    def __init__(
+        self,
+        bot: Bot,
+        clock=system_clock,
+        spread_minutes: int = REMINDER_SPREAD_MINUTES,
+    ):
         self.bot = bot
+        self.clock = clock
+        self.spread_minutes = spread_minutes
         self.running = False
         self.reminder_schedule = [7, 3, 1, 0.5]  # Дни до дедлайна
 
     async def start(self):
         """Запуск сервиса напоминаний о задачах"""
         self.running = True
+        subscribe("task", self.on_task_changed)
         logger.info("🚀 Сервис напоминаний о задачах запущен")
 
         while self.running:
             try:
                 await self.check_upcoming_deadlines()
-                await self.send_scheduled_reminders()
-                await asyncio.sleep(60)  # Проверяем каждую минуту
+                await asyncio.sleep(RECONCILE_INTERVAL)
             except Exception as e:
                 logger.error(f"Ошибка в сервисе напоминаний о задачах: {e}")
                 await asyncio.sleep(60)
@@ -35,269 +82,391 @@ class TaskReminderService:
     async def stop(self):
         """Остановка сервиса"""
         self.running = False
+        unsubscribe("task", self.on_task_changed)
         logger.info("🛑 Сервис напоминаний о задачах остановлен")
 
-    async def check_upcoming_deadlines(self):
-        """Проверка предстоящих дедлайнов и создание напоминаний"""
-        conn = get_connection()
-        cursor = conn.cursor()
+    # ==================== ИЗМЕНЕНИЯ ЗАДАЧ ====================
 
-        now = datetime.now()
-        today = now.strftime("%Y-%m-%d")
+    def on_task_changed(self, task_id: int, action: str, field: str = None):
+        """Пересчёт напоминаний одной задачи после её изменения (в потоке БД)"""
+        if action == DELETED:
+            return  # Напоминания удаляются каскадно вместе с задачей
+        if action == UPDATED and field not in ("deadline", "complete"):
+            return  # Название, описание и приоритет на расписание не влияют
 
-        # Ищем задачи с дедлайнами от сегодня до 30 дней вперед
-        deadline_threshold = (now + timedelta(days=30)).strftime("%Y-%m-%d")
+        task = self._fetch_task(task_id)
+        if task is None or task["is_completed"] or task["deadline_ts"] is None:
+            self._delete_pending_reminders(task_id)
+            logger.info(f"🧹 Удалены ненаправленные напоминания для задачи {task_id}")
+            return
+
+        self._plan_task_reminders([task], reset=True)
+
+    def _fetch_task(self, task_id: int):
+        """Задача с полями, нужными для расчёта напоминаний"""
+        conn = get_connection()
+        cursor = conn.cursor()
+        cursor.execute(
+            "SELECT id, title, deadline_ts, is_completed FROM tasks WHERE id = ?",
+            (task_id,),
+        )
+        task = cursor.fetchone()
+        conn.close()
+        return task
 
-        logger.info(f"🔍 Проверка дедлайнов с {today} до {deadline_threshold}")
+    # ==================== СВЕРКА С БД ====================
 
+    def _fetch_upcoming_tasks(
+        self, today_ts: int, threshold_ts: int, processed_after: str
+    ):
+        """Задачи с дедлайнами в заданном диапазоне (выполняется в потоке БД)"""
+        conn = get_connection()
+        cursor = conn.cursor()
         cursor.execute(
             """
             SELECT t.*, u.telegram_id, u.username
             FROM tasks t
             JOIN users u ON t.user_id = u.telegram_id
-            WHERE t.deadline >= ? AND t.deadline <= ?
-            AND t.is_completed = 0
-            AND t.deadline IS NOT NULL
-            ORDER BY t.deadline
+            WHERE t.deadline_ts >= ? AND t.deadline_ts <= ?
+            AND t.is_completed = 0 AND u.is_active = 1
+            AND (t.last_reminder_sent IS NULL OR t.last_reminder_sent < ?)
+            ORDER BY t.deadline_ts
             """,
-            (today, deadline_threshold),
+            (today_ts, threshold_ts, processed_after),
         )
-
         tasks = cursor.fetchall()
         conn.close()
+        return tasks
 
-        logger.info(f"📊 Найдено задач с дедлайнами: {len(tasks)}")
+    async def check_upcoming_deadlines(self):
+        """Сверка: создание напоминаний для задач, пропущенных уведомлениями"""
+        now = self.clock.now()
+        today_ts = today_epoch(now)
 
-        if tasks:
-            for task in tasks:
-                logger.info(
-                    f"  - ID {task['id']}: '{task['title'][:20]}...' дедлайн {task['deadline']}"
-                )
+        # Ищем задачи с дедлайнами от сегодня до 30 дней вперед
+        threshold_ts = today_ts + 30 * 86400
 
-        # Для каждой задачи проверяем нужно ли создавать напоминания
-        for task in tasks:
-            task_id = task["id"]
+        # Задачи, напоминания для которых создавались менее 12 часов назад, пропускаем
+        processed_after = (now - timedelta(hours=12)).strftime("%Y-%m-%d %H:%M")
 
-            # Проверяем когда последний раз отправляли напоминания
-            conn = get_connection()
-            cursor = conn.cursor()
-            cursor.execute(
-                "SELECT last_reminder_sent FROM tasks WHERE id = ?", (task_id,)
-            )
-            last_sent_result = cursor.fetchone()
-            conn.close()
+        logger.info(
+            f"🔍 Проверка дедлайнов с {format_date(today_ts)} до {format_date(threshold_ts)}"
+        )
 
-            last_sent = None
-            if last_sent_result and last_sent_result[0]:
-                last_sent = last_sent_result[0]
-
-            should_process = True
-
-            if last_sent:
-                try:
-                    # Если напоминания отправлялись менее 12 часов назад - пропускаем
-                    last_sent_dt = datetime.strptime(last_sent, "%Y-%m-%d %H:%M")
-                    hours_since_last = (now - last_sent_dt).total_seconds() / 3600
-
-                    if hours_since_last < 12:
-                        logger.info(
-                            f"⏰ Задача {task_id} уже получала напоминания {hours_since_last:.1f} часов назад, пропускаем"
-                        )
-                        should_process = False
-                except Exception as e:
-                    logger.error(f"❌ Ошибка при разборе даты {last_sent}: {e}")
-
-            if should_process:
-                logger.info(
-                    f"📋 Обработка задачи ID {task_id}: {task['title']} (дедлайн: {task['deadline']})"
-                )
-                await self.schedule_task_reminders(task)
-            else:
-                logger.info(
-                    f"⏰ Пропускаем задачу {task_id} - напоминания уже отправлялись недавно"
-                )
+        tasks = await db.run(
+            self._fetch_upcoming_tasks, today_ts, threshold_ts, processed_after
+        )
 
-    async def schedule_task_reminders(self, task):
-        """Создание напоминаний для задачи"""
-        try:
-            # Предполагаем, что дедлайн в 9:00 утра указанного дня
-            deadline_str = task["deadline"] + " 09:00"
-            deadline_date = datetime.strptime(deadline_str, "%Y-%m-%d %H:%M")
-            now = datetime.now()
-            today = now.date()
+        logger.info(f"📊 Найдено задач для обработки: {len(tasks)}")
 
-            logger.info(
-                f"🔍 Анализ задачи {task['id']}: дедлайн {deadline_date}, сейчас {now}"
+        if tasks:
+            await self.schedule_task_reminders(tasks)
+
+    # ==================== СОЗДАНИЕ НАПОМИНАНИЙ ====================
+
+    def compute_reminder_times(
+        self,
+        deadline_ts: int,
+        now: datetime,
+        preferred: time = None,
+        offset: timedelta = timedelta(0),
+    ) -> list:
+        """Расписание напоминаний для дедлайна: [(reminder_type, reminder_time)].
+
+        preferred — личное время пользователя вместо 9:00 для утренних
+        напоминаний; offset — сдвиг сглаживания пика.
+        """
+        # Предполагаем, что дедлайн в 9:00 утра указанного дня
+        deadline_date = datetime.combine(from_epoch(deadline_ts).date(), DEADLINE_TIME)
+
+        # Для просроченных задач напоминания не нужны
+        if deadline_date < now:
+            return []
+
+        # Вычисляем сколько осталось до дедлайна
+        time_until_deadline = deadline_date - now
+        days_until_deadline = time_until_deadline.days
+
+        reminder_times = []
+        for days_before, hour, minute, reminder_type in TASK_REMINDER_SCHEDULE:
+            # Для напоминаний "за 1 день" и "за 12 часов" создаем если до дедлайна >= 12 часов
+            if reminder_type in ["1d", "12h"]:
+                should_create = time_until_deadline >= timedelta(hours=12)
+            else:
+                should_create = days_until_deadline >= days_before
+
+            if should_create:
+                reminder_date = deadline_date - timedelta(days=days_before)
+                at = time(hour, minute)
+                if preferred is not None and reminder_type != "12h":
+                    at = preferred
+                reminder_time = datetime.combine(reminder_date.date(), at) + offset
+                if reminder_time > now:
+                    reminder_times.append((reminder_type, reminder_time))
+
+        return reminder_times
+
+    def _plan_task_reminders(
+        self, tasks, now: datetime = None, reset: bool = False
+    ) -> int:
+        """Пересоздание напоминаний для пачки задач одной транзакцией (в потоке БД).
+
+        Ненаправленные напоминания пересоздаются, уже отправленные остаются и
+        через UNIQUE (task_id, reminder_type) не дают отправить тот же тип
+        повторно. reset=True удаляет и отправленные — дедлайн сменился.
+        """
+        now = now or self.clock.now()
+        timing = self._fetch_reminder_timing([task["id"] for task in tasks])
+
+        task_ids = []
+        rows = []
+        for task in tasks:
+            try:
+                reminder_times = self.compute_reminder_times(
+                    task["deadline_ts"], now, *timing[task["id"]]
+                )
+            except (TypeError, ValueError) as e:
+                logger.error(f"❌ Некорректный дедлайн задачи {task['id']}: {e}")
+                continue
+            task_ids.append((task["id"],))
+            rows.extend(
+                (
+                    task["id"],
+                    reminder_type,
+                    reminder_time.strftime("%Y-%m-%d %H:%M"),
+                    to_epoch(reminder_time),
+                )
+                for reminder_type, reminder_time in reminder_times
             )
 
-            # Пропускаем просроченные задачи
-            if deadline_date < now:
-                logger.info(f"⏰ Задача {task['id']} просрочена, пропускаем")
-                return
+        if not task_ids:
+            return 0
 
-            # Вычисляем сколько дней осталось до дедлайна
-            time_until_deadline = deadline_date - now
-            days_until_deadline = time_until_deadline.days
-            logger.info(
-                f"📅 До дедлайна осталось: {days_until_deadline} дней и {time_until_deadline.seconds//3600} часов"
+        ids_json = json.dumps([task_id for (task_id,) in task_ids])
+        conn = get_connection()
+        try:
+            if reset:
+                conn.executemany(
+                    "DELETE FROM task_reminders WHERE task_id = ?", task_ids
+                )
+            else:
+                # Наступившие, но ещё не отправленные напоминания оставляем:
+                # заново они не создаются (их время уже прошло) и пропали бы
+                now_ts = to_epoch(now)
+                conn.executemany(
+                    "DELETE FROM task_reminders "
+                    "WHERE task_id = ? AND reminder_sent = 0 AND reminder_ts > ?",
+                    [(row[0], now_ts) for row in task_ids],
+                )
+            conn.executemany(
+                """
+                INSERT OR IGNORE INTO task_reminders
+                    (task_id, reminder_type, reminder_time, reminder_ts)
+                VALUES (?, ?, ?, ?)
+                """,
+                rows,
             )
 
-            # Удаляем старые ненаправленные напоминания для этой задачи
-            conn = get_connection()
-            cursor = conn.cursor()
-            cursor.execute(
-                "DELETE FROM task_reminders WHERE task_id = ? AND reminder_sent = 0",
-                (task["id"],),
-            )
-            conn.commit()
-            conn.close()
-            logger.info(
-                f"🧹 Удалены старые ненаправленные напоминания для задачи {task['id']}"
+            # Обновляем время последнего создания напоминаний
+            conn.execute(
+                """
+                UPDATE tasks SET last_reminder_sent = ?
+                WHERE id IN (SELECT value FROM json_each(?))
+                """,
+                (now.strftime("%Y-%m-%d %H:%M"), ids_json),
             )
 
-            reminder_schedule = [
-                (7, 9, 0, "7d"),  # За 7 дней в 9:00
-                (3, 9, 0, "3d"),  # За 3 дня в 9:00
-                (1, 9, 0, "1d"),  # За 1 день в 9:00
-                (1, 21, 0, "12h"),  # За 12 часов в 21:00
-            ]
-
-            created_count = 0
-            for days_before, hour, minute, reminder_type in reminder_schedule:
-                # Для напоминаний "за 1 день" и "за 12 часов" создаем если до дедлайна >= 12 часов
-                if reminder_type in ["1d", "12h"]:
-                    should_create = time_until_deadline >= timedelta(hours=12)
-                else:
-                    should_create = days_until_deadline >= days_before
-
-                if should_create:
-                    reminder_date = deadline_date - timedelta(days=days_before)
-                    reminder_time = datetime.combine(
-                        reminder_date.date(),
-                        datetime.min.time().replace(hour=hour, minute=minute),
-                    )
-
-                    if reminder_time > now:
-                        logger.info(
-                            f"⏰ Создаем напоминание типа {reminder_type} на {reminder_time}"
-                        )
-                        await self.create_reminder(
-                            task["id"], reminder_time, reminder_type
-                        )
-                        created_count += 1
-
-            # Обновляем время последнего напоминания
-            conn = get_connection()
-            cursor = conn.cursor()
-            cursor.execute(
-                "UPDATE tasks SET last_reminder_sent = ? WHERE id = ?",
-                (now.strftime("%Y-%m-%d %H:%M"), task["id"]),
-            )
+            # Созданные напоминания передаём планировщику
+            created = conn.execute(
+                """
+                SELECT id, reminder_ts FROM task_reminders
+                WHERE reminder_sent = 0
+                AND task_id IN (SELECT value FROM json_each(?))
+                """,
+                (ids_json,),
+            ).fetchall()
             conn.commit()
+        finally:
             conn.close()
 
-            logger.info(
-                f"✅ Создано {created_count} напоминаний для задачи {task['id']}: {task['title']}"
-            )
+        scheduler = get_reminder_scheduler()
+        for reminder_id, reminder_ts in created:
+            scheduler.schedule("task", reminder_id, from_epoch(reminder_ts))
+
+        logger.info(
+            f"✅ Создано {len(created)} напоминаний для {len(task_ids)} задач"
+        )
+        return len(created)
 
+    def _fetch_reminder_timing(self, task_ids: list) -> dict:
+        """task_id -> (личное время напоминаний, сдвиг сглаживания)"""
+        conn = get_connection()
+        rows = conn.execute(
+            """
+            SELECT t.id, t.user_id, u.reminder_time
+            FROM tasks t
+            LEFT JOIN users u ON t.user_id = u.telegram_id
+            WHERE t.id IN (SELECT value FROM json_each(?))
+            """,
+            (json.dumps(task_ids),),
+        ).fetchall()
+        conn.close()
+
+        timing = {task_id: (None, timedelta(0)) for task_id in task_ids}
+        for row in rows:
+            preferred = row["reminder_time"]
+            if preferred:
+                # Время, выбранное пользователем, не сдвигаем
+                timing[row["id"]] = (time.fromisoformat(preferred), timedelta(0))
+            else:
+                offset = spread_offset(row["user_id"], self.spread_minutes)
+                timing[row["id"]] = (None, offset)
+        return timing
+
+    async def schedule_task_reminders(self, tasks):
+        """Создание напоминаний для списка задач"""
+        try:
+            await db.run(self._plan_task_reminders, list(tasks))
         except Exception as e:
             logger.error(
-                f"❌ Ошибка при создании напоминаний для задачи {task['id']}: {e}",
-                exc_info=True,
+                f"❌ Ошибка при создании напоминаний для задач: {e}", exc_info=True
             )
 
-    async def create_reminder(
-        self, task_id: int, reminder_time: datetime, reminder_type: str
-    ):
-        """Создание записи о напоминании в БД"""
+    def _delete_pending_reminders(self, task_id: int):
+        """Удаление ненаправленных напоминаний задачи"""
         conn = get_connection()
-        cursor = conn.cursor()
+        conn.execute(
+            "DELETE FROM task_reminders WHERE task_id = ? AND reminder_sent = 0",
+            (task_id,),
+        )
+        conn.commit()
+        conn.close()
 
-        # Проверяем, не существует ли уже такое напоминание
-        cursor.execute(
+    def fetch_pending_reminder_times(self):
+        """Все неотправленные напоминания для загрузки в планировщик.
+
+        Захваченные другим отправителем ставятся на истечение аренды
+        """
+        conn = get_connection()
+        rows = conn.execute(
             """
-            SELECT id FROM task_reminders
-            WHERE task_id = ? AND reminder_type = ? AND reminder_sent = 0
-            """,
-            (task_id, reminder_type),
-        )
+            SELECT id, MAX(reminder_ts, IFNULL(lease_until, 0)) AS due_ts
+            FROM task_reminders WHERE reminder_sent = 0
+            """
+        ).fetchall()
+        conn.close()
+        return [(row["id"], row["due_ts"]) for row in rows]
+
+    # ==================== ОТПРАВКА ====================
 
-        existing = cursor.fetchone()
+    def _claim_due_reminders(self, now_ts: int, token: str) -> tuple:
+        """Захват пачки наступивших напоминаний (выполняется в потоке БД).
 
-        if not existing:
-            cursor.execute(
+        Возвращает (число захваченных строк, напоминания с данными задач).
+        Напоминания выполненных задач и отключённых пользователей
+        завершаются без отправки (failed).
+        """
+        conn = get_connection()
+        try:
+            claimed = outbox.claim(conn, "task_reminders", now_ts, token)
+            if not claimed:
+                return 0, []
+
+            reminders = conn.execute(
                 """
-                INSERT INTO task_reminders (task_id, reminder_type, reminder_time)
-                VALUES (?, ?, ?)
+                SELECT r.*, t.title, t.deadline_ts, t.description, t.priority,
+                    u.telegram_id, u.username
+                FROM task_reminders r
+                JOIN tasks t ON r.task_id = t.id
+                JOIN users u ON t.user_id = u.telegram_id
+                WHERE r.id IN (SELECT value FROM json_each(?))
+                AND t.is_completed = 0 AND u.is_active = 1
+                ORDER BY r.reminder_ts
                 """,
-                (
-                    task_id,
-                    reminder_type,
-                    reminder_time.strftime("%Y-%m-%d %H:%M"),
-                ),
-            )
-            conn.commit()
-            logger.info(
-                f"Создано напоминание для задачи {task_id}: {reminder_type} в {reminder_time}"
-            )
+                (json.dumps(claimed),),
+            ).fetchall()
 
-        conn.close()
+            skipped = set(claimed) - {reminder["id"] for reminder in reminders}
+            if skipped:
+                outbox.finish(conn, "task_reminders", skipped, token, outbox.FAILED)
+                conn.commit()
+        finally:
+            conn.close()
+        return len(claimed), reminders
 
-    async def send_scheduled_reminders(self):
-        """Отправка запланированных напоминаний о задачах"""
+    def _mark_reminders_sent(self, reminder_ids: list, token: str):
+        """Помечаем пачку захваченных напоминаний отправленными одной транзакцией"""
         conn = get_connection()
-        cursor = conn.cursor()
+        outbox.finish(conn, "task_reminders", reminder_ids, token)
+        conn.commit()
+        conn.close()
 
-        now = datetime.now()
-        # Используем формат без секунд для сравнения
-        now_local_str = now.strftime("%Y-%m-%d %H:%M")
+    def _release_reminders(self, failures: list, token: str) -> tuple:
+        """Неотправленные напоминания: повтор с задержкой или dead letters"""
+        now_ts = to_epoch(self.clock.now())
+        conn = get_connection()
+        try:
+            retried, dead = outbox.release(
+                conn,
+                "task_reminders",
+                [
+                    (reminder["id"], reminder["telegram_id"], error_class, error)
+                    for reminder, error_class, error in failures
+                ],
+                token,
+                now_ts,
+            )
+            conn.commit()
+        finally:
+            conn.close()
+        logger.warning(f"🔁 Повтор отправки: {retried}, в dead letters: {dead}")
+        return retried, dead
 
-        logger.info(f"🔍 Проверка напоминаний, время: {now_local_str}")
+    def _fetch_leased_reminders(self, now_ts: int) -> list:
+        """Наступившие напоминания, захваченные другими отправителями"""
+        conn = get_connection()
+        rows = outbox.leased(conn, "task_reminders", now_ts)
+        conn.close()
+        return rows
 
-        cursor.execute(
-            """
-            SELECT r.*, t.title, t.deadline, t.description, t.priority,
-                u.telegram_id, u.username
-            FROM task_reminders r
-            JOIN tasks t ON r.task_id = t.id
-            JOIN users u ON t.user_id = u.telegram_id
-            WHERE r.reminder_sent = 0
-            AND r.reminder_time <= ?
-            AND t.is_completed = 0
-            ORDER BY r.reminder_time
-        """,
-            (now_local_str,),
-        )
+    async def send_scheduled_reminders(self):
+        """Отправка запланированных напоминаний о задачах.
 
-        reminders = cursor.fetchall()
+        Напоминания захватываются пачками, поэтому параллельные запуски
+        (в том числе из разных процессов) не отправляют одно и то же.
+        """
+        now = self.clock.now()
 
-        logger.info(f"📨 Найдено напоминаний для отправки: {len(reminders)}")
+        logger.info(f"🔍 Проверка напоминаний, время: {now:%Y-%m-%d %H:%M}")
 
+        token = outbox.new_claim_token()
+        mark_sent = partial(self._mark_reminders_sent, token=token)
+        release = partial(self._release_reminders, token=token)
         sent_count = 0
-        for reminder in reminders:
-            try:
-                logger.info(
-                    f"📤 Отправка напоминания {reminder['id']} для задачи {reminder['task_id']}"
-                )
+        while True:
+            claimed, reminders = await db.run(
+                self._claim_due_reminders, to_epoch(self.clock.now()), token
+            )
+            if not claimed:
+                break
 
-                await self.send_task_reminder(reminder)
-                sent_count += 1
+            logger.info(f"📨 Захвачено напоминаний для отправки: {len(reminders)}")
 
-                # Помечаем напоминание как отправленное
-                cursor.execute(
-                    "UPDATE task_reminders SET reminder_sent = 1 WHERE id = ?",
-                    (reminder["id"],),
-                )
-                conn.commit()
-                logger.info(f"✅ Напоминание {reminder['id']} отправлено и помечено")
+            # Отправка параллельно, но в пределах лимитов Telegram
+            sent = await get_delivery_pipeline().deliver(
+                reminders, self.send_task_reminder, mark_sent, release
+            )
+            sent_count += sent
 
-            except Exception as e:
-                logger.error(
-                    f"❌ Ошибка при отправке напоминания о задаче {reminder['id']}: {e}",
-                    exc_info=True,
-                )
+            if claimed < outbox.CLAIM_BATCH:
+                break
 
-        conn.close()
+        # Строки, захваченные другим отправителем, проверим после его аренды,
+        # отложенные повторы — в назначенное время
+        scheduler = get_reminder_scheduler()
+        leased = await db.run(self._fetch_leased_reminders, to_epoch(self.clock.now()))
+        for reminder_id, lease_until in leased:
+            scheduler.schedule("task", reminder_id, from_epoch(lease_until))
 
         if sent_count > 0:
             logger.info(f"🎉 Отправлено {sent_count} напоминаний о задачах")
@@ -308,8 +477,8 @@ class TaskReminderService:
             # Преобразуем sqlite3.Row в словарь для удобства
             reminder_dict = dict(reminder)
 
-            deadline_date = datetime.strptime(reminder_dict["deadline"], "%Y-%m-%d")
-            now = datetime.now()
+            deadline_date = from_epoch(reminder_dict["deadline_ts"])
+            now = self.clock.now()
 
             # Вычисляем оставшееся время
             time_left = deadline_date.date() - now.date()
@@ -390,22 +559,26 @@ class TaskReminderService:
 
     async def cleanup_old_reminders(self):
         """Очистка старых напоминаний о задачах"""
+        deleted_count = await db.run(self._delete_old_reminders)
+
+        if deleted_count > 0:
+            logger.info(f"Удалено {deleted_count} старых напоминаний о задачах")
+
+    def _delete_old_reminders(self) -> int:
+        """Удаление напоминаний старше недели"""
         conn = get_connection()
         cursor = conn.cursor()
 
-        week_ago = datetime.now() - timedelta(days=7)
+        week_ago = self.clock.now() - timedelta(days=7)
 
         cursor.execute(
-            "DELETE FROM task_reminders WHERE reminder_time < ?",
-            (week_ago.strftime("%Y-%m-%d %H:%M"),),
+            "DELETE FROM task_reminders WHERE reminder_ts < ?", (to_epoch(week_ago),)
         )
 
         deleted_count = cursor.rowcount
         conn.commit()
         conn.close()
-
-        if deleted_count > 0:
-            logger.info(f"Удалено {deleted_count} старых напоминаний о задачах")
+        return deleted_count
 
 
 # Синглтон экземпляр
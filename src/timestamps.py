@@ -0,0 +1,43 @@
+# src/timestamps.py
+"""Хранение времени в виде целых UTC epoch-секунд.
+
+Дедлайны, события и напоминания хранятся в колонках ``*_ts INTEGER``:
+сравнение целых в индексе дешевле сравнения строк, а разбор
+``datetime.fromtimestamp`` на порядок быстрее ``strptime``. Текстовые
+колонки остаются для ввода и совместимости; для отображения строка
+получается из epoch в момент рендера.
+"""
+
+from datetime import date, datetime
+
+
+def to_epoch(value: datetime) -> int:
+    """Локальное (naive) время -> UTC epoch"""
+    return int(value.timestamp())
+
+
+def from_epoch(ts: int) -> datetime:
+    """UTC epoch -> локальное (naive) время"""
+    return datetime.fromtimestamp(ts)
+
+
+def date_to_epoch(value) -> int:
+    """Дата (date или 'ГГГГ-ММ-ДД') -> epoch локальной полуночи"""
+    if isinstance(value, str):
+        value = date.fromisoformat(value)
+    return to_epoch(datetime.combine(value, datetime.min.time()))
+
+
+def today_epoch(now: datetime = None) -> int:
+    """Epoch локальной полуночи сегодняшнего дня"""
+    return date_to_epoch((now or datetime.now()).date())
+
+
+def format_date(ts: int) -> str:
+    """epoch -> 'ДД.ММ.ГГГГ'"""
+    return from_epoch(ts).strftime("%d.%m.%Y")
+
+
+def format_datetime(ts: int) -> str:
+    """epoch -> 'ДД.ММ.ГГГГ ЧЧ:ММ'"""
+    return from_epoch(ts).strftime("%d.%m.%Y %H:%M")
@@ -0,0 +1,141 @@
+# src/webhook.py
+"""Режим webhook: Telegram сам присылает апдейты во встроенный aiohttp-сервер.
+
+Включается переменной ``BOT_MODE=webhook`` (по умолчанию — long polling).
+Апдейт приходит сразу, без ожидания следующего getUpdates, а несколько
+экземпляров бота можно поставить за reverse proxy.
+
+* ``WEBHOOK_PATH`` — путь, на который Telegram шлёт апдейты;
+* ``WEBHOOK_URL`` — публичный адрес (https://bot.example.com); если задан,
+  бот при запуске сам вызывает setWebhook на ``WEBHOOK_URL + WEBHOOK_PATH``;
+* ``WEBHOOK_SECRET`` — секрет из заголовка X-Telegram-Bot-Api-Secret-Token,
+  запросы без него отклоняются с 401;
+* ``WEBHOOK_HOST`` / ``WEBHOOK_PORT`` — где слушать;
+* ``GET /health`` — проверка для балансировщика: 200, пока сервер
+  принимает апдейты, 503 во время остановки.
+
+Апдейты обрабатываются в фоне: Telegram сразу получает ответ 200. При
+остановке (SIGTERM/SIGINT) сервер перестаёт принимать соединения,
+дожидается апдейтов в обработке (не дольше ``WEBHOOK_SHUTDOWN_TIMEOUT``),
+выполняет обработчики shutdown диспетчера (on_shutdown бота) и только
+потом закрывает сессию Bot API.
+"""
+
+import asyncio
+import logging
+import os
+import signal
+import time
+
+from aiogram import Bot, Dispatcher
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler
+from aiohttp import web
+
+logger = logging.getLogger(__name__)
+
+WEBHOOK_HOST = os.getenv("WEBHOOK_HOST", "0.0.0.0")
+WEBHOOK_PORT = int(os.getenv("WEBHOOK_PORT", "8080"))
+WEBHOOK_PATH = os.getenv("WEBHOOK_PATH", "/webhook")
+WEBHOOK_URL = os.getenv("WEBHOOK_URL")
+WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET")
+WEBHOOK_SHUTDOWN_TIMEOUT = float(os.getenv("WEBHOOK_SHUTDOWN_TIMEOUT", "10"))  # секунд
+
+HEALTH_PATH = "/health"
+
+
+class WebhookHandler(SimpleRequestHandler):
+    """Обработчик апдейтов, который при остановке дожидается начатых"""
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._background_feed_update_tasks)
+
+    async def drain(self, timeout: float):
+        tasks = set(self._background_feed_update_tasks)
+        if not tasks:
+            return
+        logger.info(f"⏳ Ожидание апдейтов в обработке: {len(tasks)}")
+        _, pending = await asyncio.wait(tasks, timeout=timeout)
+        if pending:
+            logger.warning(f"⚠️ Не дождались апдейтов: {len(pending)}, отменяем")
+            for task in pending:
+                task.cancel()
+
+
+def create_app(
+    dp: Dispatcher,
+    bot: Bot,
+    path: str = WEBHOOK_PATH,
+    secret: str = WEBHOOK_SECRET,
+    url: str = WEBHOOK_URL,
+    shutdown_timeout: float = WEBHOOK_SHUTDOWN_TIMEOUT,
+) -> web.Application:
+    """aiohttp-приложение с маршрутом webhook и проверкой здоровья"""
+    app = web.Application()
+    handler = WebhookHandler(dp, bot, secret_token=secret)
+    app["webhook_handler"] = handler
+    app["accepting"] = False
+    started_at = time.monotonic()
+
+    async def health(request: web.Request):
+        status = 200 if app["accepting"] else 503
+        return web.json_response(
+            {
+                "status": "ok" if status == 200 else "stopping",
+                "in_flight": handler.in_flight,
+                "uptime": round(time.monotonic() - started_at),
+            },
+            status=status,
+        )
+
+    async def on_startup(app: web.Application):
+        await dp.emit_startup(bot=bot, dispatcher=dp, **dp.workflow_data)
+        if url:
+            await bot.set_webhook(
+                url=url.rstrip("/") + path,
+                secret_token=secret,
+                allowed_updates=dp.resolve_used_update_types(),
+            )
+            logger.info(f"✅ Webhook зарегистрирован: {url.rstrip('/')}{path}")
+        app["accepting"] = True
+
+    async def on_shutdown(app: web.Application):
+        app["accepting"] = False
+        await handler.drain(shutdown_timeout)
+        await dp.emit_shutdown(bot=bot, dispatcher=dp, **dp.workflow_data)
+        await bot.session.close()
+
+    app.router.add_post(path, handler.handle)
+    app.router.add_get(HEALTH_PATH, health)
+    app.on_startup.append(on_startup)
+    app.on_shutdown.append(on_shutdown)
+
+    if not secret:
+        logger.warning("⚠️ WEBHOOK_SECRET не задан — запросы к webhook не проверяются")
+    return app
+
+
+async def run_webhook(
+    dp: Dispatcher, bot: Bot, host: str = WEBHOOK_HOST, port: int = WEBHOOK_PORT
+):
+    """Запустить сервер и работать до SIGTERM/SIGINT"""
+    app = create_app(dp, bot)
+    runner = web.AppRunner(app, handle_signals=False)
+    await runner.setup()
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        try:
+            loop.add_signal_handler(sig, stop.set)
+        except NotImplementedError:  # Windows: остановка через KeyboardInterrupt
+            pass
+
+    try:
+        await web.TCPSite(runner, host, port).start()
+        logger.info(f"🌐 Webhook-сервер слушает {host}:{port}{WEBHOOK_PATH}")
+        await stop.wait()
+        logger.info("🛑 Получен сигнал остановки")
+    finally:
+        # Сначала закрываются сокеты, затем выполняется on_shutdown
+        await runner.cleanup()
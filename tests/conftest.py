@@ -122,3 +122,17 @@ def state():
     mock_state.finish = AsyncMock()
     mock_state.update_data = AsyncMock()
     return mock_state
+
+
+@pytest.fixture
+def pooled_db(tmp_path):
+    """Фикстура: пул соединений на временной БД с полной схемой"""
+    from src.database import init_database
+    from src.db_pool import DEFAULT_DB_PATH, configure_pool
+
+    pool = configure_pool(str(tmp_path / "bot.db"))
+    init_database()
+
+    yield pool
+
+    configure_pool(DEFAULT_DB_PATH)
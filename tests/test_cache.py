@@ -0,0 +1,92 @@
+"""Тесты кэша списков пользователя"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.cache import UserListCache, estimate_size  # noqa: E402
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_lru_ttl_and_memory_budget():
+    """Записи вытесняются по LRU, по TTL и по бюджету памяти"""
+    clock = FakeClock()
+    cache = UserListCache(max_entries=2, ttl=10, max_bytes=10**6, clock=clock)
+
+    cache.set("tasks", 1, ["a"])
+    cache.set("tasks", 2, ["b"])
+    assert cache.get("tasks", 1) == ["a"]  # 1 становится самым свежим
+    cache.set("tasks", 3, ["c"])
+    assert cache.get("tasks", 2) is None
+    assert cache.stats["evictions"] == 1
+
+    clock.now = 11
+    assert cache.get("tasks", 1) is None
+    assert cache.stats["expired"] == 1
+
+    big = [{"title": "x" * 100}] * 10
+    small = UserListCache(max_bytes=estimate_size(big) + 10, clock=clock)
+    small.set("tasks", 1, big)
+    small.set("tasks", 2, big)
+    assert small.size == 1 and small.bytes <= small.max_bytes
+    assert small.get("tasks", 2) is big
+
+    assert cache.stats["hits"] == 1
+    assert cache.stats["misses"] == 2
+
+
+@pytest.mark.asyncio
+async def test_write_paths_invalidate_user(pooled_db, monkeypatch):
+    """save/update/delete сбрасывают списки пользователя, но не чужие"""
+    from src import cache as cache_module
+    from src.repository import AsyncRepository
+
+    cache = UserListCache()
+    monkeypatch.setattr(cache_module, "_list_cache", cache)
+    repo = AsyncRepository()
+    await repo.register_user(1, "a", None, None)
+    await repo.register_user(2, "b", None, None)
+
+    async def tasks(user_id):
+        return await cache.get_or_load(
+            "tasks", user_id, repo.get_user_tasks, user_id, key=True
+        )
+
+    _, task_id, _ = await repo.save_task(1, {"title": "Первая"})
+    await repo.save_task(2, {"title": "Чужая"})
+    assert [t["title"] for t in await tasks(1)] == ["Первая"]
+    await tasks(2)
+
+    await repo.update_task(task_id, "title", "Переименована")
+    assert [t["title"] for t in await tasks(1)] == ["Переименована"]
+    await tasks(2)
+    assert cache.stats["hits"] == 1
+
+    await repo.delete_task(task_id)
+    assert await tasks(1) == []
+    repo.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_load_racing_with_write_is_not_cached():
+    """Список, загруженный до записи, не сохраняется после инвалидации"""
+    cache = UserListCache()
+
+    async def loader():
+        # Запись пользователя происходит, пока идёт загрузка
+        cache.invalidate_user(1)
+        return ["устаревший"]
+
+    assert await cache.get_or_load("tasks", 1, loader) == ["устаревший"]
+    assert cache.get("tasks", 1) is None
+    assert cache.size == 0
@@ -0,0 +1,259 @@
+"""Тесты слоя доступа к базе данных"""
+
+import os
+import sqlite3
+import sys
+import threading
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.database import get_connection  # noqa: E402
+
+
+def test_pool_reuses_connection_in_thread(pooled_db):
+    """Повторный get_connection() в том же потоке не открывает новое соединение"""
+    conn = get_connection()
+    conn.execute("SELECT 1")
+    conn.close()
+
+    again = get_connection()
+    assert again is conn
+    again.close()
+
+    assert pooled_db.stats["opened"] == 1
+    assert pooled_db.stats["reused"] >= 1
+
+
+def test_pool_pragmas(pooled_db):
+    """Соединения пула работают в WAL с включенными foreign keys"""
+    with get_connection() as conn:
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        assert conn.execute("PRAGMA foreign_keys").fetchone()[0] == 1
+        assert conn.execute("PRAGMA busy_timeout").fetchone()[0] == 5000
+
+
+def test_context_manager_commits_and_releases(pooled_db):
+    """with get_connection() коммитит изменения и возвращает соединение в пул"""
+    with get_connection() as conn:
+        conn.execute("INSERT INTO users (telegram_id) VALUES (1)")
+
+    other = sqlite3.connect(pooled_db.db_path)
+    assert other.execute("SELECT COUNT(*) FROM users").fetchone()[0] == 1
+    other.close()
+
+    assert get_connection() is conn
+
+
+def test_release_rolls_back_uncommitted(pooled_db):
+    """Незакоммиченные изменения откатываются при возврате в пул"""
+    conn = get_connection()
+    conn.execute("INSERT INTO users (telegram_id) VALUES (2)")
+    conn.close()
+
+    with get_connection() as conn:
+        count = conn.execute("SELECT COUNT(*) FROM users").fetchone()[0]
+    assert count == 0
+
+
+def test_connections_are_per_thread(pooled_db):
+    """Разные потоки получают разные соединения"""
+    main_conn = get_connection()
+    seen = []
+
+    def worker():
+        conn = get_connection()
+        seen.append(conn)
+        conn.close()
+
+    thread = threading.Thread(target=worker)
+    thread.start()
+    thread.join()
+    main_conn.close()
+
+    assert seen[0] is not main_conn
+
+
+def test_pool_trace_sees_statements(tmp_path):
+    """trace получает каждую SQL-команду соединений пула"""
+    from src.db_pool import ConnectionPool
+
+    statements = []
+    pool = ConnectionPool(str(tmp_path / "trace.db"), trace=statements.append)
+    conn = pool.acquire()
+    conn.execute("SELECT 42")
+    conn.close()
+    pool.close_all()
+
+    assert statements == ["SELECT 42"]
+
+
+def test_epoch_columns_follow_text_columns(pooled_db):
+    """deadline_ts и event_ts поддерживаются триггерами при вставке и изменении"""
+    from datetime import datetime
+
+    from src.timestamps import date_to_epoch, to_epoch
+
+    with get_connection() as conn:
+        conn.execute("INSERT INTO users (telegram_id) VALUES (1)")
+        conn.execute(
+            "INSERT INTO tasks (user_id, title, deadline) VALUES (1, 'a', '2030-05-01')"
+        )
+        conn.execute(
+            "INSERT INTO events (user_id, title, event_datetime) "
+            "VALUES (1, 'b', '2030-05-01 18:30')"
+        )
+
+    with get_connection() as conn:
+        assert conn.execute("SELECT deadline_ts FROM tasks").fetchone()[0] == (
+            date_to_epoch("2030-05-01")
+        )
+        assert conn.execute("SELECT event_ts FROM events").fetchone()[0] == to_epoch(
+            datetime(2030, 5, 1, 18, 30)
+        )
+
+        conn.execute("UPDATE tasks SET deadline = NULL")
+        assert conn.execute("SELECT deadline_ts FROM tasks").fetchone()[0] is None
+
+
+def test_epoch_columns_backfilled_for_existing_rows(tmp_path):
+    """init_database заполняет epoch-колонки для строк старой схемы"""
+    from src.database import init_database
+    from src.db_pool import DEFAULT_DB_PATH, configure_pool
+    from src.timestamps import date_to_epoch
+
+    path = str(tmp_path / "legacy.db")
+    legacy = sqlite3.connect(path)
+    legacy.executescript(
+        """
+        CREATE TABLE tasks (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            title TEXT NOT NULL,
+            description TEXT,
+            deadline DATE,
+            priority TEXT,
+            is_completed BOOLEAN DEFAULT 0,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+        INSERT INTO tasks (user_id, title, deadline) VALUES (1, 'a', '2030-05-01');
+        INSERT INTO tasks (user_id, title, deadline) VALUES (1, 'b', 'мусор');
+        """
+    )
+    legacy.close()
+
+    configure_pool(path)
+    try:
+        init_database()
+        with get_connection() as conn:
+            rows = conn.execute("SELECT deadline_ts FROM tasks ORDER BY id").fetchall()
+        assert [row[0] for row in rows] == [date_to_epoch("2030-05-01"), None]
+    finally:
+        configure_pool(DEFAULT_DB_PATH)
+
+
+def test_migrations_reach_latest_version_once(pooled_db):
+    """Свежая БД получает последнюю версию схемы, повторный запуск ничего не делает"""
+    from src.migrations import LATEST_VERSION, migrate
+
+    statements = []
+    with get_connection() as conn:
+        assert conn.execute("PRAGMA user_version").fetchone()[0] == LATEST_VERSION
+
+        conn.set_trace_callback(statements.append)
+        assert migrate(conn) == LATEST_VERSION
+        conn.set_trace_callback(None)
+
+    assert statements == ["PRAGMA user_version"]
+
+
+def test_legacy_database_invalid_deadlines_repaired(tmp_path):
+    """База без версии проходит все миграции, некорректные дедлайны обнуляются"""
+    from src.database import init_database
+    from src.db_pool import DEFAULT_DB_PATH, configure_pool
+    from src.migrations import LATEST_VERSION
+
+    path = str(tmp_path / "legacy.db")
+    legacy = sqlite3.connect(path)
+    legacy.executescript(
+        """
+        CREATE TABLE tasks (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            title TEXT NOT NULL,
+            description TEXT,
+            deadline DATE,
+            priority TEXT,
+            is_completed BOOLEAN DEFAULT 0,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+        INSERT INTO tasks (user_id, title, deadline) VALUES (1, 'a', '2030-05-01');
+        INSERT INTO tasks (user_id, title, deadline) VALUES (1, 'b', '01.05.2030');
+        INSERT INTO tasks (user_id, title, deadline) VALUES (1, 'c', '2030-02-30');
+        INSERT INTO tasks (user_id, title, deadline) VALUES (1, 'd', NULL);
+        """
+    )
+    legacy.close()
+
+    configure_pool(path)
+    try:
+        init_database()
+        with get_connection() as conn:
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+            rows = conn.execute("SELECT deadline FROM tasks ORDER BY id").fetchall()
+            columns = [col[1] for col in conn.execute("PRAGMA table_info(tasks)")]
+        assert version == LATEST_VERSION
+        assert [row[0] for row in rows] == ["2030-05-01", None, None, None]
+        assert "last_reminder_sent" in columns and "deadline_ts" in columns
+    finally:
+        configure_pool(DEFAULT_DB_PATH)
+
+
+def test_user_stats_follow_writes(pooled_db):
+    """Счётчики user_stats совпадают с COUNT(*) после любых изменений"""
+    from datetime import datetime
+
+    from src.handlers.events import base as events
+    from src.handlers.tasks import base as tasks
+    from src.repository import get_user_counters, register_user
+
+    register_user(1, "a", None, None)
+    register_user(2, "b", None, None)
+    ids = [tasks.save_task(1, {"title": f"Задача {i}"})[1] for i in range(4)]
+    tasks.save_task(1, {"title": "Просрочена", "deadline": "2020-01-01"})
+    tasks.save_task(1, {"title": "Скоро", "deadline": "2030-01-03"})
+    tasks.update_task(ids[0], "complete", True)
+    tasks.update_task(ids[1], "complete", True)
+    tasks.update_task(ids[1], "complete", True)  # повтор не меняет счётчики
+    tasks.delete_task(ids[2])
+    events.save_event(1, {"title": "Событие", "event_datetime": "2030-01-01 10:00"})
+    with get_connection() as conn:
+        conn.execute("UPDATE tasks SET user_id = 2 WHERE id = ?", (ids[3],))
+
+    counters = get_user_counters(1, now=datetime(2030, 1, 1, 12, 0))
+    assert counters == {
+        "active_tasks": 2,
+        "completed_tasks": 2,
+        "events": 1,
+        "lessons": 0,
+        "overdue_tasks": 1,
+        "upcoming_deadlines": 1,
+        "completed_this_week": 0,
+    }
+    assert get_user_counters(1)["completed_this_week"] == 2
+    assert get_user_counters(2)["active_tasks"] == 1
+    assert tasks.get_tasks_statistics(1) == {
+        "active": 2,
+        "completed": 2,
+        "overdue": 1,
+        "total": 4,
+    }
+
+    # Каскадное удаление пользователя обнуляет его счётчики
+    with get_connection() as conn:
+        conn.execute("DELETE FROM users WHERE telegram_id = 1")
+        row = conn.execute(
+            "SELECT active_tasks, completed_tasks, events FROM user_stats "
+            "WHERE user_id = 1"
+        ).fetchone()
+    assert tuple(row) == (0, 0, 0)
+    assert get_user_counters(3)["active_tasks"] == 0
@@ -0,0 +1,88 @@
+"""Тесты хранилища состояний FSM в SQLite"""
+
+import os
+import sys
+
+import pytest
+from aiogram.fsm.storage.base import StorageKey
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.fsm_storage import SQLiteStorage  # noqa: E402
+from src.states import AddTaskStates  # noqa: E402
+
+KEY = StorageKey(bot_id=42, chat_id=1, user_id=1)
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self):
+        return self.now
+
+
+def count_rows():
+    from src.database import get_connection
+
+    conn = get_connection()
+    try:
+        return conn.execute("SELECT COUNT(*) FROM fsm_storage").fetchone()[0]
+    finally:
+        conn.close()
+
+
+@pytest.mark.asyncio
+async def test_state_survives_restart(pooled_db):
+    """Незаконченный диалог восстанавливается новым экземпляром"""
+    storage = SQLiteStorage(flush_interval=60)
+    await storage.set_state(KEY, AddTaskStates.waiting_for_deadline)
+    await storage.update_data(KEY, {"title": "Курсовая", "priority": "high"})
+    assert count_rows() == 0  # запись отложена
+    await storage.close()
+
+    restarted = SQLiteStorage()
+    assert await restarted.get_state(KEY) == AddTaskStates.waiting_for_deadline.state
+    assert await restarted.get_data(KEY) == {"title": "Курсовая", "priority": "high"}
+
+    # Завершённый диалог не оставляет строки
+    await restarted.set_state(KEY, None)
+    await restarted.set_data(KEY, {})
+    await restarted.close()
+    assert count_rows() == 0
+
+
+@pytest.mark.asyncio
+async def test_writes_coalesced_and_cached(pooled_db):
+    """Серия изменений — одна запись; повторные чтения — из памяти"""
+    storage = SQLiteStorage(flush_interval=60)
+    for step in range(10):
+        await storage.update_data(KEY, {"step": step})
+        await storage.get_state(KEY)
+    await storage.close()
+
+    assert storage.stats["writes"] == 10
+    assert storage.stats["flushes"] == 1 and storage.stats["rows_written"] == 1
+    assert storage.stats["misses"] == 1
+
+    # Без кэша каждое чтение идёт в БД и видит записи других процессов
+    other = SQLiteStorage(cache_ttl=0)
+    assert await other.get_data(KEY) == {"step": 9}
+    assert await other.get_data(KEY) == {"step": 9}
+    assert other.stats["misses"] == 2
+
+
+@pytest.mark.asyncio
+async def test_abandoned_states_expire(pooled_db):
+    """Состояние старше TTL читается пустым и удаляется из таблицы"""
+    clock = Clock()
+    storage = SQLiteStorage(flush_interval=0, state_ttl=3600, clock=clock)
+    await storage.set_state(KEY, AddTaskStates.waiting_for_title)
+    other_key = StorageKey(bot_id=42, chat_id=2, user_id=2)
+    await storage.set_state(other_key, AddTaskStates.waiting_for_title)
+    assert count_rows() == 2
+
+    clock.now += 2 * 3600
+    assert await storage.get_state(KEY) is None
+    # Второй ключ никто не читал — его удалила периодическая очистка
+    assert count_rows() == 0 and storage.stats["purged"] == 1
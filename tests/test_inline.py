@@ -0,0 +1,89 @@
+"""Тесты inline-режима"""
+
+import asyncio
+import os
+import sys
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from aiogram.types import InlineQuery
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src import cache as cache_module  # noqa: E402
+from src.cache import UserListCache  # noqa: E402
+from src.handlers import inline  # noqa: E402
+
+
+def make_query(query_id: str, text: str, user_id: int = 1):
+    inline_query = MagicMock(spec=InlineQuery)
+    inline_query.id = query_id
+    inline_query.query = text
+    inline_query.from_user = MagicMock(id=user_id)
+    inline_query.answer = AsyncMock()
+    return inline_query
+
+
+@pytest.fixture
+def inline_env(pooled_db, monkeypatch):
+    from src.repository import register_user
+
+    register_user(1, "a", None, None)
+    monkeypatch.setattr(cache_module, "_list_cache", UserListCache())
+    monkeypatch.setattr(inline, "INLINE_DEBOUNCE", 0.05)
+    monkeypatch.setattr(
+        inline, "stats", {"queries": 0, "cache_hits": 0, "superseded": 0, "loaded": 0}
+    )
+
+
+@pytest.mark.asyncio
+async def test_keystrokes_debounced_and_cached(inline_env):
+    """Набор по буквам — один запрос к БД; повтор — из кэша до записи"""
+    from src.handlers.events import base as events
+    from src.handlers.tasks import base as tasks
+
+    task = {"title": "Сдать курсовую", "deadline": "2030-05-20"}
+    task_id = tasks.save_task(1, task)[1]
+    events.save_event(1, {"title": "Сдача зачёта", "event_datetime": "2030-05-21 10:00"})
+
+    queries = [make_query(str(i), text) for i, text in enumerate(["С", "сд", "сда"])]
+
+    async def typing():
+        for query in queries:
+            asyncio.create_task(inline.handle_inline_query(query))
+            await asyncio.sleep(0.01)
+        await asyncio.sleep(0.2)
+
+    await typing()
+    assert [q.answer.await_count for q in queries] == [0, 0, 1]
+    assert inline.stats["superseded"] == 2 and inline.stats["loaded"] == 1
+
+    results = queries[-1].answer.await_args.args[0]
+    assert {r.id for r in results} == {f"task_{task_id}", "event_1"}
+    kwargs = queries[-1].answer.await_args.kwargs
+    assert kwargs["is_personal"] and kwargs["cache_time"] > 0
+    article = next(r for r in results if r.id == f"task_{task_id}")
+    assert "Сдать курсовую" in article.input_message_content.message_text
+
+    # Тот же запрос отвечается сразу из кэша
+    again = make_query("9", "  СДА ")
+    await inline.handle_inline_query(again)
+    assert again.answer.await_args.args[0] == results
+    assert inline.stats["cache_hits"] == 1 and inline.stats["loaded"] == 1
+
+    # Запись пользователя сбрасывает кэш
+    tasks.update_task(task_id, "title", "Переделать курсовую")
+    after_write = make_query("10", "сда")
+    await inline.handle_inline_query(after_write)
+    assert [r.id for r in after_write.answer.await_args.args[0]] == ["event_1"]
+    assert inline.stats["loaded"] == 2
+
+
+@pytest.mark.asyncio
+async def test_empty_query_skips_database(inline_env):
+    """Пустой запрос («@бот ») не обращается к БД"""
+    query = make_query("1", "   ")
+    await inline.handle_inline_query(query)
+    query.answer.assert_awaited_once()
+    assert query.answer.await_args.args[0] == []
+    assert inline.stats["loaded"] == 0
@@ -0,0 +1,110 @@
+"""Тесты показа экранов редактированием сообщения"""
+
+import os
+import sys
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.methods import EditMessageText
+from aiogram.types import CallbackQuery, InlineKeyboardButton, InlineKeyboardMarkup
+from aiogram.types import Message
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src import navigation  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def clean_state(monkeypatch):
+    monkeypatch.setattr(navigation, "_rendered", navigation.OrderedDict())
+    monkeypatch.setattr(
+        navigation, "stats", {"sent": 0, "edited": 0, "skipped": 0, "fallback": 0}
+    )
+
+
+def make_message(message_id=1, chat_id=10):
+    message = MagicMock(spec=Message)
+    message.message_id = message_id
+    message.chat = MagicMock(id=chat_id)
+    message.text = "экран"
+    message.edit_text = AsyncMock()
+    message.answer = AsyncMock(return_value=make_sent(message_id + 100, chat_id))
+    return message
+
+
+def make_sent(message_id, chat_id):
+    sent = MagicMock(spec=Message)
+    sent.message_id = message_id
+    sent.chat = MagicMock(id=chat_id)
+    sent.text = "экран"
+    return sent
+
+
+def make_callback(message):
+    callback = MagicMock(spec=CallbackQuery)
+    callback.message = message
+    return callback
+
+
+def keyboard(data):
+    return InlineKeyboardMarkup(
+        inline_keyboard=[[InlineKeyboardButton(text="Далее", callback_data=data)]]
+    )
+
+
+def bad_request(text):
+    return TelegramBadRequest(
+        method=EditMessageText(text="x"), message=f"Bad Request: {text}"
+    )
+
+
+@pytest.mark.asyncio
+async def test_edit_skips_unchanged_content():
+    """Повтор того же экрана не вызывает API, изменённый — редактирует"""
+    message = make_message()
+    callback = make_callback(message)
+
+    await navigation.render(callback, "Страница 1", keyboard("n5"))
+    await navigation.render(callback, "Страница 1", keyboard("n5"))
+    await navigation.render(callback, "Страница 1", keyboard("n10"))
+
+    assert message.edit_text.await_count == 2
+    message.answer.assert_not_awaited()
+    assert navigation.stats == {"sent": 0, "edited": 2, "skipped": 1, "fallback": 0}
+
+
+@pytest.mark.asyncio
+async def test_bad_request_falls_back_to_new_message():
+    """Неизменённое сообщение — пропуск, нередактируемое — новое сообщение"""
+    message = make_message()
+    message.edit_text.side_effect = bad_request("message is not modified")
+    await navigation.render(make_callback(message), "Экран")
+    message.answer.assert_not_awaited()
+
+    # Хэш запомнен — следующий такой же показ даже не обращается к API
+    await navigation.render(make_callback(message), "Экран")
+    assert message.edit_text.await_count == 1
+
+    other = make_message(message_id=2)
+    other.edit_text.side_effect = bad_request("message can't be edited")
+    sent = await navigation.render(make_callback(other), "Экран", keyboard("n5"))
+    other.answer.assert_awaited_once()
+    assert sent is other.answer.return_value
+
+    # Новое сообщение запомнено: повторный показ на нём пропускается
+    await navigation.render(make_callback(sent), "Экран", keyboard("n5"))
+    assert navigation.stats == {"sent": 1, "edited": 0, "skipped": 3, "fallback": 1}
+
+
+@pytest.mark.asyncio
+async def test_message_target_sends_new_message():
+    """Команда или кнопка главного меню всегда отправляет новое сообщение"""
+    message = make_message()
+
+    await navigation.render(message, "Список")
+    await navigation.render(message, "Список")
+
+    assert message.answer.await_count == 2
+    message.edit_text.assert_not_awaited()
+    assert navigation.stats["sent"] == 2
@@ -0,0 +1,132 @@
+"""Тесты постраничного вывода по ключу"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.pagination import PAGE_SIZE, decode_cursor  # noqa: E402
+
+
+def walk(fetch, prefix, key_types, user_id):
+    """Пройти список вперёд до конца и обратно, как по кнопкам"""
+    pages = [fetch(user_id)]
+    while pages[-1].has_next:
+        data = pages[-1].next_data(prefix)
+        assert len(data.encode()) <= 64  # лимит callback_data в Telegram
+        pages.append(fetch(user_id, decode_cursor(data, prefix, key_types)))
+
+    back = [pages[-1]]
+    while back[-1].has_prev:
+        data = back[-1].prev_data(prefix)
+        back.append(fetch(user_id, decode_cursor(data, prefix, key_types)))
+    return pages, back
+
+
+def test_task_pages_follow_full_list_order(pooled_db):
+    """Страницы задач вперёд и назад идут в порядке get_user_tasks"""
+    from src.handlers.tasks import base
+    from src.repository import register_user
+
+    register_user(1, "a", None, None)
+    register_user(2, "b", None, None)
+    for i in range(13):
+        base.save_task(
+            1,
+            {
+                "title": f"Задача {i}",
+                # Много задач с одинаковым приоритетом и без дедлайна
+                "deadline": f"2030-01-{i % 3 + 1:02d}" if i % 2 else None,
+                "priority": ("high", "medium", "medium")[i % 3],
+            },
+        )
+    base.save_task(2, {"title": "Чужая", "priority": "high"})
+    done = base.save_task(1, {"title": "Готово", "priority": "high"})[1]
+    base.update_task(done, "complete", True)
+
+    expected = [task["id"] for task in base.get_user_tasks(1, only_active=True)]
+    pages, back = walk(
+        base.get_user_tasks_page, "tasks_page_", base.TASK_PAGE_KEY_TYPES, 1
+    )
+
+    assert [len(page.items) for page in pages] == [5, 5, 3]
+    assert [task["id"] for page in pages for task in page.items] == expected
+    assert [page.position for page in pages] == [0, 5, 10]
+
+    assert [task["id"] for page in reversed(back) for task in page.items] == expected
+    assert back[-1].position == 0
+
+
+def test_task_overview(pooled_db, monkeypatch):
+    """Обзор: первая страница, число завершённых и последние по времени"""
+    from src.handlers.tasks import base
+    from src.repository import register_user
+
+    register_user(1, "a", None, None)
+    ids = [base.save_task(1, {"title": f"Задача {i}"})[1] for i in range(10)]
+
+    # Завершаем не по порядку создания: важен момент завершения
+    for ts, task_id in enumerate((ids[5], ids[1], ids[8], ids[3]), 1000):
+        monkeypatch.setattr(base.time, "time", lambda ts=ts: ts)
+        base.update_task(task_id, "complete", True)
+    base.update_task(ids[3], "complete", False)
+
+    overview = base.get_task_overview(1)
+    expected = [task["id"] for task in base.get_user_tasks(1, only_active=True)]
+    assert [task["id"] for task in overview["page"].items] == expected[:PAGE_SIZE]
+    assert overview["page"].has_next
+    assert overview["completed_count"] == 3
+    assert [task["id"] for task in overview["recent_completed"]] == [
+        ids[8],
+        ids[1],
+        ids[5],
+    ]
+    assert base.get_task(ids[3])["completed_at"] is None
+
+
+def test_lesson_and_event_pages(pooled_db):
+    """Строковые ключи (время урока) и одинаковое время событий"""
+    from src.handlers.events import base as events
+    from src.handlers.schedule import base as schedule
+    from src.repository import register_user
+
+    register_user(1, "a", None, None)
+    for i in range(7):
+        schedule.save_lesson(
+            1,
+            {
+                "subject": f"Урок {i}",
+                "day": ("Вторник", "Понедельник")[i % 2],
+                "start_time": f"{9 + i // 2:02d}:00",
+                "end_time": "18:00",
+            },
+        )
+        events.save_event(
+            1, {"title": f"Событие {i}", "event_datetime": "2030-05-01 10:00"}
+        )
+
+    expected = [lesson["id"] for lesson in schedule.get_user_lessons(1)]
+    pages, _ = walk(
+        schedule.get_user_lessons_page,
+        "lessons_page_",
+        schedule.LESSON_PAGE_KEY_TYPES,
+        1,
+    )
+    assert [lesson["id"] for page in pages for lesson in page.items] == expected
+
+    expected = [event["id"] for event in events.get_user_events(1)]
+    pages, _ = walk(
+        events.get_user_events_page, "events_page_", events.EVENT_PAGE_KEY_TYPES, 1
+    )
+    assert [event["id"] for page in pages for event in page.items] == expected
+    assert len(pages[0].items) == PAGE_SIZE
+
+
+def test_legacy_offset_callback_opens_first_page():
+    """Кнопки старого формата (смещение) и мусор открывают первую страницу"""
+    assert decode_cursor("tasks_page_5", "tasks_page_", (int, int, int)) is None
+    assert decode_cursor("tasks_page_n5_x_1_2", "tasks_page_", (int, int, int)) is None
+    cursor = decode_cursor(
+        "lessons_page_p5_1_09:00_7", "lessons_page_", (int, str, int)
+    )
+    assert cursor == ("p", 5, (1, "09:00", 7))
@@ -0,0 +1,172 @@
+"""Регрессионные тесты планов запросов.
+
+Каждый горячий запрос снимается трассировкой соединения при вызове
+настоящей функции, затем прогоняется через EXPLAIN QUERY PLAN. Тест
+падает, если запрос читает таблицу полным сканированием.
+"""
+
+import os
+import re
+import sqlite3
+import sys
+from datetime import datetime, timedelta
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+# «SCAN tasks» или «SCAN t» без USING INDEX — полное сканирование таблицы
+FULL_SCAN = re.compile(r"^SCAN (\w+)$")
+
+
+@pytest.fixture
+def traced_db(pooled_db, monkeypatch):
+    """Пул, соединения которого записывают все выполненные запросы"""
+    from src.repository import register_user
+
+    register_user(123456, "test_user", "Test", None)
+
+    statements = []
+    acquire = pooled_db.acquire
+
+    def traced_acquire():
+        conn = acquire()
+        conn.set_trace_callback(statements.append)
+        return conn
+
+    monkeypatch.setattr(pooled_db, "acquire", traced_acquire)
+    yield pooled_db, statements
+
+
+def seed(pool):
+    from src.handlers.events.base import save_event
+    from src.handlers.schedule.base import save_lesson
+    from src.handlers.tasks.base import save_task
+
+    deadline = (datetime.now() + timedelta(days=10)).strftime("%Y-%m-%d")
+    save_task(123456, {"title": "Задача", "deadline": deadline, "priority": "high"})
+    event_time = (datetime.now() + timedelta(hours=30)).strftime("%d.%m.%Y %H:%M")
+    save_event(123456, {"title": "Событие", "event_datetime": event_time})
+    save_lesson(
+        123456,
+        {
+            "subject": "Математика",
+            "day_of_week": "Понедельник",
+            "start_time": "09:00",
+            "end_time": "10:30",
+        },
+    )
+
+
+def hot_calls():
+    from src import repository
+    from src.event_reminders import EventReminderService
+    from src.handlers.events import base as events
+    from src.handlers.schedule import base as schedule
+    from src.handlers.tasks import base as tasks
+    from src.task_reminders import TaskReminderService
+
+    task_service = TaskReminderService(bot=None)
+    event_service = EventReminderService(bot=None)
+    now = datetime.now()
+    now_str = now.strftime("%Y-%m-%d %H:%M")
+    # Все напоминания из seed() к этому моменту наступили: захват не пуст
+    now_ts = int(now.timestamp()) + 40 * 86400
+    later = (now + timedelta(days=30)).strftime("%Y-%m-%d")
+
+    return {
+        "task_reconcile": lambda: task_service._fetch_upcoming_tasks(
+            now.strftime("%Y-%m-%d"), later, now_str
+        ),
+        "task_due": lambda: task_service._claim_due_reminders(now_ts, "w1"),
+        "task_pending": task_service.fetch_pending_reminder_times,
+        "task_plan": lambda: task_service._plan_task_reminders(
+            [task_service._fetch_task(1)]
+        ),
+        "task_mark_sent": lambda: task_service._mark_reminders_sent([1], "w1"),
+        "task_leased": lambda: task_service._fetch_leased_reminders(now_ts),
+        "task_cleanup": task_service._delete_old_reminders,
+        "event_reconcile": lambda: event_service._fetch_upcoming_events(
+            now + timedelta(hours=48)
+        ),
+        "event_due": lambda: event_service._claim_due_reminders(now_ts, "w1"),
+        "event_pending": event_service.fetch_pending_reminder_times,
+        "event_plan": lambda: event_service._plan_event_reminders(
+            [event_service._fetch_event(1)]
+        ),
+        "event_cleanup": event_service._delete_old_reminders,
+        "user_tasks_active": lambda: tasks.get_user_tasks(123456, True),
+        "user_tasks_all": lambda: tasks.get_user_tasks(123456, False),
+        "tasks_by_priority": lambda: tasks.get_tasks_by_priority(123456, "high"),
+        "upcoming_deadlines": lambda: tasks.get_upcoming_deadlines(123456),
+        "tasks_statistics": lambda: tasks.get_tasks_statistics(123456),
+        "user_events": lambda: events.get_user_events(123456),
+        "user_tasks_page": lambda: tasks.get_user_tasks_page(
+            123456, ("n", 5, (2, 0, 1))
+        ),
+        "user_events_page": lambda: events.get_user_events_page(
+            123456, ("p", 0, (0, 1))
+        ),
+        "user_lessons_page": lambda: schedule.get_user_lessons_page(
+            123456, ("n", 5, (1, "09:00", 1))
+        ),
+        "task_overview": lambda: tasks.get_task_overview(123456),
+        "user_lessons": lambda: schedule.get_user_lessons(123456),
+        "user_counters": lambda: repository.get_user_counters(123456),
+    }
+
+
+def full_scans(db_path: str, statements: list) -> list:
+    """Полные сканирования в планах выполненных SELECT/UPDATE/DELETE"""
+    conn = sqlite3.connect(db_path)
+    scans = []
+    for sql in statements:
+        if not re.match(r"\s*(SELECT|UPDATE|DELETE)", sql, re.IGNORECASE):
+            continue
+        for _, _, _, detail in conn.execute("EXPLAIN QUERY PLAN " + sql):
+            match = FULL_SCAN.match(detail)
+            if match:
+                scans.append((match.group(1), " ".join(sql.split())))
+    conn.close()
+    return scans
+
+
+HOT_QUERIES = [
+    "task_reconcile",
+    "task_due",
+    "task_pending",
+    "task_plan",
+    "task_mark_sent",
+    "task_leased",
+    "task_cleanup",
+    "event_reconcile",
+    "event_due",
+    "event_pending",
+    "event_plan",
+    "event_cleanup",
+    "user_tasks_active",
+    "user_tasks_all",
+    "tasks_by_priority",
+    "upcoming_deadlines",
+    "tasks_statistics",
+    "user_events",
+    "user_tasks_page",
+    "user_events_page",
+    "user_lessons_page",
+    "task_overview",
+    "user_lessons",
+    "user_counters",
+]
+
+
+@pytest.mark.parametrize("name", HOT_QUERIES)
+def test_hot_query_uses_index(traced_db, name):
+    """Горячий запрос не деградирует до полного сканирования таблицы"""
+    pool, statements = traced_db
+    seed(pool)
+    statements.clear()
+
+    hot_calls()[name]()
+
+    assert statements, f"{name}: не выполнено ни одного запроса"
+    assert full_scans(pool.db_path, statements) == []
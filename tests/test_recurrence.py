@@ -0,0 +1,128 @@
+"""Тесты вхождений повторяющихся событий"""
+
+import os
+import sys
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.recurrence import occurrences  # noqa: E402
+
+
+def take(generator, n):
+    return [when for when, _ in zip(generator, range(n))]
+
+
+def test_occurrences_rules_and_bounds():
+    """Правила, границы серии, пропуски и переход сразу к нужному вхождению"""
+    start = datetime(2030, 1, 31, 18, 30)
+
+    # 31-е число в коротких месяцах сдвигается на последний день месяца
+    assert take(occurrences(start, "monthly"), 4) == [
+        datetime(2030, 1, 31, 18, 30),
+        datetime(2030, 2, 28, 18, 30),
+        datetime(2030, 3, 31, 18, 30),
+        datetime(2030, 4, 30, 18, 30),
+    ]
+    assert take(occurrences(datetime(2028, 2, 29, 9, 0), "yearly"), 2) == [
+        datetime(2028, 2, 29, 9, 0),
+        datetime(2029, 2, 28, 9, 0),
+    ]
+
+    # Пропуск не продлевает серию с ограниченным числом вхождений
+    skipped = {start + timedelta(weeks=1)}
+    assert list(occurrences(start, "weekly", count=3, exceptions=skipped)) == [
+        start,
+        start + timedelta(weeks=2),
+    ]
+    until = start + timedelta(days=2, hours=1)
+    assert list(occurrences(start, "daily", until=until)) == [
+        start + timedelta(days=day) for day in range(3)
+    ]
+
+    # Вхождение через сто лет находится без перебора серии
+    after = datetime(2130, 6, 15, 12, 0)
+    assert next(occurrences(start, "daily", after=after)) == datetime(
+        2130, 6, 15, 18, 30
+    )
+    assert next(occurrences(start, "monthly", after=after)) == datetime(
+        2130, 6, 30, 18, 30
+    )
+    assert list(occurrences(start, None, after=after)) == []
+    assert list(occurrences(start, "none")) == [start]
+
+
+def test_recurring_event_lists_and_reminders(pooled_db):
+    """Серия видна в списке по ближайшему вхождению, напоминания создаются
+    для вхождений в окне, пропуск вхождения сдвигает серию"""
+    from src.database import get_connection
+    from src.event_reminders import EventReminderService
+    from src.handlers.events import base
+    from src.repository import register_user
+    from src.timestamps import to_epoch
+
+    register_user(1, "a", None, None)
+    now = datetime.now().replace(second=0, microsecond=0)
+    start = now - timedelta(days=10) + timedelta(hours=2)
+    base.save_event(
+        1,
+        {
+            "title": "Планёрка",
+            "event_datetime": start,
+            "is_recurring": True,
+            "recurrence_rule": "daily",
+        },
+    )
+    base.save_event(1, {"title": "Разовое", "event_datetime": now + timedelta(hours=5)})
+    with get_connection() as conn:
+        conn.execute(
+            "INSERT INTO events (user_id, title, event_datetime, recurrence_rule, "
+            "recurrence_count) VALUES (1, 'Закончилось', ?, 'weekly', 2)",
+            ((now - timedelta(days=30)).strftime("%Y-%m-%d %H:%M"),),
+        )
+
+    upcoming = now + timedelta(hours=2)
+    events = base.get_user_events(1)
+    titles = [event["title"] for event in events]
+    assert titles == ["Закончилось", "Планёрка", "Разовое"]
+    assert events[0]["next_ts"] == to_epoch(now - timedelta(days=23))
+    assert events[1]["next_ts"] == to_epoch(upcoming)
+    assert base.get_event(events[1]["id"])["series_active"] == 1
+    assert base.get_event(events[0]["id"])["series_active"] == 0
+
+    # Ближайшее вхождение и следующее, попавшее в окно 48 часов
+    service = EventReminderService(bot=None)
+    series = service._fetch_event(events[1]["id"])
+    service._plan_event_reminders([series], now=now, reset=True)
+    with get_connection() as conn:
+        planned = {
+            row[0]
+            for row in conn.execute(
+                "SELECT DISTINCT occurrence_ts FROM event_reminders WHERE event_id = ?",
+                (series["id"],),
+            )
+        }
+    assert planned == {to_epoch(upcoming + timedelta(days=day)) for day in range(2)}
+
+    # Сверка вернётся к серии, когда следующее вхождение войдёт в окно
+    def reconciled(threshold):
+        return [row["id"] for row in service._fetch_upcoming_events(threshold)]
+
+    assert series["id"] not in reconciled(now + timedelta(hours=48))
+    assert series["id"] in reconciled(now + timedelta(hours=51))
+
+    success, _ = base.skip_event_occurrence(series["id"])
+    assert success
+    assert base.get_event(series["id"])["next_ts"] == to_epoch(
+        upcoming + timedelta(days=1)
+    )
+    service._plan_event_reminders([series], now=now, reset=True)
+    with get_connection() as conn:
+        planned = {
+            row[0]
+            for row in conn.execute(
+                "SELECT DISTINCT occurrence_ts FROM event_reminders WHERE event_id = ?",
+                (series["id"],),
+            )
+        }
+    assert planned == {to_epoch(upcoming + timedelta(days=1))}
@@ -0,0 +1,469 @@
+"""Тесты сервисов и планировщика напоминаний"""
+
+import asyncio
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.reminder_scheduler import ReminderScheduler  # noqa: E402
+
+
+@pytest.mark.asyncio
+async def test_scheduler_fires_on_time_and_stays_idle():
+    """Напоминание отправляется с субсекундной точностью, без холостых вызовов"""
+    scheduler = ReminderScheduler()
+    calls = []
+
+    async def handler():
+        calls.append(time.time())
+
+    scheduler.register("task", handler, lambda: [])
+    runner = asyncio.create_task(scheduler.start())
+    await asyncio.sleep(0.05)
+    assert calls == []
+
+    due = datetime.now() + timedelta(seconds=0.3)
+    scheduler.schedule("task", 1, due)
+    await asyncio.sleep(0.6)
+
+    assert len(calls) == 1
+    assert abs(calls[0] - due.timestamp()) < 0.1
+
+    await scheduler.stop()
+    await runner
+
+
+@pytest.mark.asyncio
+async def test_rescheduled_reminder_fires_once_at_new_time():
+    """Перенесённое напоминание срабатывает один раз — по новому времени"""
+    scheduler = ReminderScheduler()
+    calls = []
+
+    async def handler():
+        calls.append(time.time())
+
+    scheduler.register("event", handler, lambda: [])
+    runner = asyncio.create_task(scheduler.start())
+    await asyncio.sleep(0.05)
+
+    now = datetime.now()
+    scheduler.schedule("event", 7, now + timedelta(seconds=0.2))
+    scheduler.schedule("event", 7, now + timedelta(seconds=0.4))
+    await asyncio.sleep(0.7)
+
+    assert len(calls) == 1
+    assert calls[0] >= (now + timedelta(seconds=0.4)).timestamp()
+
+    await scheduler.stop()
+    await runner
+
+
+def test_task_write_materializes_reminders(pooled_db):
+    """Сохранение и изменение задачи сразу пересчитывает её напоминания"""
+    from src.changes import subscribe, unsubscribe
+    from src.database import get_connection
+    from src.handlers.tasks import base
+    from src.repository import register_user
+    from src.task_reminders import TaskReminderService
+
+    service = TaskReminderService(bot=None)
+    subscribe("task", service.on_task_changed)
+    try:
+        register_user(123456, "test_user", "Test", None)
+        deadline = (datetime.now() + timedelta(days=10)).strftime("%Y-%m-%d")
+        _, task_id, _ = base.save_task(
+            123456, {"title": "Курсовая", "deadline": deadline}
+        )
+
+        def pending():
+            conn = get_connection()
+            rows = conn.execute(
+                "SELECT reminder_type FROM task_reminders "
+                "WHERE task_id = ? AND reminder_sent = 0 ORDER BY reminder_time",
+                (task_id,),
+            ).fetchall()
+            conn.close()
+            return [row[0] for row in rows]
+
+        assert pending() == ["7d", "3d", "1d", "12h"]
+
+        # Перенос дедлайна: старые напоминания заменяются новыми, без дублей
+        new_deadline = (datetime.now() + timedelta(days=5)).strftime("%Y-%m-%d")
+        base.update_task(task_id, "deadline", new_deadline)
+        assert pending() == ["3d", "1d", "12h"]
+
+        # Название на расписание не влияет
+        base.update_task(task_id, "title", "Курсовая работа")
+        assert pending() == ["3d", "1d", "12h"]
+
+        base.update_task(task_id, "complete", True)
+        assert pending() == []
+    finally:
+        unsubscribe("task", service.on_task_changed)
+
+
+def test_batch_generation_is_idempotent(pooled_db):
+    """Повторная генерация для пачки задач не создаёт дублей"""
+    from src.database import get_connection
+    from src.repository import register_user
+    from src.task_reminders import TaskReminderService
+
+    register_user(123456, "test_user", "Test", None)
+    conn = get_connection()
+    deadline = (datetime.now() + timedelta(days=10)).strftime("%Y-%m-%d")
+    conn.executemany(
+        "INSERT INTO tasks (user_id, title, deadline) VALUES (?, ?, ?)",
+        [(123456, f"Задача {i}", deadline) for i in range(50)],
+    )
+    conn.commit()
+    tasks = conn.execute("SELECT id, title, deadline_ts FROM tasks").fetchall()
+    conn.close()
+
+    service = TaskReminderService(bot=None)
+    now = datetime.now()
+    assert service._plan_task_reminders(tasks, now) == 200
+
+    # Отправленное напоминание не пересоздаётся повторной генерацией
+    conn = get_connection()
+    conn.execute("UPDATE task_reminders SET reminder_sent = 1 WHERE reminder_type = '7d'")
+    conn.commit()
+    conn.close()
+    assert service._plan_task_reminders(tasks, now) == 150
+
+    conn = get_connection()
+    total = conn.execute("SELECT COUNT(*) FROM task_reminders").fetchone()[0]
+    conn.close()
+    assert total == 200
+
+
+@pytest.mark.asyncio
+async def test_delivery_pipeline_limits_and_retry_after():
+    """Конвейер выдерживает интервал в чат, повторяет после 429 и коммитит пачками"""
+    from aiogram.exceptions import TelegramRetryAfter
+    from aiogram.methods import SendMessage
+
+    from src.delivery import DeliveryPipeline
+
+    pipeline = DeliveryPipeline(global_rate=1000, per_chat_interval=0.1, commit_batch=5)
+    reminders = [{"id": i, "telegram_id": i % 3} for i in range(9)]
+    sent_at = {}
+    marked = []
+    flooded = []
+
+    async def send(reminder):
+        if reminder["id"] == 4 and not flooded:
+            flooded.append(reminder["id"])
+            raise TelegramRetryAfter(
+                method=SendMessage(chat_id=1, text="x"),
+                message="Too Many Requests",
+                retry_after=1,
+            )
+        sent_at.setdefault(reminder["telegram_id"], []).append(time.monotonic())
+
+    started = time.monotonic()
+    sent = await pipeline.deliver(reminders, send, marked.append)
+
+    assert sent == 9
+    assert sorted(i for batch in marked for i in batch) == list(range(9))
+    assert len(marked) == 2  # 5 + 4 вместо 9 отдельных коммитов
+    assert pipeline.stats["retry_after"] == 1
+    # После 429 выдача токенов приостанавливается на retry_after
+    assert time.monotonic() - started >= 1
+    for times in sent_at.values():
+        gaps = [b - a for a, b in zip(times, times[1:])]
+        assert all(gap >= 0.09 for gap in gaps)
+
+
+@pytest.mark.asyncio
+async def test_scheduler_follows_virtual_clock():
+    """С виртуальными часами напоминание срабатывает, когда часы переведены"""
+    from src.clock import VirtualClock
+
+    clock = VirtualClock(datetime(2030, 1, 1, 8, 0))
+    scheduler = ReminderScheduler(clock=clock)
+    calls = []
+
+    async def handler():
+        calls.append(clock.now())
+
+    scheduler.register("task", handler, lambda: [])
+    scheduler.bind()
+    due = datetime(2030, 1, 1, 9, 0)
+    scheduler.schedule("task", 1, due)
+    scheduler.schedule("task", 2, due + timedelta(hours=1))
+
+    assert scheduler.next_due() == due.timestamp()
+    await scheduler.dispatch_due()
+    assert calls == []
+
+    clock.set(due)
+    await scheduler.dispatch_due()
+    assert calls == [due]
+    assert scheduler.next_due() == (due + timedelta(hours=1)).timestamp()
+
+
+def test_replan_keeps_due_unsent_reminders(pooled_db):
+    """Сверка не теряет наступившее, но ещё не отправленное напоминание"""
+    from src.clock import VirtualClock
+    from src.database import get_connection
+    from src.repository import register_user
+    from src.task_reminders import TaskReminderService
+
+    register_user(123456, "test_user", "Test", None)
+    conn = get_connection()
+    conn.execute(
+        "INSERT INTO tasks (user_id, title, deadline) "
+        "VALUES (123456, 'Курсовая', '2030-01-20')"
+    )
+    conn.commit()
+    tasks = conn.execute("SELECT id, title, deadline_ts FROM tasks").fetchall()
+    conn.close()
+
+    clock = VirtualClock(datetime(2030, 1, 10, 0, 0))
+    service = TaskReminderService(bot=None, clock=clock)
+    assert service._plan_task_reminders(tasks) == 4
+
+    # 09:00 за 7 дней: напоминание наступило, но планировщик ещё не отправил его
+    clock.set(datetime(2030, 1, 13, 9, 0))
+    assert service._plan_task_reminders(tasks) == 4
+
+    conn = get_connection()
+    types = [
+        row[0]
+        for row in conn.execute(
+            "SELECT reminder_type FROM task_reminders ORDER BY reminder_ts"
+        )
+    ]
+    conn.close()
+    assert types == ["7d", "3d", "1d", "12h"]
+
+
+def _seed_due_task_reminders(users: int, tasks_per_user: int):
+    """Задачи с дедлайном 2030-01-20 и их напоминания; вернуть часы,
+    на которых все напоминания уже наступили"""
+    from src.clock import VirtualClock
+    from src.database import get_connection
+    from src.repository import register_user
+    from src.task_reminders import TaskReminderService
+
+    for user_id in range(1, users + 1):
+        register_user(user_id, f"user{user_id}", None, None)
+    conn = get_connection()
+    conn.executemany(
+        "INSERT INTO tasks (user_id, title, deadline) VALUES (?, ?, '2030-01-20')",
+        [
+            (user_id, f"Задача {i}")
+            for user_id in range(1, users + 1)
+            for i in range(tasks_per_user)
+        ],
+    )
+    conn.commit()
+    tasks = conn.execute("SELECT id, title, deadline_ts FROM tasks").fetchall()
+    conn.close()
+
+    clock = VirtualClock(datetime(2030, 1, 10, 0, 0))
+    TaskReminderService(bot=None, clock=clock)._plan_task_reminders(tasks)
+    clock.set(datetime(2030, 1, 19, 22, 0))
+    return clock
+
+
+def test_outbox_claim_is_atomic_and_lease_expires(pooled_db):
+    """Параллельные отправители захватывают каждую строку один раз,
+    просроченный захват подбирается другим отправителем"""
+    import threading
+
+    from src import outbox
+    from src.database import get_connection
+
+    clock = _seed_due_task_reminders(users=4, tasks_per_user=25)
+    now_ts = int(clock.time())
+    claimed = []
+    errors = []
+
+    def worker(n):
+        conn = get_connection()
+        try:
+            while True:
+                ids = outbox.claim(conn, "task_reminders", now_ts, f"w{n}", limit=7)
+                if not ids:
+                    break
+                claimed.extend(ids)
+                outbox.finish(conn, "task_reminders", ids, f"w{n}")
+                conn.commit()
+        except Exception as e:
+            errors.append(e)
+        finally:
+            conn.close()
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert len(claimed) == len(set(claimed)) == 400
+
+    # Отправитель захватил строки и упал, не завершив их
+    conn = get_connection()
+    conn.execute(
+        "UPDATE task_reminders SET reminder_sent = 0, state = 'pending' "
+        "WHERE id <= 10"
+    )
+    conn.commit()
+    assert len(outbox.claim(conn, "task_reminders", now_ts, "dead", lease=60)) == 10
+    assert outbox.claim(conn, "task_reminders", now_ts + 59, "alive") == []
+    assert [row[1] for row in outbox.leased(conn, "task_reminders", now_ts)] == [
+        now_ts + 60
+    ] * 10
+
+    recovered = outbox.claim(conn, "task_reminders", now_ts + 60, "alive")
+    assert len(recovered) == 10
+    # Опоздавший владелец просроченного захвата ничего не меняет
+    assert outbox.finish(conn, "task_reminders", recovered, "dead") == 0
+    assert outbox.finish(conn, "task_reminders", recovered, "alive") == 10
+    conn.commit()
+    conn.close()
+
+
+@pytest.mark.asyncio
+async def test_concurrent_services_send_each_reminder_once(pooled_db, monkeypatch):
+    """Несколько отправителей разбирают очередь без дублей, неудачная
+    отправка возвращается в очередь и повторяется"""
+    from src import delivery, outbox
+    from src.database import get_connection
+    from src.repository import db
+    from src.task_reminders import TaskReminderService
+
+    clock = _seed_due_task_reminders(users=10, tasks_per_user=5)
+    monkeypatch.setattr(outbox, "CLAIM_BATCH", 15)
+    monkeypatch.setattr(
+        delivery,
+        "_delivery_pipeline",
+        delivery.DeliveryPipeline(global_rate=10000, per_chat_interval=0),
+    )
+
+    sent = []
+    failed = []
+
+    async def send(reminder):
+        if reminder["id"] == 7 and not failed:
+            failed.append(reminder["id"])
+            raise RuntimeError("сеть недоступна")
+        await asyncio.sleep(0.001)
+        sent.append(reminder["id"])
+
+    services = [TaskReminderService(bot=None, clock=clock) for _ in range(4)]
+    for service in services:
+        service.send_task_reminder = send
+
+    try:
+        await asyncio.gather(*(s.send_scheduled_reminders() for s in services))
+        assert failed == [7] and 7 not in sent
+
+        # Неудачная отправка повторяется только после задержки
+        await services[0].send_scheduled_reminders()
+        assert 7 not in sent
+        clock.advance(outbox.BACKOFF_BASE)
+        await services[0].send_scheduled_reminders()
+    finally:
+        db.shutdown()
+
+    assert sorted(sent) == list(range(1, 201))
+    conn = get_connection()
+    states = dict(
+        conn.execute("SELECT state, COUNT(*) FROM task_reminders GROUP BY state")
+    )
+    conn.close()
+    assert states == {"sent": 200}
+
+
+@pytest.mark.asyncio
+async def test_failed_sends_back_off_and_dead_letter(pooled_db, monkeypatch):
+    """Временные ошибки повторяются с растущей задержкой, постоянные уходят
+    в dead letters, заблокировавший бота пользователь отключается"""
+    import random
+
+    from aiogram.exceptions import TelegramForbiddenError, TelegramNetworkError
+    from aiogram.methods import SendMessage
+
+    from src import delivery, outbox
+    from src.database import get_connection
+    from src.repository import db, register_user
+    from src.task_reminders import TaskReminderService
+    from src.timestamps import to_epoch
+
+    rng = random.Random(1)
+    delays = [outbox.backoff(attempts, rng) for attempts in range(1, 12)]
+    assert 30 <= delays[0] <= 60 and 60 <= delays[1] <= 120
+    assert max(delays) <= outbox.BACKOFF_MAX
+
+    clock = _seed_due_task_reminders(users=2, tasks_per_user=1)
+    monkeypatch.setattr(
+        delivery,
+        "_delivery_pipeline",
+        delivery.DeliveryPipeline(global_rate=10000, per_chat_interval=0),
+    )
+    monkeypatch.setattr(outbox, "stats", dict.fromkeys(outbox.stats, 0))
+    attempts = []
+    method = SendMessage(chat_id=1, text="x")
+
+    async def send(reminder):
+        attempts.append(reminder["telegram_id"])
+        if reminder["telegram_id"] == 1:
+            raise TelegramForbiddenError(method, "bot was blocked by the user")
+        raise TelegramNetworkError(method, "timeout")
+
+    service = TaskReminderService(bot=None, clock=clock)
+    service.send_task_reminder = send
+
+    def query(sql, *params):
+        conn = get_connection()
+        try:
+            return [tuple(row) for row in conn.execute(sql, params)]
+        finally:
+            conn.close()
+
+    try:
+        for _ in range(outbox.MAX_ATTEMPTS):
+            await service.send_scheduled_reminders()
+            clock.advance(outbox.BACKOFF_MAX)
+        await service.send_scheduled_reminders()
+    finally:
+        db.shutdown()
+
+    # Пользователю 1 — одна попытка, остальные сообщения в чат не отправлялись
+    assert attempts.count(1) == 1
+    assert attempts.count(2) == 4 * outbox.MAX_ATTEMPTS
+    assert query("SELECT telegram_id, is_active FROM users ORDER BY 1") == [
+        (1, 0),
+        (2, 1),
+    ]
+    dead = query(
+        "SELECT telegram_id, COUNT(*), MAX(attempts) FROM dead_letters GROUP BY 1"
+    )
+    assert dead == [(1, 4, 1), (2, 4, outbox.MAX_ATTEMPTS)]
+    assert outbox.stats == {
+        "retries": 4 * (outbox.MAX_ATTEMPTS - 1),
+        "dead_letters": 8,
+        "deactivated": 1,
+    }
+    assert query("SELECT COUNT(*) FROM task_reminders WHERE reminder_sent = 0") == [
+        (0,)
+    ]
+
+    # Сверка не читает задачи отключённого пользователя, пока он не вернётся
+    def reconciled():
+        today = to_epoch(datetime(2030, 1, 19))
+        rows = service._fetch_upcoming_tasks(today, today + 86400, "2030-02-01 00:00")
+        return sorted(row["user_id"] for row in rows)
+
+    assert reconciled() == [2]
+    register_user(1, "user1", None, None)
+    assert query("SELECT is_active FROM users WHERE telegram_id = 1") == [(1,)]
+    assert reconciled() == [1, 2]
@@ -0,0 +1,82 @@
+"""Тесты асинхронного слоя доступа к данным"""
+
+import asyncio
+import os
+import sys
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.database import get_connection  # noqa: E402
+from src.repository import AsyncRepository  # noqa: E402
+
+SLOW_QUERY = """
+    WITH RECURSIVE counter(x) AS (
+        SELECT 1 UNION ALL SELECT x + 1 FROM counter WHERE x < 500000
+    )
+    SELECT COUNT(*) FROM counter
+"""
+
+
+def slow_query():
+    conn = get_connection()
+    try:
+        return conn.execute(SLOW_QUERY).fetchone()[0]
+    finally:
+        conn.close()
+
+
+async def measure_lag(stop: asyncio.Event, interval: float = 0.01) -> float:
+    """Максимальная задержка пробуждения цикла событий"""
+    loop = asyncio.get_running_loop()
+    max_lag = 0.0
+    while not stop.is_set():
+        started = loop.time()
+        await asyncio.sleep(interval)
+        max_lag = max(max_lag, loop.time() - started - interval)
+    return max_lag
+
+
+@pytest.mark.asyncio
+async def test_event_loop_lag_stays_flat_during_long_query(pooled_db):
+    """Долгий запрос в потоке БД не блокирует цикл событий"""
+    repo = AsyncRepository(max_workers=1)
+    stop = asyncio.Event()
+    lag_task = asyncio.create_task(measure_lag(stop))
+
+    started = time.perf_counter()
+    result = await repo.run(slow_query)
+    query_time = time.perf_counter() - started
+
+    stop.set()
+    max_lag = await lag_task
+    repo.shutdown()
+
+    assert result == 500000
+    # Запрос занимает заметное время, а цикл событий всё это время отзывчив
+    assert query_time > 0.05
+    assert max_lag < 0.05
+
+
+@pytest.mark.asyncio
+async def test_repository_roundtrip(pooled_db):
+    """Awaitable-методы повторяют синхронные функции base-модулей"""
+    repo = AsyncRepository()
+    await repo.register_user(42, "user", "Имя", None)
+
+    success, task_id, _ = await repo.save_task(
+        42, {"title": "Сдать отчёт", "deadline": "2030-01-15", "priority": "high"}
+    )
+    assert success
+
+    tasks = await repo.get_user_tasks(42)
+    assert [t["id"] for t in tasks] == [task_id]
+
+    counters = await repo.get_user_counters(42)
+    assert counters["active_tasks"] == 1
+
+    assert await repo.delete_task(task_id)
+    assert await repo.get_task(task_id) is None
+    repo.shutdown()
@@ -0,0 +1,93 @@
+"""Тесты полнотекстового поиска"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.pagination import PAGE_SIZE  # noqa: E402
+from src.search import build_match_query, search  # noqa: E402
+
+
+def found(user_id, query):
+    return [(item["kind"], item["title"]) for item in search(user_id, query).items]
+
+
+def test_search_ranks_and_isolates_users(pooled_db):
+    """Префиксы, «ё», заголовок выше описания, чужие записи не видны"""
+    from src.handlers.events import base as events
+    from src.handlers.schedule import base as schedule
+    from src.handlers.tasks import base as tasks
+    from src.repository import register_user
+
+    register_user(1, "a", None, None)
+    register_user(2, "b", None, None)
+    tasks.save_task(1, {"title": "Лабораторная", "description": "Ёмкость по физике"})
+    tasks.save_task(2, {"title": "Физика соседа"})
+    events.save_event(
+        1,
+        {
+            "title": "Физика: олимпиада",
+            "event_datetime": "2030-01-01 10:00",
+            "location": "Главный корпус",
+        },
+    )
+    schedule.save_lesson(
+        1,
+        {
+            "subject": "Матанализ",
+            "day": "Понедельник",
+            "start_time": "09:00",
+            "end_time": "10:00",
+            "teacher": "Фёдоров",
+        },
+    )
+
+    assert found(1, "физ") == [("event", "Физика: олимпиада"), ("task", "Лабораторная")]
+    assert found(1, "емкость") == [("task", "Лабораторная")]
+    assert found(1, "федоров") == [("lesson", "Матанализ")]
+    assert found(1, "олимп корпус") == [("event", "Физика: олимпиада")]
+    assert found(2, "физ") == [("task", "Физика соседа")]
+    assert found(1, "олимп соседа") == []
+
+
+def test_index_follows_updates_and_deletes(pooled_db):
+    """Триггеры обновляют индекс при изменении и удалении"""
+    from src.handlers.tasks import base as tasks
+    from src.repository import register_user
+
+    register_user(1, "a", None, None)
+    task_id = tasks.save_task(1, {"title": "Черновик"})[1]
+    tasks.update_task(task_id, "title", "Курсовая")
+
+    assert found(1, "черновик") == []
+    result = search(1, "курс").items
+    assert [(item["kind"], item["id"]) for item in result] == [("task", task_id)]
+
+    tasks.delete_task(task_id)
+    assert found(1, "курс") == []
+
+
+def test_pages_and_query_syntax(pooled_db):
+    """Страницы по смещению; синтаксис FTS5 в запросе не интерпретируется"""
+    from src.handlers.tasks import base as tasks
+    from src.repository import register_user
+
+    register_user(1, "a", None, None)
+    for i in range(PAGE_SIZE + 2):
+        tasks.save_task(1, {"title": f"Эссе {i}"})
+
+    first = search(1, "эссе")
+    second = search(1, "эссе", offset=PAGE_SIZE)
+    assert len(first.items) == PAGE_SIZE and first.has_next and not first.has_prev
+    assert len(second.items) == 2 and second.has_prev and not second.has_next
+    assert {item["id"] for item in first.items}.isdisjoint(
+        item["id"] for item in second.items
+    )
+
+    assert build_match_query(1, '  "*  ') is None
+    assert build_match_query(1, "Лабораторная") == 'owner:u1 AND ("лаборато"*)'
+    assert build_match_query(7, 'эссе OR owner:u2 NEAR("x")') == (
+        'owner:u7 AND ("эссе"* "or"* "owner"* "u2"* "near"* "x"*)'
+    )
+    assert search(1, '"эссе*" (').items == first.items
@@ -0,0 +1,69 @@
+"""Тесты режима webhook"""
+
+import asyncio
+import os
+import sys
+
+import pytest
+from aiogram import Bot, Dispatcher, Router
+from aiogram.types import Message
+from aiohttp.test_utils import TestClient, TestServer
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.webhook import HEALTH_PATH, create_app  # noqa: E402
+
+SECRET = "test-secret"
+
+
+def make_update(update_id: int, text: str) -> dict:
+    return {
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "date": 0,
+            "chat": {"id": 1, "type": "private"},
+            "from": {"id": 1, "is_bot": False, "first_name": "a"},
+            "text": text,
+        },
+    }
+
+
+@pytest.mark.asyncio
+async def test_webhook_secret_health_and_graceful_shutdown():
+    """Секрет проверяется; остановка дожидается апдейта и вызывает shutdown"""
+    handled, events = [], []
+    router = Router()
+
+    @router.message()
+    async def slow_handler(message: Message):
+        await asyncio.sleep(0.1)
+        handled.append(message.text)
+
+    dp = Dispatcher()
+    dp.include_router(router)
+    dp.startup.register(lambda: events.append("startup"))
+    dp.shutdown.register(lambda: events.append(("shutdown", list(handled))))
+    bot = Bot(token="123456:TEST")
+
+    client = TestClient(TestServer(create_app(dp, bot, path="/hook", secret=SECRET)))
+    await client.start_server()
+    try:
+        response = await client.post("/hook", json=make_update(1, "чужой"))
+        assert response.status == 401
+
+        response = await client.get(HEALTH_PATH)
+        assert response.status == 200 and (await response.json())["status"] == "ok"
+
+        response = await client.post(
+            "/hook",
+            json=make_update(2, "привет"),
+            headers={"X-Telegram-Bot-Api-Secret-Token": SECRET},
+        )
+        assert response.status == 200
+        assert handled == []  # обработка идёт в фоне
+    finally:
+        await client.close()
+
+    assert events == ["startup", ("shutdown", ["привет"])]
+    assert bot.session._session is None or bot.session._session.closed